@@ -0,0 +1,115 @@
+# Paper Football League
+# Image loading helpers
+# By Josh Klipstein
+#
+# Every image is converted to the display's pixel format once at load time,
+# so blits during the game are straight copies.  The football rotation
+# frames are packed side by side into one atlas surface and drawn through
+# subsurfaces of it.
+#
+# Run this file to compare blit rates of the raw and converted images.
+
+import sys
+from time import perf_counter
+
+import pygame as pg
+from pygame.locals import *
+
+BALLFRAMES = 24
+
+
+# Convert an image to the display format, keeping per-pixel alpha only for
+# images that are see-through
+def convert_image(image, alpha=False):
+    if alpha:
+        return image.convert_alpha()
+    return image.convert()
+
+
+# Load an image and resample it to size.  Does not need the display, so it
+# can run on a loader thread.
+def load_scaled(path, size):
+    return pg.transform.smoothscale(pg.image.load(path), size)
+
+
+# Pack equally sized frames side by side into one surface, unconverted.
+# Does not need the display either.
+def pack_frames(frames):
+    width, height = frames[0].get_size()
+    atlas = pg.Surface((width * len(frames), height), SRCALPHA)
+    atlas.fill((0, 0, 0, 0))
+    for i, frame in enumerate(frames):
+        # Copy the pixels as they are instead of blending onto the blank atlas
+        atlas.blit(frame, (i * width, 0), special_flags=BLEND_RGBA_MAX)
+    return atlas
+
+
+# Subsurfaces of an atlas for each of its equally wide frames, in order
+def split_atlas(atlas, count=BALLFRAMES):
+    width = atlas.get_width() // count
+    return [atlas.subsurface((i * width, 0, width, atlas.get_height()))
+            for i in range(count)]
+
+
+# Pack equally sized frames into one converted surface.  Returns the atlas
+# and a subsurface of it for every frame, in the same order.
+def make_atlas(frames):
+    atlas = pack_frames(frames).convert_alpha()
+    return atlas, split_atlas(atlas, len(frames))
+
+
+# Paths of the football rotation frames
+def frame_paths(folder='images'):
+    return ['{0}/pfb{1}.png'.format(folder, i)
+            for i in range(1, BALLFRAMES + 1)]
+
+
+# Load the football rotation frames, unconverted
+def load_frames(folder='images'):
+    return [pg.image.load(path) for path in frame_paths(folder)]
+
+
+# Load the football rotation frames as an atlas
+def load_football(folder='images'):
+    return make_atlas(load_frames(folder))
+
+
+# Count how many times per second each image can be blitted to the screen
+def blit_rate(surface, images, seconds=0.5):
+    count = 0
+    start = perf_counter()
+    while perf_counter() - start < seconds:
+        for image in images:
+            surface.blit(image, (0, 0))
+        count += len(images)
+    return count / (perf_counter() - start)
+
+
+# Print blit rates before and after conversion
+def benchmark(seconds=0.5):
+    pg.init()
+    screen = pg.display.set_mode((1200, 660))
+
+    raw = {'background': [pg.transform.smoothscale(
+               pg.image.load('images/pfootback.tif'), (1200, 660))],
+           'menu': [pg.image.load('images/pfootball.png')],
+           'goal': [pg.image.load('images/gp.png')],
+           'football': [pg.image.load('images/pfb{0}.png'.format(i))
+                        for i in range(1, BALLFRAMES + 1)]}
+    converted = {'background': [raw['background'][0].convert()],
+                 'menu': [raw['menu'][0].convert()],
+                 'goal': [raw['goal'][0].convert_alpha()],
+                 'football': load_football()[1]}
+
+    print('{0:<12}{1:>14}{2:>14}{3:>9}'.format('image', 'raw blit/s',
+                                                'converted', 'speedup'))
+    for name in raw:
+        before = blit_rate(screen, raw[name], seconds)
+        after = blit_rate(screen, converted[name], seconds)
+        print('{0:<12}{1:>14.0f}{2:>14.0f}{3:>8.1f}x'.format(
+            name, before, after, after / before))
+    pg.quit()
+
+
+if __name__ == '__main__':
+    benchmark(float(sys.argv[1]) if len(sys.argv) > 1 else 0.5)
@@ -0,0 +1,246 @@
+# Paper Football League
+# Sound channels
+# By Josh Klipstein
+#
+# The game plays sounds through a fixed pool of mixer channels.  When every
+# channel is busy a new sound takes over the channel of the least important
+# sound playing, oldest first, or is dropped if everything playing matters
+# more.  Each sound also has a shortest gap between plays, so a burst of
+# bounces is one bounce.  Without an audio device every sound is a no-op
+# stand-in and nothing touches the mixer.
+#
+# Long tracks, the crowds and the wind, are not decoded into memory at all.
+# They are streamed from disk through pg.mixer.music, which plays one track
+# at a time, so a track only takes over the stream from one that matters
+# no more than it does.  Short effects stay resident.
+#
+#   python audio.py [folder]     resident sound memory, streamed or not
+
+import os
+import sys
+
+import pygame as pg
+
+CHANNELS = 8
+STREAMBYTES = 1 << 20 # Sound files bigger than this are streamed
+# Higher goes first when channels run out
+PRIORITIES = {'intro': 3, 'ready': 3, 'go': 3, 'cheer': 3, 'horn': 3,
+              'score': 2, 'launch': 2, 'select': 2,
+              'bounce': 1, 'wind': 1}
+PRIORITY = 1 # Sounds not listed above
+# Milliseconds a sound must wait before it can play again
+RETRIGGER = {'bounce': 100, 'score': 250, 'launch': 200, 'select': 60,
+             'wind': 1000}
+MINGAP = 50 # Sounds not listed above
+
+
+# Stand-in for a sound when there is no audio device
+class NullSound:
+    __slots__ = ()
+
+    def play(self, loops=0, maxtime=0, fade_ms=0):
+        return None
+
+    def stop(self):
+        pass
+
+
+NULLSOUND = NullSound()
+
+
+# A sound that plays through its manager's channel pool
+class ManagedSound:
+    __slots__ = ('manager', 'name', 'sound', 'priority', 'gap')
+
+    def __init__(self, manager, name, sound):
+        self.manager = manager
+        self.name = name
+        self.sound = sound
+        self.priority = PRIORITIES.get(name, PRIORITY)
+        self.gap = RETRIGGER.get(name, MINGAP)
+
+    def play(self, loops=0, maxtime=0, fade_ms=0):
+        return self.manager.play(self, loops, maxtime, fade_ms)
+
+    def stop(self):
+        self.sound.stop()
+
+
+# Long sound file, played from disk when it plays
+class StreamedTrack:
+    __slots__ = ('path',)
+
+    def __init__(self, path):
+        if not os.path.isfile(path):
+            raise FileNotFoundError(path)
+        self.path = path
+
+
+# A streamed track that plays through its manager
+class StreamedSound(ManagedSound):
+    __slots__ = ()
+
+    def play(self, loops=0, maxtime=0, fade_ms=0):
+        return self.manager.stream(self, loops, maxtime, fade_ms)
+
+    def stop(self):
+        if self.manager.streamOwner is self:
+            pg.mixer.music.stop()
+
+
+class AudioManager:
+
+    def __init__(self, channels=CHANNELS):
+        pg.mixer.set_num_channels(channels)
+        self.channels = [pg.mixer.Channel(i) for i in range(channels)]
+        self.owners = [None] * channels # ManagedSound last put on a channel
+        self.started = [0] * channels # Ticks it started at
+        self.lastPlayed = {} # Sound name: ticks
+        self.stats = {'played': 0, 'limited': 0, 'stolen': 0, 'dropped': 0}
+        self.resident = [] # Sounds decoded into memory
+        self.streamOwner = None # StreamedSound last put on the stream
+        self.streamPath = None # Track loaded into the stream
+
+    # Loader function for a sound file, streaming the long ones
+    def load(self, path, streamBytes=STREAMBYTES):
+        if os.path.getsize(path) > streamBytes:
+            return StreamedTrack(path)
+        sound = pg.mixer.Sound(path)
+        self.resident.append(sound)
+        return sound
+
+    def wrap(self, name, sound):
+        if isinstance(sound, StreamedTrack):
+            return StreamedSound(self, name, sound)
+        return ManagedSound(self, name, sound)
+
+    # Whether a sound is kept from playing by its retrigger gap
+    def limited(self, sound, now):
+        last = self.lastPlayed.get(sound.name)
+        if last is not None and now - last < sound.gap:
+            self.stats['limited'] += 1
+            return True
+        return False
+
+    def play(self, sound, loops=0, maxtime=0, fade_ms=0):
+        now = pg.time.get_ticks()
+        if self.limited(sound, now):
+            return None
+
+        # Free channel, or else the least important one, oldest first
+        index = None
+        for i, channel in enumerate(self.channels):
+            if not channel.get_busy():
+                index = i
+                break
+            owner = self.owners[i]
+            if owner is not None and owner.priority <= sound.priority and (
+                    index is None
+                    or (owner.priority, self.started[i])
+                    < (self.owners[index].priority, self.started[index])):
+                index = i
+        if index is None:
+            self.stats['dropped'] += 1
+            return None
+        if self.channels[index].get_busy():
+            self.stats['stolen'] += 1
+
+        channel = self.channels[index]
+        channel.play(sound.sound, loops, maxtime, fade_ms)
+        self.owners[index] = sound
+        self.started[index] = now
+        self.lastPlayed[sound.name] = now
+        self.stats['played'] += 1
+        return channel
+
+    # Play a streamed track.  Music has no time limit, so a track played
+    # for maxtime fades out over that time instead.
+    def stream(self, sound, loops=0, maxtime=0, fade_ms=0):
+        now = pg.time.get_ticks()
+        if self.limited(sound, now):
+            return None
+        owner = self.streamOwner
+        if pg.mixer.music.get_busy():
+            if owner is not None and owner.priority > sound.priority:
+                self.stats['dropped'] += 1
+                return None
+            self.stats['stolen'] += 1
+
+        if self.streamPath != sound.sound.path:
+            pg.mixer.music.load(sound.sound.path)
+            self.streamPath = sound.sound.path
+        pg.mixer.music.play(loops, 0.0, fade_ms)
+        if maxtime:
+            pg.mixer.music.fadeout(maxtime)
+        self.streamOwner = sound
+        self.lastPlayed[sound.name] = now
+        self.stats['played'] += 1
+        return None
+
+    # Silence every channel and the stream, freeing them all
+    def stop(self):
+        pg.mixer.stop()
+        pg.mixer.music.stop()
+
+    # Bytes of decoded sound held in memory
+    def resident_bytes(self):
+        frequency, size, channels = pg.mixer.get_init()
+        return sum(round(sound.get_length() * frequency)
+                   for sound in self.resident) * channels * abs(size) // 8
+
+
+# Same calls as AudioManager, with no mixer behind them
+class NullAudio:
+
+    def __init__(self):
+        self.stats = dict.fromkeys(('played', 'limited', 'stolen',
+                                    'dropped'), 0)
+
+    def load(self, path, streamBytes=STREAMBYTES):
+        return NULLSOUND
+
+    def wrap(self, name, sound):
+        return NULLSOUND
+
+    def stop(self):
+        pass
+
+    def resident_bytes(self):
+        return 0
+
+
+# Start the mixer and return the manager for it, or a NullAudio when there
+# is no audio device to play on
+def open_audio(channels=CHANNELS):
+    try:
+        pg.mixer.init()
+    except pg.error as error:
+        print('No audio device, playing without sound:', error,
+              file=sys.stderr)
+        return NullAudio()
+    return AudioManager(channels)
+
+
+# Resident memory of every sound in a folder, with and without streaming
+def memory_report(folder='sounds'):
+    audio = open_audio()
+    names = sorted(name for name in os.listdir(folder)
+                   if name.lower().endswith(('.wav', '.ogg')))
+    print('{0:<46}{1:>12}{2:>12}'.format('sound', 'resident', 'streamed'))
+    totals = [0, 0]
+    for name in names:
+        path = os.path.join(folder, name)
+        sizes = []
+        for streamBytes in (float('inf'), STREAMBYTES):
+            audio.resident = []
+            audio.load(path, streamBytes)
+            sizes.append(audio.resident_bytes())
+        totals = [total + size for total, size in zip(totals, sizes)]
+        print('{0:<46}{1:>10.0f}KB{2:>10.0f}KB'.format(
+            name[:45], sizes[0] / 1024, sizes[1] / 1024))
+    print('{0:<46}{1:>10.0f}KB{2:>10.0f}KB'.format(
+        'total', totals[0] / 1024, totals[1] / 1024))
+
+
+if __name__ == '__main__':
+    memory_report(sys.argv[1] if len(sys.argv) > 1 else 'sounds')
@@ -0,0 +1,122 @@
+# Paper Football League
+# Message banners
+# By Josh Klipstein
+#
+# Banners such as 'Ready...' and 'Game Over' are rendered once at startup
+# and moved by the game's own frame loop.  A banner is a list of moves, each
+# easing one point of it from a start to an end position over so many
+# milliseconds, and where it is depends only on how long it has been up.
+# Nothing waits, so the game keeps reading events while a banner shows,
+# a click can skip to the end of it, and a replay draws it the same way.
+#
+#   python banners.py [width]     time each banner holds the game up,
+#                                 before and after
+
+import sys
+
+from physics import WINWIDTH, WINHEIGHT
+
+HALFWIDTH = WINWIDTH // 2
+HALFHEIGHT = WINHEIGHT // 2
+SLIDEMS = 250 # Sliding a banner in or out
+HOLDMS = 700 # Showing 'Ready...' before it slides out
+DROPMS = 600 # Dropping a result banner to the middle
+FLASHMS = 500 # Showing a greeting or 'GO!'
+
+
+# Easing curves, from 0 to 1 as t goes from 0 to 1
+def linear(t):
+    return t
+
+
+def ease_out(t):
+    return 1 - (1 - t) ** 3
+
+
+def ease_in(t):
+    return t ** 3
+
+
+class Banner:
+    __slots__ = ('image', 'anchor', 'moves', 'duration', 'stays')
+
+    # moves is a list of (start, end, milliseconds, ease) for the anchor
+    # point of the image, such as 'center'.  A banner that stays is left
+    # at its last position once the moves are done.
+    def __init__(self, image, anchor, moves, stays=False):
+        self.image = image
+        self.anchor = anchor
+        self.moves = moves
+        self.duration = sum(move[2] for move in moves)
+        self.stays = stays
+
+    # Anchor point after ms milliseconds
+    def position(self, ms):
+        for start, end, length, ease in self.moves:
+            if ms < length:
+                t = ease(ms / length)
+                return (round(start[0] + (end[0] - start[0]) * t),
+                        round(start[1] + (end[1] - start[1]) * t))
+            ms -= length
+        return self.moves[-1][1]
+
+    def rect(self, ms):
+        return self.image.get_rect(**{self.anchor: self.position(ms)})
+
+    def done(self, ms):
+        return ms >= self.duration
+
+
+# Slide in from the left, hold in the middle and slide out to the right
+def slide(image, y=HALFHEIGHT):
+    middle = (HALFWIDTH, y)
+    return Banner(image, 'center', [
+        ((0, y), middle, SLIDEMS, ease_out),
+        (middle, middle, HOLDMS, linear),
+        (middle, (WINWIDTH + image.get_width() // 2, y), SLIDEMS, ease_in)])
+
+
+# Show in the middle for a moment
+def flash(image, ms=FLASHMS):
+    middle = (HALFWIDTH, HALFHEIGHT)
+    return Banner(image, 'center', [(middle, middle, ms, linear)])
+
+
+# Drop from the top to just above the middle and stay there
+def drop(image):
+    return Banner(image, 'midbottom', [
+        ((HALFWIDTH, 0), (HALFWIDTH, HALFHEIGHT - 5), DROPMS, ease_out)],
+        stays=True)
+
+
+# Milliseconds each kind of banner kept the game waiting when it was drawn
+# by blocking loops at 30 frames a second, against the time it runs for
+# now, for a banner width wide
+def compare(width=400, frameMs=1000 / 30):
+    before = {'slide': frameMs * (len(range(0, HALFWIDTH + width // 2, 100))
+                                  + len(range(HALFWIDTH,
+                                              WINWIDTH + width // 2, 100)))
+                       + 1000,
+              'flash': frameMs + 500,
+              'drop': frameMs * len(range(0, HALFHEIGHT, 5)) + 1000}
+
+    # Stand-in image, only its size matters here
+    class Image:
+        def get_width(self):
+            return width
+
+    after = {'slide': slide(Image()).duration,
+             'flash': flash(Image()).duration,
+             'drop': drop(Image()).duration}
+    print('{0:<8}{1:>10}{2:>10}'.format('banner', 'before', 'after'))
+    for name in before:
+        print('{0:<8}{1:>8.0f}ms{2:>8.0f}ms'.format(name, before[name],
+                                                   after[name]))
+    print('Turn start, greeting, Ready... and GO!: {0:.0f} ms before, '
+          '{1:.0f} ms after, or one click'.format(
+              before['flash'] * 2 + before['slide'],
+              after['flash'] * 2 + after['slide']))
+
+
+if __name__ == '__main__':
+    compare(int(sys.argv[1]) if len(sys.argv) > 1 else 400)
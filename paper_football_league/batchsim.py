@@ -0,0 +1,242 @@
+# Paper Football League
+# Batch shot simulator
+# By Josh Klipstein
+#
+# Steps many shots at once as NumPy arrays, following the same rules as
+# physics.shot_steps, swept moves and all.  Shots that have stopped are
+# dropped from the working set every frame and the loop ends as soon as the
+# last ball comes to rest.  Needs NumPy, which the game itself does not.
+
+import sys
+from collections import namedtuple
+from time import perf_counter
+
+import numpy as np
+
+from physics import (WINWIDTH, GRAVITY, FRICTION, BALLRADIUS, ROTATIONS,
+                     MAXHITS, make_geometry, obstacles, start_position)
+
+# Outcome of every shot in a batch, one array entry per shot
+BatchResult = namedtuple('BatchResult', 'points x y rotation bounces steps')
+
+
+# Goal line, goal band and obstacle boxes for both players, indexed by the
+# player flag.  Boxes are stacked as (box, player) arrays of left, right,
+# top and bottom, in the order physics.obstacles gives them.
+def _edges(geometry, radius):
+    goal1, goal2 = geometry['goalArea'], geometry['goalAreaTwo']
+    edges = {'goalx': (goal1.centerx, goal2.centerx),
+             'goalTop': (goal1.top - radius, goal2.top - radius),
+             'goalBottom': (goal1.bottom - radius, goal2.bottom - radius)}
+    boxes = list(zip(obstacles(geometry, False, radius),
+                     obstacles(geometry, True, radius)))
+    for i, name in enumerate(('left', 'right', 'top', 'bottom')):
+        edges[name] = [[box[0][i], box[1][i]] for box in boxes]
+    return {key: np.array(value, dtype=np.float64)
+            for key, value in edges.items()}
+
+
+# Fraction of each move at which the ball first enters one of the boxes,
+# and whether it hit a side.  Same rules as physics.box_entry, with inf
+# where a move misses every box.
+def _first_entry(x, y, dx, dy, left, right, top, bottom):
+    with np.errstate(divide='ignore', invalid='ignore'):
+        near, far = (left - x) / dx, (right - x) / dx
+        nearY, farY = (top - y) / dy, (bottom - y) / dy
+    near, far = np.minimum(near, far), np.maximum(near, far)
+    nearY, farY = np.minimum(nearY, farY), np.maximum(nearY, farY)
+
+    # Moves along an axis only overlap if they start inside the slab
+    still = dx == 0
+    inside = (left <= x) & (x <= right)
+    near = np.where(still, np.where(inside, -np.inf, np.inf), near)
+    far = np.where(still, np.where(inside, np.inf, -np.inf), far)
+    still = dy == 0
+    inside = (top <= y) & (y <= bottom)
+    nearY = np.where(still, np.where(inside, -np.inf, np.inf), nearY)
+    farY = np.where(still, np.where(inside, np.inf, -np.inf), farY)
+
+    enter = np.maximum(near, nearY)
+    miss = (enter < 0) | (enter > 1) | (enter > np.minimum(far, farY))
+    enter = np.where(miss, np.inf, enter)
+    first = np.argmin(enter, axis=0)
+    column = np.arange(enter.shape[1])
+    return (enter[first, column],
+            (near >= nearY)[first, column])
+
+
+# Flatten a grid of shot parameters into per-shot arrays
+def shot_grid(powers, angles, windSpeeds, windAngles, players=(False, True)):
+    grid = np.meshgrid(np.asarray(players, dtype=bool),
+                       np.asarray(powers, dtype=np.float64),
+                       np.asarray(angles, dtype=np.float64),
+                       np.asarray(windSpeeds, dtype=np.float64),
+                       np.asarray(windAngles, dtype=np.float64),
+                       indexing='ij')
+    players, powers, angles, windSpeeds, windAngles = [g.ravel() for g in grid]
+    return powers, angles, windSpeeds, windAngles, players
+
+
+# Simulate a batch of shots.  Every argument may be a scalar or an array of
+# the batch length; player is False for player one and True for player two.
+def simulate_batch(power, angle, windSpeed, windAngle, player=False,
+                   geometry=None, radius=BALLRADIUS, maxSteps=None):
+    if geometry is None:
+        geometry = make_geometry()
+
+    power, angle, windSpeed, windAngle, player = np.broadcast_arrays(
+        np.asarray(power, dtype=np.float64),
+        np.asarray(angle, dtype=np.float64),
+        np.asarray(windSpeed, dtype=np.float64),
+        np.asarray(windAngle, dtype=np.float64),
+        np.asarray(player, dtype=bool))
+    shape = power.shape
+    count = power.size
+    player = player.ravel()
+
+    # Per-shot constants
+    side = player.astype(np.intp)
+    edges = {key: value[..., side] for key, value in _edges(geometry,
+                                                            radius).items()}
+    pushx = (power * np.cos(angle) + windSpeed * np.cos(windAngle)).ravel()
+    pushy = (power * np.sin(angle) + windSpeed * np.sin(windAngle)).ravel()
+
+    # Working state of the shots still in flight
+    (x1, y1), rotation1 = start_position(False)
+    (x2, y2), rotation2 = start_position(True)
+    x = np.where(player, x2, x1).astype(np.float64)
+    y = np.where(player, y2, y1).astype(np.float64)
+    rotation = np.where(player, rotation2, rotation1).astype(np.int64)
+    negative = np.ones(count) # Reversal of ball direction both x- and y-
+    negative2 = np.ones(count)
+    negative3 = np.where(player, -3, 3).astype(np.int64) # Ball rotation
+    points = np.zeros(count, dtype=np.int64)
+    bounces = np.zeros(count, dtype=np.int64)
+    index = np.arange(count)
+
+    # Final results for every shot
+    outPoints = np.zeros(count, dtype=np.int64)
+    outX = np.zeros(count)
+    outY = np.zeros(count)
+    outRotation = np.zeros(count, dtype=np.int64)
+    outBounces = np.zeros(count, dtype=np.int64)
+    outSteps = np.zeros(count, dtype=np.int64)
+
+    launchTime = 1
+    while index.size:
+
+        # Set speed of every ball and where it would be this frame
+        velocityx = negative * pushx
+        velocityy = negative2 * (pushy - GRAVITY * launchTime)
+        dx = np.trunc(x - velocityx * launchTime) - x
+        dy = np.trunc(y - velocityy * launchTime) - y
+        stopped = np.zeros(index.size, dtype=bool)
+
+        # Sweep the moves up to each thing they bounce off.  Balls that
+        # have finished their move this frame sit out the later rounds.
+        moving = np.arange(index.size)
+        for hit in range(MAXHITS):
+            mx, my = x[moving], y[moving]
+            mdx, mdy = dx[moving], dy[moving]
+            reach, sideHit = _first_entry(
+                mx, my, mdx, mdy, *(edges[name][:, moving] for name in
+                                    ('left', 'right', 'top', 'bottom')))
+            bounced = reach <= 1
+            reach = np.where(bounced, reach, 1.0)
+
+            # Sides of screen end the launch
+            with np.errstate(divide='ignore', invalid='ignore'):
+                low = mx + reach * mdx < radius
+                high = ~low & (mx + reach * mdx > WINWIDTH - radius)
+                reach = np.where(low, (radius - mx) / mdx, reach)
+                reach = np.where(high, (WINWIDTH - radius - mx) / mdx, reach)
+            wall = low | high
+            stopped[moving[wall]] = True
+            bounced &= ~wall
+
+            # Goal line crossed inside the goal area
+            goalx = edges['goalx'][moving]
+            endx = mx + reach * mdx
+            crossed = np.where(player[moving], (mx < goalx) & (goalx <= endx),
+                               (mx > goalx) & (goalx >= endx))
+            with np.errstate(divide='ignore', invalid='ignore'):
+                crossy = my + (goalx - mx) / mdx * mdy
+            points[moving] += 10 * (crossed
+                                    & (crossy >= edges['goalTop'][moving])
+                                    & (crossy <= edges['goalBottom'][moving]))
+
+            x[moving] = mx + reach * mdx
+            y[moving] = my + reach * mdy
+
+            # Bounce off, keeping the rest of the move
+            moving, reach, sideHit = (moving[bounced], reach[bounced],
+                                      sideHit[bounced])
+            if not moving.size:
+                break
+            bounces[moving] += 1
+            dx[moving] *= 1 - reach
+            dy[moving] *= 1 - reach
+            side, top = moving[sideHit], moving[~sideHit]
+            dx[side] = -dx[side] * FRICTION
+            negative[side] = -negative[side] * FRICTION
+            negative3[side] = -negative3[side]
+            dy[top] = -dy[top] * FRICTION
+            negative2[top] = -negative2[top] * FRICTION
+        x = np.trunc(x)
+        y = np.trunc(y)
+
+        # Do ball rotation, checking if ball is over-rotated
+        over = (rotation + 3 > ROTATIONS - 1) | (rotation - 3 < 0)
+        negative3 = np.where(over, -negative3, negative3)
+        rotation = np.where(over, rotation, rotation + negative3)
+
+        # Balls come to a stop
+        stopped |= (np.abs(velocityx) < 1) | (np.abs(velocityy) < 1)
+        if maxSteps is not None and launchTime >= maxSteps:
+            stopped[:] = True
+
+        if stopped.any():
+            done = index[stopped]
+            outPoints[done] = points[stopped]
+            outX[done] = x[stopped]
+            outY[done] = y[stopped]
+            outRotation[done] = rotation[stopped]
+            outBounces[done] = bounces[stopped]
+            outSteps[done] = launchTime
+
+            # Drop finished shots from the working set
+            keep = ~stopped
+            index = index[keep]
+            x, y, rotation = x[keep], y[keep], rotation[keep]
+            negative, negative2 = negative[keep], negative2[keep]
+            negative3, player = negative3[keep], player[keep]
+            points, bounces = points[keep], bounces[keep]
+            pushx, pushy = pushx[keep], pushy[keep]
+            edges = {key: value[..., keep] for key, value in edges.items()}
+
+        launchTime += 1 # Increase ball launch time
+
+    return BatchResult(outPoints.reshape(shape), outX.reshape(shape),
+                       outY.reshape(shape), outRotation.reshape(shape),
+                       outBounces.reshape(shape), outSteps.reshape(shape))
+
+
+# Report throughput over a full power/angle/wind sweep
+def benchmark(resolution=24):
+    powers = np.linspace(0, 200, resolution)
+    angles = np.linspace(0, 2 * np.pi, resolution, endpoint=False)
+    windSpeeds = np.linspace(0, 100, resolution)
+    windAngles = np.linspace(0, 2 * np.pi, resolution, endpoint=False)
+    shots = shot_grid(powers, angles, windSpeeds, windAngles)
+
+    start = perf_counter()
+    result = simulate_batch(*shots)
+    elapsed = perf_counter() - start
+
+    print('{0} shots in {1:.2f} s ({2:.0f} shots/s), {3} goals'.format(
+        result.points.size, elapsed, result.points.size / elapsed,
+        int((result.points > 0).sum())))
+
+
+if __name__ == '__main__':
+    benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 24)
@@ -0,0 +1,301 @@
+# Paper Football League
+# Benchmark suite
+# By Josh Klipstein
+#
+# Times the hot paths of the game with SDL's dummy video and audio drivers:
+# shots simulated per second, redraw_window frames per second in every
+# scene, the HUD text and wind gauge, and each message banner.
+# Results are written as JSON and compared against a stored baseline, and
+# anything that got slower than the threshold allows is reported as a
+# regression.
+#
+# With --window the game is scaled to a window of that size, so the scene
+# rates include the cost of presenting at that resolution.
+#
+#   python bench.py [--seconds S] [--threshold T] [--save-baseline]
+#                   [--window WxH]
+
+import argparse
+import json
+import os
+import platform
+import sys
+from random import Random
+from time import perf_counter
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+import pygame as pg
+
+import paper_football_league as pfl
+from display import parse_size
+from physics import make_geometry, shot_steps, simulate_shot
+from soak import NoClock
+
+RESULTSPATH = 'data/bench_results.json'
+BASELINEPATH = 'data/bench_baseline.json'
+THRESHOLD = 0.2 # Fraction a result may get worse before it counts
+THRESHOLDS = {'message': 0.3} # Looser limits for noisier groups
+SCENES = ('menu', 'options', 'instructions', 'game', 'gameOver')
+MESSAGES = range(1, 14)
+SHOTS = 256 # Random shots cycled through by the physics benchmarks
+
+
+# Calls per second of function, best of a few runs
+def rate(function, seconds, repeats=5):
+    best = 0.0
+    for i in range(repeats):
+        count = 0
+        start = perf_counter()
+        elapsed = 0.0
+        while elapsed < seconds / repeats:
+            function()
+            count += 1
+            elapsed = perf_counter() - start
+        best = max(best, count / elapsed)
+    return best
+
+
+# Start the game without entering the scene loop, in a window of size if
+# given.  Returns the game's state and its rect, image, font and sound
+# dictionaries.  Exits with an error if the game can not start, so a broken
+# tree never passes as a run with nothing to compare.
+def boot(window=None):
+    dicts = []
+    pfl.run_scenes = lambda *args: dicts.extend(args)
+    pg.time.Clock = NoClock
+    try:
+        pfl.initialize(window=window)
+        STATE, RECTDICT, IMGDICT, FONTDICT, SOUNDDICT = dicts
+        pfl.load_game(STATE, RECTDICT, IMGDICT, SOUNDDICT)
+    except SystemExit:
+        sys.exit('Benchmarks not run: the game could not load its images '
+                 'and sounds')
+    STATE.config.sound = False
+    return STATE, RECTDICT, IMGDICT, FONTDICT, SOUNDDICT
+
+
+# Seeded shots as (power, angle, windSpeed, windAngle, player)
+def random_shots(count=SHOTS, seed=1):
+    rng = Random(seed)
+    return [(rng.uniform(20, 200), rng.uniform(0, 6.28),
+             rng.uniform(0, 100), rng.uniform(0, 6.28), rng.random() < .5)
+            for i in range(count)]
+
+
+def bench_physics(dicts, seconds):
+    STATE, RECTDICT, IMGDICT, FONTDICT, SOUNDDICT = dicts
+    shots = random_shots()
+    geometry = make_geometry()
+    index = [0]
+
+    def simulate():
+        shot = shots[index[0] % SHOTS]
+        index[0] += 1
+        simulate_shot(*shot, geometry, record=False)
+
+    # Same shots through the game's own launch_ball and fly_ball
+    def fly():
+        power, angle, windSpeed, windAngle, player = shots[index[0] % SHOTS]
+        index[0] += 1
+        match = STATE.match
+        match.power, match.launchAngle = power, angle
+        match.windSpeed, match.windAngle = windSpeed, windAngle
+        match.player = player
+        center, rotation = ((300, 600), 18) if player else ((900, 600), 6)
+        STATE.ball.rect.center = center
+        STATE.ball.rotation = rotation
+        pfl.launch_ball(STATE)
+        while STATE.ball.shot is not None:
+            pfl.fly_ball(STATE, SOUNDDICT)
+
+    results = {'physics.simulate_shot': (rate(simulate, seconds), 'shots/s')}
+    index[0] = 0
+    results['physics.fly_ball'] = (rate(fly, seconds), 'shots/s')
+    STATE.match.reset()
+    return results
+
+
+# Set the flags redraw_window looks at for a scene
+def show_scene(STATE, scene):
+    STATE.scene.menu = scene == 'menu'
+    STATE.scene.options = scene == 'options'
+    STATE.scene.instruct = scene == 'instructions'
+    STATE.match.gameOver = scene == 'gameOver'
+    STATE.match.draggingArrow = False
+    STATE.match.message = 0
+    pfl.SCREENDICT['full'] = True
+
+
+def bench_scenes(dicts, seconds):
+    STATE, RECTDICT, IMGDICT, FONTDICT, SOUNDDICT = dicts
+
+    # A ball in flight and a running clock, so the game redraws like it
+    # does in play
+    flight = list(shot_steps(120, 0.4, 20, 1.0, False, make_geometry()))
+    frame = [0]
+
+    def game_frame():
+        center, rotation, events = flight[frame[0] % len(flight)]
+        frame[0] += 1
+        STATE.ball.rect.center = center
+        STATE.ball.rotation = rotation
+        STATE.match.timer = 60 - (frame[0] % 1200) * pfl.TIMERSTEP
+        pfl.redraw_window(STATE, RECTDICT, IMGDICT)
+
+    def still_frame():
+        pfl.redraw_window(STATE, RECTDICT, IMGDICT)
+
+    results = {}
+    for scene in SCENES:
+        show_scene(STATE, scene)
+        function = game_frame if scene == 'game' else still_frame
+        results['redraw.' + scene] = (rate(function, seconds), 'fps')
+    show_scene(STATE, 'game')
+    return results
+
+
+def bench_hud(dicts, seconds):
+    STATE, RECTDICT, IMGDICT, FONTDICT, SOUNDDICT = dicts
+    rng = Random(2)
+    tick = [0]
+
+    # The timer changes every frame, scores now and then
+    def info():
+        tick[0] += 1
+        STATE.match.timer = 60 - (tick[0] % 1200) * pfl.TIMERSTEP
+        STATE.match.scoreOne = 10 * (tick[0] // 300)
+        pfl.write_info(STATE, FONTDICT)
+
+    # New wind on every call, so the gauge is always rebuilt
+    def wind():
+        STATE.match.windSpeed = rng.random() * 100
+        STATE.match.windAngle = rng.random() * 6.28
+        pfl.draw_wind(STATE, FONTDICT)
+
+    results = {'hud.write_info': (rate(info, seconds), 'calls/s'),
+               'hud.draw_wind': (rate(wind, seconds), 'calls/s')}
+    STATE.match.scoreOne = 0
+    STATE.match.windSpeed = STATE.match.windAngle = 0
+    return results
+
+
+# Milliseconds spent drawing each message, a frame for every 1/FPS seconds
+# of banner from showing it to done, with the waits between frames taken
+# out.  Message 9, the help over the ball, is only put in place.
+def bench_messages(dicts, seconds):
+    STATE, RECTDICT, IMGDICT, FONTDICT, SOUNDDICT = dicts
+    show_scene(STATE, 'game')
+
+    def message():
+        if number == 9:
+            pfl.show_help(STATE, RECTDICT, IMGDICT)
+            return
+        pfl.show_banners(STATE, RECTDICT, IMGDICT, SOUNDDICT, [number])
+        pfl.redraw_window(STATE, RECTDICT, IMGDICT)
+        while pfl.banners_playing(STATE.match):
+            pfl.advance_banners(STATE, RECTDICT, IMGDICT, SOUNDDICT,
+                                1000 / pfl.FPS)
+            pfl.redraw_window(STATE, RECTDICT, IMGDICT)
+
+    results = {}
+    for number in MESSAGES:
+        results['message.{0}'.format(number)] = (
+            1000 / rate(message, seconds / 4), 'ms')
+    STATE.match.message = 0
+    return results
+
+
+# Run every benchmark and return {name: {'value', 'unit', 'better'}}
+def run(seconds=1.0, window=None):
+    dicts = boot(window)
+    results = {}
+    for bench in (bench_physics, bench_scenes, bench_hud, bench_messages):
+        for name, (value, unit) in bench(dicts, seconds).items():
+            results[name] = {'value': value, 'unit': unit,
+                             'better': 'lower' if unit == 'ms' else 'higher'}
+            print('{0:<24}{1:>14.2f} {2}'.format(name, value, unit),
+                  flush=True)
+    pg.quit()
+    return results
+
+
+def save(path, results, window=None):
+    folder = os.path.dirname(path)
+    if folder:
+        os.makedirs(folder, exist_ok=True)
+    with open(path, 'w') as file:
+        json.dump({'python': platform.python_version(),
+                   'pygame': pg.version.ver,
+                   'machine': platform.machine(),
+                   'video': os.environ['SDL_VIDEODRIVER'],
+                   'window': '{0}x{1}'.format(*(window or (pfl.WINWIDTH,
+                                                           pfl.WINHEIGHT))),
+                   'results': results}, file, indent=1, sort_keys=True)
+
+
+# Compare results against a baseline.  Returns the names that regressed.
+def compare(results, baseline, threshold=THRESHOLD):
+    regressions = []
+    print('{0:<24}{1:>14}{2:>14}{3:>9}'.format('benchmark', 'baseline',
+                                                'now', 'change'))
+    for name in sorted(results):
+        if name not in baseline:
+            continue
+        now = results[name]['value']
+        before = baseline[name]['value']
+        limit = THRESHOLDS.get(name.split('.')[0], threshold)
+        change = (now - before) / before if before else 0.0
+        if results[name]['better'] == 'lower':
+            worse = change > limit
+        else:
+            worse = change < -limit
+        if worse:
+            regressions.append(name)
+        print('{0:<24}{1:>14.2f}{2:>14.2f}{3:>+8.0%}{4}'.format(
+            name, before, now, change, '  REGRESSION' if worse else ''))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Paper Football League '
+                                                 'benchmarks')
+    parser.add_argument('--seconds', type=float, default=1.0,
+                        help='time spent on each rate benchmark')
+    parser.add_argument('--threshold', type=float, default=THRESHOLD,
+                        help='fraction a result may get worse by')
+    parser.add_argument('--out', default=RESULTSPATH)
+    parser.add_argument('--baseline', default=BASELINEPATH)
+    parser.add_argument('--save-baseline', action='store_true',
+                        help='store these results as the new baseline')
+    parser.add_argument('--window', type=parse_size,
+                        help='scale the game to a window of this size, WxH')
+    args = parser.parse_args(argv)
+
+    results = run(args.seconds, args.window)
+    save(args.out, results, args.window)
+    if args.save_baseline:
+        save(args.baseline, results, args.window)
+        print('Baseline saved to', args.baseline)
+        return 0
+
+    try:
+        with open(args.baseline) as file:
+            baseline = json.load(file)['results']
+    except OSError:
+        print('No baseline at {0}, run with --save-baseline to make one'
+              .format(args.baseline))
+        return 0
+
+    regressions = compare(results, baseline, args.threshold)
+    if regressions:
+        print('{0} regression(s): {1}'.format(len(regressions),
+                                             ', '.join(regressions)))
+        return 1
+    print('No regressions')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,190 @@
+# Paper Football League
+# Window scaling
+# By Josh Klipstein
+#
+# The game always draws to a 1200x660 canvas, so every position in it stays
+# in the same pixels whatever the cabinet's screen is.  At present time the
+# canvas is scaled once into the window, letterboxed and centered.  A window
+# that is already 1200x660 is drawn to directly and costs nothing extra.
+#
+# The scale is always a whole number of sixtieths, so the scaled canvas
+# lands on whole pixels.  That lets the game's dirty areas be scaled on
+# their own: each area is widened to the scale's pixel period, where nearest
+# neighbour sampling repeats, so scaling only the areas gives the very same
+# pixels as scaling the whole canvas.  A frame where only the ball and the
+# clock moved scales a few small areas, not a 4K screen.
+#
+#   python display.py [frames]     present cost at 720p, 1080p and 4K
+
+import sys
+from fractions import Fraction
+from time import perf_counter
+
+import pygame as pg
+from pygame.locals import *
+
+from physics import WINWIDTH, WINHEIGHT
+
+STEPS = 60 # Scales are whole sixtieths, 60 divides both canvas sides
+MOUSEEVENTS = (MOUSEMOTION, MOUSEBUTTONDOWN, MOUSEBUTTONUP)
+SIZES = ((1280, 720), (1920, 1080), (3840, 2160))
+
+
+# Parse a window size given as WxH
+def parse_size(text):
+    width, height = text.lower().split('x')
+    return int(width), int(height)
+
+
+# Largest scale of whole sixtieths that fits the canvas into size
+def fit_scale(size):
+    width, height = size
+    steps = min(width * STEPS // WINWIDTH, height * STEPS // WINHEIGHT)
+    if steps < 1:
+        raise ValueError('window {0}x{1} is too small'.format(width, height))
+    return Fraction(steps, STEPS)
+
+
+class Display:
+
+    # Open a window of size, the canvas size if None, or fill the screen
+    def __init__(self, size=None, fullscreen=False):
+        if fullscreen:
+            self.window = pg.display.set_mode((0, 0), FULLSCREEN)
+        else:
+            self.window = pg.display.set_mode(size or (WINWIDTH, WINHEIGHT))
+        windowSize = self.window.get_size()
+        self.scale = fit_scale(windowSize)
+        if self.scale == 1:
+            # Native size, draw straight to the window
+            self.canvas = self.window
+            self.view = pg.Rect(0, 0, WINWIDTH, WINHEIGHT)
+            self.borders = []
+            return
+
+        self.canvas = pg.Surface((WINWIDTH, WINHEIGHT)).convert()
+        self.view = pg.Rect(0, 0, int(WINWIDTH * self.scale),
+                            int(WINHEIGHT * self.scale))
+        self.view.center = (windowSize[0] // 2, windowSize[1] // 2)
+        self.viewSurface = self.window.subsurface(self.view)
+        # Canvas pixels after which the scaled pixel pattern repeats
+        self.period = self.scale.denominator
+        # Letterbox bars around the view
+        window = self.window.get_rect()
+        self.borders = [rect for rect in (
+            pg.Rect(0, 0, window.width, self.view.top),
+            pg.Rect(0, self.view.bottom, window.width,
+                    window.height - self.view.bottom),
+            pg.Rect(0, self.view.top, self.view.left, self.view.height),
+            pg.Rect(self.view.right, self.view.top,
+                    window.width - self.view.right, self.view.height))
+            if rect.width > 0 and rect.height > 0]
+
+    # Widen a canvas area out to whole scale periods.  Returns it with the
+    # view area it scales to.
+    def align(self, area):
+        period = self.period
+        left = area.left // period * period
+        top = area.top // period * period
+        right = -(-area.right // period) * period
+        bottom = -(-area.bottom // period) * period
+        source = pg.Rect(left, top, right - left, bottom - top)
+        scale = self.scale
+        return source, pg.Rect(int(left * scale), int(top * scale),
+                               int(source.width * scale),
+                               int(source.height * scale))
+
+    # Show the canvas.  dirty is the list of canvas areas that changed, or
+    # None if the whole canvas did.
+    def present(self, dirty=None):
+        if self.canvas is self.window:
+            if dirty is None:
+                pg.display.update()
+            else:
+                pg.display.update(dirty)
+            return
+
+        if dirty is None:
+            for rect in self.borders:
+                self.window.fill((0, 0, 0), rect)
+            pg.transform.scale(self.canvas, self.view.size, self.viewSurface)
+            pg.display.update()
+            return
+
+        updates = []
+        for area in dirty:
+            source, target = self.align(area)
+            pg.transform.scale(self.canvas.subsurface(source), target.size,
+                               self.viewSurface.subsurface(target))
+            updates.append(target.move(self.view.topleft))
+        pg.display.update(updates)
+
+    # Window position to canvas position, clamped to the canvas
+    def to_canvas(self, pos):
+        x = int((pos[0] - self.view.left) / self.scale)
+        y = int((pos[1] - self.view.top) / self.scale)
+        return (min(max(x, 0), WINWIDTH - 1), min(max(y, 0), WINHEIGHT - 1))
+
+    # Move mouse events into canvas coordinates, in place
+    def map_events(self, events):
+        if self.canvas is self.window:
+            return events
+        for event in events:
+            if event.type in MOUSEEVENTS:
+                event.pos = self.to_canvas(event.pos)
+                if event.type == MOUSEMOTION:
+                    event.rel = (int(event.rel[0] / self.scale),
+                                 int(event.rel[1] / self.scale))
+        return events
+
+
+# Draw a frame in flight onto the canvas: the background, then the ball.
+# Returns the ball's old and new area, the clock and the wind gauge, the
+# areas such a frame redraws.
+def sample_frame(canvas, background, frame):
+    canvas.blit(background, (0, 0))
+    ball = pg.Rect(200 + 7 * frame % 800, 300 + frame % 200, 60, 60)
+    canvas.fill((200, 60, 60), ball)
+    return [ball.union(ball.move(-7, -1)), pg.Rect(540, 5, 120, 24),
+            pg.Rect(1160, 600, 40, 60)]
+
+
+# Milliseconds per present, full frame and dirty areas, at each size.  Also
+# checks the dirty areas come out exactly as a full scale would draw them.
+def benchmark(frames=60):
+    pg.init()
+    background = pg.transform.smoothscale(
+        pg.image.load('images/pfootback.tif'), (WINWIDTH, WINHEIGHT))
+    print('{0:<12}{1:>7}{2:>12}{3:>12}{4:>10}'.format(
+        'window', 'scale', 'full ms', 'dirty ms', 'matches'))
+    for size in ((WINWIDTH, WINHEIGHT),) + SIZES:
+        display = Display(size)
+        timings = []
+        for dirtyFrames in (False, True):
+            total = 0.0
+            for frame in range(frames):
+                areas = sample_frame(display.canvas, background, frame)
+                start = perf_counter()
+                display.present(areas if dirtyFrames else None)
+                total += perf_counter() - start
+            timings.append(1000 * total / frames)
+
+        matches = True
+        if display.canvas is not display.window:
+            sample_frame(display.canvas, background, 0)
+            display.present()
+            for frame in range(1, 5):
+                display.present(sample_frame(display.canvas, background,
+                                             frame))
+            partial = display.window.copy()
+            display.present()
+            matches = (pg.image.tobytes(partial, 'RGB')
+                       == pg.image.tobytes(display.window, 'RGB'))
+        print('{0:<12}{1:>7}{2:>12.2f}{3:>12.2f}{4:>10}'.format(
+            '{0}x{1}'.format(*size), str(display.scale), timings[0],
+            timings[1], 'yes' if matches else 'NO'))
+    pg.quit()
+
+
+if __name__ == '__main__':
+    benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 60)
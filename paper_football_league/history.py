@@ -0,0 +1,247 @@
+# Paper Football League
+# Match history
+# By Josh Klipstein
+#
+# Keeps every finished match, each player's best score per time limit and a
+# summary of every shot in an SQLite file, so the high score and the
+# leaderboards survive a restart.  The game only hands a finished match to a
+# queue; a writer thread saves whatever has queued up in one transaction,
+# so a game over never waits on the disk.  Reads go through their own
+# connection, which WAL mode lets run while the writer is busy.
+#
+#   python history.py [matches]     time leaderboard queries on a big file
+
+import os
+import queue
+import sqlite3
+import sys
+import tempfile
+import threading
+from random import Random
+from time import perf_counter, time
+
+HISTORYPATH = 'data/history.db'
+SCHEMAVERSION = 1
+BATCH = 256 # Most matches saved in one transaction
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS matches (
+    id INTEGER PRIMARY KEY,
+    played REAL NOT NULL,
+    gameTime INTEGER NOT NULL,
+    players INTEGER NOT NULL, -- People playing, as in the options
+    scoreOne INTEGER NOT NULL,
+    scoreTwo INTEGER NOT NULL);
+CREATE TABLE IF NOT EXISTS scores (
+    match INTEGER NOT NULL,
+    player TEXT NOT NULL,
+    human INTEGER NOT NULL,
+    gameTime INTEGER NOT NULL,
+    score INTEGER NOT NULL,
+    played REAL NOT NULL);
+CREATE INDEX IF NOT EXISTS scoresByTime ON scores (gameTime, score DESC);
+CREATE INDEX IF NOT EXISTS scoresByPlayer
+    ON scores (player, gameTime, score DESC);
+CREATE TABLE IF NOT EXISTS bests (
+    player TEXT NOT NULL,
+    gameTime INTEGER NOT NULL,
+    human INTEGER NOT NULL,
+    score INTEGER NOT NULL,
+    match INTEGER NOT NULL,
+    PRIMARY KEY (player, gameTime)) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS bestsByHuman ON bests (human, score DESC);
+CREATE TABLE IF NOT EXISTS shots (
+    match INTEGER NOT NULL,
+    player TEXT NOT NULL,
+    number INTEGER NOT NULL,
+    power REAL NOT NULL,
+    launchAngle REAL NOT NULL,
+    windSpeed REAL NOT NULL,
+    windAngle REAL NOT NULL,
+    points INTEGER NOT NULL,
+    bounces INTEGER NOT NULL,
+    steps INTEGER NOT NULL);
+CREATE INDEX IF NOT EXISTS shotsByMatch ON shots (match);
+'''
+
+# Keep a player's best only if the new score beats it
+UPSERTBEST = '''
+INSERT INTO bests (player, gameTime, human, score, match)
+VALUES (?, ?, ?, ?, ?)
+ON CONFLICT (player, gameTime) DO UPDATE
+SET score = excluded.score, match = excluded.match
+WHERE excluded.score > bests.score'''
+
+
+def connect(path):
+    folder = os.path.dirname(path)
+    if folder:
+        os.makedirs(folder, exist_ok=True)
+    connection = sqlite3.connect(path, check_same_thread=False)
+    connection.execute('PRAGMA journal_mode = WAL')
+    connection.execute('PRAGMA synchronous = NORMAL')
+    return connection
+
+
+class HistoryStore:
+
+    def __init__(self, path=HISTORYPATH):
+        self.path = path
+        self.reader = connect(path)
+        version = self.reader.execute('PRAGMA user_version').fetchone()[0]
+        if version > SCHEMAVERSION:
+            raise ValueError('{0} is history version {1}, expected {2}'
+                             .format(path, version, SCHEMAVERSION))
+        self.reader.executescript(SCHEMA)
+        self.reader.execute('PRAGMA user_version = {0}'.format(SCHEMAVERSION))
+        self.reader.commit()
+
+        self.queue = queue.Queue()
+        self.saved = 0
+        self.error = None # Last error the writer hit, it keeps going
+        self.thread = threading.Thread(target=self.run, name='history-writer',
+                                       daemon=True)
+        self.thread.start()
+
+    # Queue a finished match.  players is a list of (name, human, score) in
+    # player order, shots a list of (player name, power, launch angle, wind
+    # speed, wind angle, points, bounces, steps).
+    def record_match(self, gameTime, players, shots=(), played=None):
+        self.queue.put((time() if played is None else played, gameTime,
+                        list(players), list(shots)))
+
+    # Writer thread
+    def run(self):
+        connection = connect(self.path)
+        while True:
+            matches = [self.queue.get()]
+            while len(matches) < BATCH:
+                try:
+                    matches.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            stop = None in matches
+            matches = [match for match in matches if match is not None]
+            try:
+                with connection:
+                    for match in matches:
+                        self.save(connection, *match)
+                self.saved += len(matches)
+            except sqlite3.Error as error:
+                self.error = error
+                print('Could not save match history:', error, file=sys.stderr)
+            for match in matches:
+                self.queue.task_done()
+            if stop:
+                self.queue.task_done()
+                connection.close()
+                return
+
+    def save(self, connection, played, gameTime, players, shots):
+        scores = [score for name, human, score in players] + [0, 0]
+        match = connection.execute(
+            'INSERT INTO matches (played, gameTime, players, scoreOne, '
+            'scoreTwo) VALUES (?, ?, ?, ?, ?)',
+            (played, gameTime, sum(human for name, human, score in players),
+             scores[0], scores[1])).lastrowid
+        connection.executemany(
+            'INSERT INTO scores VALUES (?, ?, ?, ?, ?, ?)',
+            [(match, name, int(human), gameTime, score, played)
+             for name, human, score in players])
+        connection.executemany(
+            UPSERTBEST, [(name, gameTime, int(human), score, match)
+                         for name, human, score in players])
+        connection.executemany(
+            'INSERT INTO shots VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+            [(match, shot[0], number) + tuple(shot[1:])
+             for number, shot in enumerate(shots, 1)])
+
+    # Block until everything queued so far is saved
+    def flush(self):
+        self.queue.join()
+
+    def close(self):
+        if self.thread.is_alive():
+            self.queue.put(None)
+            self.thread.join()
+        self.reader.close()
+
+    # Best score by any person, the game's hi-score
+    def high_score(self):
+        return self.reader.execute(
+            'SELECT MAX(score) FROM bests WHERE human = 1').fetchone()[0] or 0
+
+    # Best score of a player, per time limit or over all of them
+    def best(self, player, gameTime=None):
+        if gameTime is None:
+            row = self.reader.execute(
+                'SELECT MAX(score) FROM bests WHERE player = ?',
+                (player,)).fetchone()
+        else:
+            row = self.reader.execute(
+                'SELECT score FROM bests WHERE player = ? AND gameTime = ?',
+                (player, gameTime)).fetchone()
+        return row[0] if row else None
+
+    # Top scores for a time limit as (player, score, played), optionally
+    # for one player only
+    def leaderboard(self, gameTime, limit=10, player=None):
+        if player is None:
+            return self.reader.execute(
+                'SELECT player, score, played FROM scores WHERE gameTime = ? '
+                'ORDER BY score DESC LIMIT ?', (gameTime, limit)).fetchall()
+        return self.reader.execute(
+            'SELECT player, score, played FROM scores WHERE player = ? AND '
+            'gameTime = ? ORDER BY score DESC LIMIT ?',
+            (player, gameTime, limit)).fetchall()
+
+    # Shots of a match as (player, number, power, launch angle, wind speed,
+    # wind angle, points, bounces, steps)
+    def shots(self, match):
+        return self.reader.execute(
+            'SELECT player, number, power, launchAngle, windSpeed, windAngle, '
+            'points, bounces, steps FROM shots WHERE match = ? '
+            'ORDER BY number', (match,)).fetchall()
+
+
+# Fill a scratch file with random matches and time the queries the game and
+# an operator would make
+def benchmark(matches=1000000, queries=200):
+    rng = Random(6)
+    names = ['Player One', 'Player Two'] + ['Player {0}'.format(i)
+                                            for i in range(3, 1000)]
+    with tempfile.TemporaryDirectory() as folder:
+        store = HistoryStore(os.path.join(folder, 'history.db'))
+
+        start = perf_counter()
+        worst = 0.0
+        for i in range(matches):
+            players = [(name, True, 10 * rng.randrange(40))
+                       for name in rng.sample(names, 2)]
+            begin = perf_counter()
+            store.record_match(rng.choice((60, 180, 300)), players,
+                               played=i)
+            worst = max(worst, perf_counter() - begin)
+        queued = perf_counter() - start
+        store.flush()
+        saved = perf_counter() - start
+        print('{0} matches queued in {1:.2f} s (slowest {2:.1f} us), saved '
+              'in {3:.2f} s'.format(matches, queued, 1e6 * worst, saved))
+
+        checks = [('high_score', lambda: store.high_score()),
+                  ('best', lambda: store.best(rng.choice(names), 60)),
+                  ('leaderboard', lambda: store.leaderboard(
+                      rng.choice((60, 180, 300)))),
+                  ('leaderboard player', lambda: store.leaderboard(
+                      rng.choice((60, 180, 300)), 10, rng.choice(names)))]
+        for name, query in checks:
+            start = perf_counter()
+            for i in range(queries):
+                query()
+            print('  {0:<20}{1:>8.3f} ms'.format(
+                name, 1000 * (perf_counter() - start) / queries))
+        store.close()
+
+
+if __name__ == '__main__':
+    benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 1000000)
@@ -0,0 +1,302 @@
+# Paper Football League
+# League runner
+# By Josh Klipstein
+#
+# Plays round-robin seasons between bots headlessly, spread over a process
+# pool.  Every pairing plays home and away: the home bot takes player one's
+# half, the away bot player two's.  Matches follow the game's rules tick by
+# tick: each half lasts the chosen game time, wind changes on a 1 in 100
+# chance every tick, a bot picks its shot for the wind it sees (the built
+# in ones thinking over a few ticks for a wind they have not seen) and
+# lets it go AIMTICKS ticks later, the ball moves one step a tick and
+# every goal is worth 10 points.  Results are written as JSON lines as
+# matches finish, and the table is printed at the end.
+#
+# A bot is one of the built in ones (easy, normal, hard, random) or
+# "module:factory", where factory(player, rng) returns an object with a
+# choose(windSpeed, windAngle) method giving (power, launch angle).
+#
+#   python league.py [--bots easy,normal,hard] [--rounds N] [--game-time S]
+#                    [--workers N] [--out FILE]
+
+import argparse
+import importlib
+import json
+import os
+import sys
+from math import log, pi
+from multiprocessing import Pool
+from random import Random
+from time import perf_counter
+
+from opponent import LEVELS, MAXPOWER, MINPOWER, Opponent
+from physics import make_geometry, shot_steps
+from state import AIMTICKS, TIMERSTEP
+
+RESULTSPATH = 'data/league.jsonl'
+GAMETIMES = (60, 180, 300) # Game time options, in seconds per half
+WINDCHANCE = 100 # One in this many ticks changes the wind
+MAXWINDSPEED = 100
+CHUNK = 16 # Matches handed to a worker at a time
+
+GEOMETRY = None # Set up in each worker
+BOTS = None
+
+
+# Shoots anywhere, as a floor for the table
+class RandomBot:
+
+    def __init__(self, player, rng):
+        self.rng = rng
+
+    def choose(self, windSpeed, windAngle):
+        return (self.rng.uniform(MINPOWER, MAXPOWER),
+                self.rng.uniform(0, 2 * pi))
+
+
+# Built in bot factories.  Opponents are kept per level and side so their
+# shot memo carries over from match to match; only the fumbling is seeded.
+def _opponent_factory(level):
+    opponents = {}
+
+    def factory(player, rng):
+        if player not in opponents:
+            opponents[player] = Opponent(level, player, GEOMETRY)
+        opponent = opponents[player]
+        opponent.rng = rng
+        return opponent
+    return factory
+
+
+def bot_factory(spec):
+    if spec in LEVELS:
+        return _opponent_factory(spec)
+    if spec == 'random':
+        return RandomBot
+    moduleName, sep, name = spec.partition(':')
+    if not sep:
+        raise ValueError('unknown bot {0!r}, expected {1}, random or '
+                         'module:factory'.format(spec, ', '.join(LEVELS)))
+    return getattr(importlib.import_module(moduleName), name)
+
+
+# Ticks until the timer of a half runs out, counted the way the game
+# counts them, float steps and all
+def half_ticks(gameTime):
+    timer = gameTime
+    ticks = 0
+    while timer >= 0:
+        timer -= TIMERSTEP
+        ticks += 1
+    return ticks
+
+
+# Wind as the game changes it, drawn only at the ticks where it changes.
+# The gap between changes is geometric, the same as a 1 in WINDCHANCE roll
+# every tick.
+class Wind:
+
+    def __init__(self, rng):
+        self.rng = rng
+        self.speed = 0.0
+        self.angle = 0.0
+        self.nextChange = self.gap()
+
+    def gap(self):
+        return 1 + int(log(1 - self.rng.random()) / log(1 - 1 / WINDCHANCE))
+
+    # Wind after the update of a tick, ticks counted from 1
+    def at(self, tick):
+        while self.nextChange <= tick:
+            self.angle = self.rng.random() * 2 * pi
+            self.speed = self.rng.random() * MAXWINDSPEED
+            self.nextChange += self.gap()
+        return self.speed, self.angle
+
+
+# Play one half, returning (points, shots).  A shot is picked on one tick,
+# or over several while a built in opponent thinks, launched AIMTICKS ticks
+# later, then moves a step every tick and is taken off the tick after its
+# last step, when the next shot is picked.  Steps after the timer runs out
+# do not count.
+def play_half(bot, player, ticks, rng):
+    wind = Wind(rng)
+    points = 0
+    shots = 0
+    tick = 1
+    while True:
+        if hasattr(bot, 'think'):
+            # Built in opponents think over ticks for a new wind, as they
+            # do in the game
+            shot = bot.think(*wind.at(tick))
+            while shot is None and tick < ticks:
+                tick += 1
+                shot = bot.think(*wind.at(tick))
+            if shot is None:
+                break
+        else:
+            shot = bot.choose(*wind.at(tick))
+        power, angle = shot
+        launch = tick + AIMTICKS
+        if launch >= ticks:
+            break
+        shots += 1
+        for step, (center, rotation, events) in enumerate(
+                shot_steps(power, angle, *wind.at(launch), player, GEOMETRY),
+                launch + 1):
+            if step > ticks:
+                return points, shots
+            points += 10 * events.count('score')
+        tick = step + 1
+    return points, shots
+
+
+def _start_worker(specs):
+    global GEOMETRY, BOTS
+    GEOMETRY = make_geometry()
+    BOTS = {name: bot_factory(spec) for name, spec in specs.items()}
+
+
+# One match as a dictionary of its result
+def play_match(task):
+    number, home, away, gameTime, seed = task
+    ticks = half_ticks(gameTime)
+    rng = Random(seed)
+    scoreOne, shotsOne = play_half(BOTS[home](False, Random(rng.random())),
+                                   False, ticks, rng)
+    scoreTwo, shotsTwo = play_half(BOTS[away](True, Random(rng.random())),
+                                   True, ticks, rng)
+    return {'match': number, 'home': home, 'away': away,
+            'gameTime': gameTime, 'seed': seed,
+            'scoreOne': scoreOne, 'scoreTwo': scoreTwo,
+            'shotsOne': shotsOne, 'shotsTwo': shotsTwo}
+
+
+# Every ordered pairing of names, repeated for each round
+def schedule(names, rounds, gameTime, seed):
+    seeds = Random(seed)
+    number = 0
+    for round in range(rounds):
+        for home in names:
+            for away in names:
+                if home != away:
+                    yield number, home, away, gameTime, seeds.getrandbits(64)
+                    number += 1
+
+
+# Empty table of win, draw and loss counts, points for and against, and
+# league points
+def new_table(names):
+    return {name: {'played': 0, 'won': 0, 'drawn': 0, 'lost': 0,
+                   'for': 0, 'against': 0, 'points': 0} for name in names}
+
+
+# Add one match result to a table
+def add_result(table, result):
+    for name, scored, conceded in ((result['home'], result['scoreOne'],
+                                    result['scoreTwo']),
+                                   (result['away'], result['scoreTwo'],
+                                    result['scoreOne'])):
+        row = table[name]
+        row['played'] += 1
+        row['for'] += scored
+        row['against'] += conceded
+        if scored > conceded:
+            row['won'] += 1
+            row['points'] += 3
+        elif scored == conceded:
+            row['drawn'] += 1
+            row['points'] += 1
+        else:
+            row['lost'] += 1
+
+
+def standings(results, names):
+    table = new_table(names)
+    for result in results:
+        add_result(table, result)
+    return table
+
+
+def print_table(table, file=None):
+    file = sys.stdout if file is None else file
+    print('{0:<12}{1:>8}{2:>8}{3:>8}{4:>8}{5:>10}{6:>10}{7:>8}'.format(
+        'bot', 'played', 'won', 'drawn', 'lost', 'for', 'against', 'points'),
+        file=file)
+    for name, row in sorted(table.items(), key=lambda item: (
+            -item[1]['points'], item[1]['against'] - item[1]['for'])):
+        print('{0:<12}{1[played]:>8}{1[won]:>8}{1[drawn]:>8}{1[lost]:>8}'
+              '{1[for]:>10}{1[against]:>10}{1[points]:>8}'.format(name, row),
+              file=file)
+
+
+# Play a season and stream its results to path.  Returns the table.
+# Matches are scheduled as the workers take them and the table is kept up
+# as results come in, so a season holds no list of either.
+def run_season(specs, rounds=1, gameTime=60, workers=None, path=RESULTSPATH,
+               seed=0):
+    names = list(specs)
+    tasks = schedule(names, rounds, gameTime, seed)
+    folder = os.path.dirname(path)
+    if folder:
+        os.makedirs(folder, exist_ok=True)
+
+    table = new_table(names)
+    played = 0
+    start = perf_counter()
+    with Pool(workers, _start_worker, (specs,)) as pool, \
+            open(path, 'w') as file:
+        for result in pool.imap_unordered(play_match, tasks, CHUNK):
+            file.write(json.dumps(result, sort_keys=True) + '\n')
+            file.flush()
+            add_result(table, result)
+            played += 1
+    elapsed = perf_counter() - start
+
+    print('{0} matches in {1:.1f} s ({2:.1f} matches/s) on {3} workers, '
+          'results in {4}'.format(played, elapsed, played / elapsed,
+                                  workers or os.cpu_count(), path))
+    print_table(table)
+    return table
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Paper Football League '
+                                                 'season runner')
+    parser.add_argument('--bots', default='easy,normal,hard,random',
+                        help='comma separated built in bots')
+    parser.add_argument('--bot', action='append', default=[],
+                        metavar='NAME=MODULE:FACTORY',
+                        help='add a bot from a module')
+    parser.add_argument('--rounds', type=int, default=1,
+                        help='times every pairing plays home and away')
+    parser.add_argument('--game-time', type=int, default=60,
+                        choices=GAMETIMES, help='seconds per half')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='processes to use, all cores by default')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--out', default=RESULTSPATH)
+    args = parser.parse_args(argv)
+
+    specs = {name: name for name in args.bots.split(',') if name}
+    for bot in args.bot:
+        name, sep, spec = bot.partition('=')
+        if not (name and sep and spec):
+            parser.error('--bot expects NAME=MODULE:FACTORY, got {0!r}'
+                         .format(bot))
+        specs[name] = spec
+    for spec in specs.values():
+        try:
+            bot_factory(spec) # Fail before starting any workers
+        except (ValueError, ImportError, AttributeError) as error:
+            parser.error(str(error))
+    if len(specs) < 2:
+        parser.error('a league needs at least two bots')
+
+    run_season(specs, args.rounds, args.game_time, args.workers, args.out,
+               args.seed)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,85 @@
+# Paper Football League
+# Background asset loader
+# By Josh Klipstein
+#
+# Decodes images and sounds on a worker thread, one group at a time, so the
+# main menu can be drawn while the gameplay assets are still loading.  The
+# main thread waits on a group only when it actually needs it.
+
+import sys
+import threading
+from time import perf_counter
+
+
+class AssetLoader:
+
+    def __init__(self, startTime=None, report=False):
+        self.startTime = perf_counter() if startTime is None else startTime
+        self.report = report
+        self.groups = [] # Group names in loading order
+        self.jobs = {} # Group name: [(asset name, function, args)]
+        self.assets = {} # Group name: {asset name: loaded asset}
+        self.ready = {} # Group name: threading.Event
+        self.error = None
+        self.timings = [] # (group, asset name, seconds to load)
+        self.marks = [] # (label, seconds since start)
+        self.thread = None
+
+    # Queue an asset: function(*args) is called on the worker thread
+    def add(self, group, name, function, *args):
+        if group not in self.jobs:
+            self.groups.append(group)
+            self.jobs[group] = []
+            self.assets[group] = {}
+            self.ready[group] = threading.Event()
+        self.jobs[group].append((name, function, args))
+
+    def start(self):
+        self.thread = threading.Thread(target=self.run, name='asset-loader',
+                                       daemon=True)
+        self.thread.start()
+
+    # Worker thread
+    def run(self):
+        try:
+            for group in self.groups:
+                for name, function, args in self.jobs[group]:
+                    start = perf_counter()
+                    self.assets[group][name] = function(*args)
+                    self.timings.append((group, name, perf_counter() - start))
+                self.mark('{0} assets loaded'.format(group))
+                self.ready[group].set()
+        except Exception as error:
+            self.error = error
+        finally:
+            # Never leave the main thread waiting on a group that failed
+            for group in self.groups:
+                self.ready[group].set()
+
+    # Block until a group is loaded and return its assets by name.  Raises
+    # whatever stopped the worker if loading failed.
+    def wait(self, group):
+        if not self.ready[group].is_set():
+            start = perf_counter()
+            self.ready[group].wait()
+            self.mark('waited {0:.0f} ms for {1} assets'.format(
+                1000 * (perf_counter() - start), group))
+        if self.error is not None:
+            raise self.error
+        return self.assets[group]
+
+    # Record a point in startup, such as the first frame drawn
+    def mark(self, label):
+        self.marks.append((label, perf_counter() - self.startTime))
+
+    # Print the startup marks and the load times of the assets loaded so
+    # far.  The worker may still be adding to them.
+    def print_report(self, file=None):
+        file = sys.stdout if file is None else file
+        print('Startup timing (ms since start)', file=file)
+        for label, seconds in sorted(self.marks, key=lambda mark: mark[1]):
+            print('  {0:>8.1f}  {1}'.format(1000 * seconds, label), file=file)
+        print('Asset load times (ms)', file=file)
+        for group, name, seconds in list(self.timings):
+            print('  {0:>8.1f}  {1}/{2}'.format(1000 * seconds, group, name),
+                  file=file)
@@ -0,0 +1,483 @@
+# Paper Football League
+# Network play
+# By Josh Klipstein
+#
+# Two copies of the game play a two-player match over a local network, one
+# hosting as player one and the other joining as player two.  Shots are
+# deterministic and the wind comes from a seed the host picks, so all that
+# is sent is what the shooting player does: the power and angle of each
+# shot, tagged with the game tick it was taken on, and how many ticks that
+# side has played.  The watching side plays exactly those ticks and takes
+# each shot on its tick, so both end up with the same wind, flights and
+# scores without any game state going over the wire.
+#
+# Messages go over one TCP connection with Nagle's delay turned off.  A shot
+# has to arrive, once and in order with the ticks around it, which is what
+# TCP gives; on a LAN it costs no more latency than UDP would.
+#
+# The connection runs on an asyncio loop in its own thread.  The game loop
+# only drops messages into it and takes them out of a queue, so nothing
+# the network does can hold up a frame.  Pings are answered on the network
+# thread, so the round trips measured are the network's, not the frame
+# rate's, and every byte each way is counted.
+#
+#   python netplay.py [seconds]     two local games play a match over
+#                                   localhost, checking both saw the same
+#                                   match, with round trips and bytes sent
+
+import asyncio
+import json
+import os
+import queue
+import socket
+import struct
+import subprocess
+import sys
+import tempfile
+import threading
+from random import Random, getrandbits
+from time import perf_counter, perf_counter_ns
+
+import pygame as pg
+from pygame.locals import *
+
+from physics import RULES
+
+PORT = 50819
+MAGIC = b'PFLN'
+VERSION = 1
+PINGINTERVAL = 1.0 # Seconds between round trip measurements
+RETRYWAIT = 0.5 # Seconds between tries to reach the host
+CLOSEWAIT = 1.0 # Longest the game waits for the goodbye to go out
+NETEVENT = pg.event.custom_type() # Wakes an idle screen for the network
+
+# Message types, each a type byte and a fixed size body
+HELLO, START, RESTART, TICKS, SHOT, LEAVE, PING, PONG = range(8)
+BODIES = {HELLO: struct.Struct('<4sHH'), # Magic, version, physics rules
+          START: struct.Struct('<HQd'), # Match, seed, seconds per half
+          RESTART: struct.Struct('<H'), # Match
+          TICKS: struct.Struct('<HI'), # Match, ticks played
+          SHOT: struct.Struct('<HIdd'), # Match, tick, power, angle
+          LEAVE: struct.Struct('<'),
+          PING: struct.Struct('<Q'), # Sender's clock in nanoseconds
+          PONG: struct.Struct('<Q')} # The ping's clock, sent back
+# Messages that can find the game asleep on a menu screen
+WAKING = (START, RESTART, LEAVE)
+
+
+def pack(kind, *values):
+    return bytes((kind,)) + BODIES[kind].pack(*values)
+
+
+class NetPlay:
+
+    # Host a match on port, or join the one hosted at host:port.  Raises
+    # OSError if the port can not be listened on or the host's name can
+    # not be looked up.
+    def __init__(self, host=None, port=PORT):
+        self.hosting = host is None
+        self.player = not self.hosting # The player this side shoots for
+        self.address = (host, port)
+        self.port = port
+        self.connected = False
+        self.closed = False
+        self.error = None # Why the last connection was refused, if it was
+
+        # Network thread side
+        self.inbox = queue.Queue() # (type, values) for the game
+        self.writer = None
+        self.counts = [0, 0, 0, 0] # Bytes and messages sent, received
+        self.rtts = [] # Round trips in nanoseconds
+
+        # Game side, changed only by the game thread
+        self.match = 0 # Number of the match being played
+        self.horizon = 0 # Ticks the shooting side has played
+        self.shots = {} # (power, angle) by tick
+        self.sentTicks = 0
+        self.started = None # (seed, gameTime) of a match the host started
+        self.restarted = False # The other side restarted the match
+        self.left = False # The other side left the match
+        # Counts, pings and time when the match started
+        self.mark = (self.counts[:], 0, perf_counter())
+
+        if not self.hosting:
+            # A name that does not look up would be retried forever
+            socket.getaddrinfo(host, port, type=socket.SOCK_STREAM)
+        self.loop = asyncio.new_event_loop()
+        self.listening = threading.Event()
+        self.thread = threading.Thread(target=self.loop.run_until_complete,
+                                       args=(self._main(),), daemon=True,
+                                       name='netplay')
+        self.thread.start()
+        self.listening.wait()
+        if self.error is not None:
+            raise self.error
+
+    # Network thread
+
+    async def _main(self):
+        self._stopping = asyncio.Event()
+        host, port = self.address
+        if self.hosting:
+            try:
+                # Every IPv4 interface, one socket so port 0 means one port
+                server = await asyncio.start_server(self._session, '0.0.0.0',
+                                                    port)
+            except OSError as error:
+                self.error = error
+                self.listening.set()
+                return
+            self.port = server.sockets[0].getsockname()[1]
+            self.listening.set()
+            async with server:
+                await self._stopping.wait()
+        else:
+            # Keep trying until the host is up, and again if it goes away
+            self.listening.set()
+            while not self._stopping.is_set():
+                try:
+                    reader, writer = await asyncio.open_connection(host, port)
+                except OSError:
+                    pass
+                else:
+                    await self._session(reader, writer)
+                try:
+                    await asyncio.wait_for(self._stopping.wait(), RETRYWAIT)
+                except asyncio.TimeoutError:
+                    pass
+
+        # Let the goodbye go out, then wind everything else down
+        if self.writer is not None:
+            self.writer.close()
+            try:
+                await self.writer.wait_closed()
+            except OSError:
+                pass
+        tasks = asyncio.all_tasks() - {asyncio.current_task()}
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    # One connection, from the hello until either side hangs up
+    async def _session(self, reader, writer):
+        if self.writer is not None:
+            # Someone is already playing here
+            writer.close()
+            return
+        sock = writer.get_extra_info('socket')
+        if sock is not None:
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.writer = writer
+        pinger = None
+        try:
+            self._write(pack(HELLO, MAGIC, VERSION, RULES))
+            kind, values = await self._read(reader)
+            if kind != HELLO or values != (MAGIC, VERSION, RULES):
+                self.error = ValueError('the other side plays a different '
+                                        'version or different rules')
+                print('Network:', self.error, file=sys.stderr)
+                return
+            self.connected = True
+            self._wake()
+            pinger = asyncio.ensure_future(self._ping())
+            while True:
+                kind, values = await self._read(reader)
+                if kind == PING:
+                    self._write(pack(PONG, *values))
+                elif kind == PONG:
+                    self.rtts.append(perf_counter_ns() - values[0])
+                else:
+                    self.inbox.put((kind, values))
+                    if kind in WAKING:
+                        self._wake()
+        except (OSError, ValueError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            if pinger is not None:
+                pinger.cancel()
+            if self.connected:
+                self.connected = False
+                self.inbox.put((LEAVE, ()))
+                self._wake()
+            self.writer = None
+            writer.close()
+
+    async def _read(self, reader):
+        kind = (await reader.readexactly(1))[0]
+        body = BODIES.get(kind)
+        if body is None:
+            raise ValueError('unknown message type {0}'.format(kind))
+        values = body.unpack(await reader.readexactly(body.size))
+        self.counts[2] += 1 + body.size
+        self.counts[3] += 1
+        return kind, values
+
+    def _write(self, data):
+        if self.writer is None:
+            return
+        self.writer.write(data)
+        self.counts[0] += len(data)
+        self.counts[1] += 1
+
+    async def _ping(self):
+        while True:
+            self._write(pack(PING, perf_counter_ns()))
+            await asyncio.sleep(PINGINTERVAL)
+
+    # Wake the game if it is asleep waiting for events
+    def _wake(self):
+        try:
+            pg.event.post(pg.event.Event(NETEVENT))
+        except pg.error:
+            pass # No display yet, nothing is asleep
+
+    # Game thread
+
+    def send(self, kind, *values):
+        if not self.closed:
+            self.loop.call_soon_threadsafe(self._write, pack(kind, *values))
+
+    # Take in what the other side has sent since the last poll
+    def poll(self):
+        while True:
+            try:
+                kind, values = self.inbox.get_nowait()
+            except queue.Empty:
+                return
+            if kind == LEAVE:
+                self.left = True
+            elif kind == START or kind == RESTART:
+                if values[0] > self.match:
+                    self._new_match(values[0])
+                    if kind == START:
+                        self.started = values[1:]
+                    else:
+                        self.restarted = True
+            elif values[0] != self.match:
+                continue # Left over from an earlier match
+            elif kind == TICKS:
+                self.horizon = values[1]
+            elif kind == SHOT:
+                self.shots[values[1]] = values[2:]
+
+    def _new_match(self, number):
+        self.match = number
+        self.horizon = 0
+        self.shots = {}
+        self.sentTicks = 0
+        self.started = None
+        self.restarted = False
+        self.left = False
+        self.mark = (self.counts[:], len(self.rtts), perf_counter())
+
+    # Seed and seconds per half of a match starting now, or None while
+    # waiting.  The host starts one as soon as the other side is connected
+    # and picks the seed, the other side takes the host's.
+    def start_match(self, gameTime):
+        self.poll()
+        if not self.hosting:
+            started, self.started = self.started, None
+            return started
+        if not self.connected:
+            return None
+        self._new_match(self.match + 1)
+        matchSeed = getrandbits(64)
+        self.send(START, self.match, matchSeed, gameTime)
+        return matchSeed, gameTime
+
+    # Play the match again, on both sides
+    def restart(self):
+        self._new_match(self.match + 1)
+        self.send(RESTART, self.match)
+
+    def leave(self):
+        self.send(LEAVE)
+
+    # Let the other side play up to ticks
+    def send_ticks(self, ticks):
+        if ticks != self.sentTicks:
+            self.sentTicks = ticks
+            self.send(TICKS, self.match, ticks)
+
+    # A shot taken after tick ticks were played
+    def send_shot(self, tick, power, angle):
+        self.send(SHOT, self.match, tick, power, angle)
+
+    # The other side's (power, angle) for the shot taken after tick, if any
+    def take_shot(self, tick):
+        return self.shots.pop(tick, None)
+
+    # Seconds, bytes, messages and round trips since the match started
+    def report(self):
+        counts, first, start = self.mark
+        rtts = sorted(self.rtts[first:])
+        report = {'seconds': perf_counter() - start,
+                  'sent': self.counts[0] - counts[0],
+                  'messagesSent': self.counts[1] - counts[1],
+                  'received': self.counts[2] - counts[2],
+                  'messagesReceived': self.counts[3] - counts[3],
+                  'pings': len(rtts)}
+        if rtts:
+            report['rttMs'] = [rtts[0] / 1e6, rtts[len(rtts) // 2] / 1e6,
+                               rtts[int(len(rtts) * .95)] / 1e6,
+                               rtts[-1] / 1e6]
+        return report
+
+    def summary(self):
+        report = self.report()
+        text = ('Network match: {sent} bytes sent in {messagesSent} '
+                'messages, {received} received in {messagesReceived}'
+                .format(**report))
+        if 'rttMs' in report:
+            text += ', round trip {1:.2f} ms median, {2:.2f} ms 95%'.format(
+                *report['rttMs'])
+        return text
+
+    # Say goodbye and shut the network thread down
+    def close(self):
+        if self.closed:
+            return
+        self.send(LEAVE)
+        self.closed = True
+        self.loop.call_soon_threadsafe(self._stopping.set)
+        self.thread.join(CLOSEWAIT)
+
+
+# Feeds one side of a test match its clicks: play from the menu, skip the
+# banners, and take a random shot whenever the ball is ready on its turns
+class TestPlayer:
+
+    def __init__(self, game, net, seconds, rngSeed):
+        self.game = game
+        self.net = net
+        self.seconds = seconds
+        self.rng = Random(rngSeed)
+        self.result = None
+        self.events = pg.event.get
+
+    def click(self, pos, button=MOUSEBUTTONUP):
+        return [pg.event.Event(MOUSEMOTION, pos=pos, rel=(0, 0), buttons=()),
+                pg.event.Event(button, pos=pos, button=1)]
+
+    def get(self, *args, **kwargs):
+        # The real queue still has to be emptied, network wake ups included
+        events = self.events()
+        game = self.game
+        STATE = game.STATE
+        match = STATE.match
+        if STATE.scene.menu:
+            if self.result is not None:
+                return events + [pg.event.Event(QUIT)]
+            STATE.config.gameTime = self.seconds
+            return events + self.click(game.RECTDICT['play'].center)
+        if STATE.scene.lobby:
+            return events
+        if match.gameOver:
+            if self.result is None:
+                self.result = {'scores': [match.scoreOne, match.scoreTwo],
+                               'ticks': match.ticks,
+                               'shots': match.shotLog,
+                               'net': self.net.report()}
+            return events + [pg.event.Event(QUIT)]
+        if game.banners_playing(match):
+            return events + self.click((0, 0), MOUSEBUTTONDOWN)
+        if match.player != self.net.player or STATE.ball.shot is not None:
+            return events
+
+        # Pick the ball up, then drag the arrow back and let go
+        center = STATE.ball.rect.center
+        if not match.draggingArrow:
+            return events + self.click(center, MOUSEBUTTONDOWN)
+        aim = (center[0] + (1 if match.player else -1)
+               * self.rng.randint(40, 180),
+               center[1] + self.rng.randint(-160, 160))
+        return events + [pg.event.Event(MOUSEMOTION, pos=aim, rel=(0, 0),
+                                        buttons=(1, 0, 0)),
+                         pg.event.Event(MOUSEBUTTONUP, pos=aim, button=1)]
+
+
+# Play one side of a test match headless, writing what it saw to path
+def play_side(side, port, seconds, path):
+    os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+    os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+    import paper_football_league as game
+
+    hosting = side == 'host'
+    net = NetPlay(None if hosting else '127.0.0.1', port)
+    if hosting:
+        print(net.port, flush=True)
+    player = TestPlayer(game, net, seconds, 1 if hosting else 2)
+    realGet = pg.event.get
+    pg.event.get = player.get
+    try:
+        game.initialize(network=net)
+    except SystemExit:
+        pass
+    finally:
+        pg.event.get = realGet
+    with open(path, 'w') as file:
+        json.dump(player.result, file)
+
+
+# Two games, a host and a guest, play a match of seconds per half against
+# each other over localhost.  Passes if both saw the very same shots and
+# scores.
+def selftest(seconds=5.0):
+    with tempfile.TemporaryDirectory() as folder:
+        paths = [os.path.join(folder, side + '.json')
+                 for side in ('host', 'join')]
+        command = [sys.executable, os.path.abspath(__file__), '--side']
+        # The host's first line out is its port, nothing else may come first.
+        # Neither side reads the terminal; SDL can stop on it otherwise.
+        env = dict(os.environ, PYGAME_HIDE_SUPPORT_PROMPT='1')
+        host = subprocess.Popen(command + ['host', '0', str(seconds),
+                                           paths[0]],
+                                stdin=subprocess.DEVNULL,
+                                stdout=subprocess.PIPE, text=True, env=env)
+        port = host.stdout.readline().strip()
+        guest = subprocess.Popen(command + ['join', port, str(seconds),
+                                            paths[1]],
+                                 stdin=subprocess.DEVNULL,
+                                 stdout=subprocess.DEVNULL, env=env)
+        timeout = 4 * seconds + 60
+        for process in (guest, host):
+            try:
+                process.communicate(timeout=timeout)
+            except subprocess.TimeoutExpired:
+                process.kill()
+                process.communicate()
+        results = []
+        for path in paths:
+            try:
+                with open(path) as file:
+                    results.append(json.load(file))
+            except (OSError, ValueError):
+                results.append(None)
+
+    if None in results:
+        print('FAIL: a side did not finish its match')
+        return 1
+    hostResult, guestResult = results
+    print('{0} shots, {1} ticks, score {2[0]} to {2[1]}'.format(
+        len(hostResult['shots']), hostResult['ticks'],
+        hostResult['scores']))
+    print('{0:<6}{1:>10}{2:>10}{3:>10}{4:>10}{5:>9}{6:>9}'.format(
+        'side', 'sent', 'received', 'bytes/s', 'rtt min', 'median', '95%'))
+    for side, result in zip(('host', 'join'), results):
+        net = result['net']
+        rtts = net.get('rttMs', [float('nan')] * 4)
+        print('{0:<6}{1:>8} B{2:>8} B{3:>10.0f}{4:>7.2f} ms{5:>6.2f} ms'
+              '{6:>6.2f} ms'.format(side, net['sent'], net['received'],
+                                    net['sent'] / net['seconds'], *rtts[:3]))
+    same = all(hostResult[key] == guestResult[key]
+               for key in ('scores', 'ticks', 'shots'))
+    print('OK' if same else 'FAIL: the two sides saw different matches')
+    return 0 if same else 1
+
+
+if __name__ == '__main__':
+    if sys.argv[1:2] == ['--side']:
+        side, port, seconds, path = sys.argv[2:6]
+        play_side(side, int(port), float(seconds), path)
+    else:
+        sys.exit(selftest(float(sys.argv[1]) if len(sys.argv) > 1 else 5.0))
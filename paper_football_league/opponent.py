@@ -0,0 +1,247 @@
+# Paper Football League
+# Computer opponent
+# By Josh Klipstein
+#
+# Picks a power and launch angle for the current wind by searching the shot
+# space with the game's own physics: a coarse power/angle grid, then finer
+# grids around the best shot so far.  Wind is quantized into bins and the
+# best shot for each bin is remembered, so after the first search in a bin
+# a decision is a dictionary lookup.  Difficulty levels set how much of the
+# shot space is searched, at how many winds across the bin each shot is
+# tried, and how far the shot is fumbled afterwards.
+#
+# Since shots bounce off the goal posts, a shot that scores in the wind at
+# the center of a bin often misses a little way off it, so the harder levels
+# score each shot over a grid of winds spread across the bin and pick the
+# one that scores the most over all of them.
+#
+# Searches are a few hundred shots, tried at up to nine winds each on hard,
+# well over a frame's worth of work.  The game asks with think(), which
+# simulates at most TICKBUDGET shots a tick and carries the search over to
+# the next tick until it is done, so a new wind bin costs the computer a
+# few ticks of thinking instead of stalling frames.  The budget counts
+# shots, not time, so a replay thinks for the same ticks.  The plain
+# simulator is fast enough for this and the game still does not need
+# NumPy.
+#
+# When the shot table has been built (see shottable.py) the coarse grid is
+# read from it instead of simulated, and only the finer grids are.
+#
+#   python opponent.py [seconds]
+
+import random
+import sys
+from collections import namedtuple
+from math import pi
+from time import perf_counter
+
+from physics import make_geometry, simulate_shot
+from shottable import grid_index, grid_values
+
+# Search effort and aim error of a difficulty level.  Winds is the number of
+# wind speeds and of wind angles across a bin each shot is tried at.  Noise
+# is the largest fraction of power and the largest angle in radians the
+# shot may be off by.
+Level = namedtuple('Level',
+                   'powers angles rounds winds powerNoise angleNoise')
+
+LEVELS = {'easy': Level(6, 8, 0, 1, .15, .12),
+          'normal': Level(8, 16, 1, 1, .05, .04),
+          'hard': Level(8, 16, 2, 3, 0, 0)}
+MINPOWER = 20
+MAXPOWER = 200
+REFINESTEPS = 5 # Powers and angles per side of each finer grid
+TICKBUDGET = 150 # Most shots simulated in one tick of thinking
+WINDSPEEDSTEP = 5 # cm/s per wind speed bin
+WINDANGLESTEP = 2 * pi / 36 # Radians per wind angle bin
+
+
+class Opponent:
+
+    def __init__(self, level='normal', player=True, geometry=None, rng=None,
+                 table=None):
+        self.name = level
+        self.level = LEVELS[level]
+        self.player = player
+        self.geometry = make_geometry() if geometry is None else geometry
+        self.rng = random if rng is None else rng # Game seeds the module
+        self.table = table # Open shot table for the coarse grid, if any
+        self.memo = {} # Wind bin: (power, angle, points)
+        self.thinking = None # (wind bin, search) being carried over ticks
+        self.searches = 0
+        self.lookups = 0
+
+    # Wind bin and the wind at its center, which is what gets searched
+    def wind_bin(self, windSpeed, windAngle):
+        speedBin = int(round(windSpeed / WINDSPEEDSTEP))
+        angleBin = int(round(windAngle / WINDANGLESTEP)) % int(
+            round(2 * pi / WINDANGLESTEP))
+        return (speedBin, angleBin), (speedBin * WINDSPEEDSTEP,
+                                      angleBin * WINDANGLESTEP)
+
+    # Winds spread evenly across the bin around a wind, the wind itself
+    # when the level tries one
+    def bin_winds(self, windSpeed, windAngle):
+        count = self.level.winds
+        offsets = [(i + .5) / count - .5 for i in range(count)]
+        return [(max(0, windSpeed + i * WINDSPEEDSTEP),
+                 windAngle + j * WINDANGLESTEP)
+                for i in offsets for j in offsets]
+
+    # Best (power, angle, points) of the shots and the best so far, points
+    # summed over the winds.  Yields after every shot it simulates.
+    def best_shot(self, shots, winds, best=None):
+        for power, angle in shots:
+            points = 0
+            for windSpeed, windAngle in winds:
+                points += simulate_shot(power, angle, windSpeed, windAngle,
+                                        self.player, self.geometry,
+                                        record=False).points
+                yield
+            if best is None or points > best[2]:
+                best = (power, angle, points)
+        return best
+
+    # Best (power, angle) of the shots from the shot table.  The table only
+    # holds the cells nearest each shot, swept at the wind at the center of
+    # the bin, so each shot moves to its cell and is scored with the cells
+    # around it, which favours shots that still score a little off it.
+    def table_shot(self, windSpeed, windAngle, shots):
+        rows = self.table.points_grid(windSpeed, windAngle, self.player)
+        powerGrid, angleGrid = self.table.grids[:2]
+        powers = grid_values(powerGrid)
+        angles = grid_values(angleGrid, True)
+        best = None
+        for power, angle in shots:
+            i = grid_index(power, powerGrid)
+            j = grid_index(angle, angleGrid, True)
+            points = sum(rows[k][(j + a) % len(angles)]
+                         for k in range(max(0, i - 1), min(len(powers), i + 2))
+                         for a in (-1, 0, 1))
+            if best is None or points > best[2]:
+                best = (powers[i], angles[j], points)
+        return best[:2]
+
+    # Search for the best (power, angle, points) for a wind bin, a shot at
+    # a time: yields after every shot simulated and returns the best shot.
+    # Points are summed over the winds tried.
+    def searching(self, windSpeed, windAngle):
+        level = self.level
+        winds = self.bin_winds(windSpeed, windAngle)
+        powerStep = (MAXPOWER - MINPOWER) / (level.powers - 1)
+        angleStep = 2 * pi / level.angles
+        offsets = range(-(REFINESTEPS // 2), REFINESTEPS // 2 + 1)
+        shots = [(MINPOWER + i * powerStep, j * angleStep)
+                 for i in range(level.powers) for j in range(level.angles)]
+        if self.table is not None:
+            # Read the coarse grid from the table, only its best is simulated
+            shots = [self.table_shot(windSpeed, windAngle, shots)]
+        best = yield from self.best_shot(shots, winds)
+        for i in range(level.rounds):
+            # Finer grid centered on the best shot so far
+            powerStep /= REFINESTEPS
+            angleStep /= REFINESTEPS
+            shots = [(min(MAXPOWER, max(MINPOWER, best[0] + p * powerStep)),
+                      (best[1] + a * angleStep) % (2 * pi))
+                     for p in offsets for a in offsets]
+            best = yield from self.best_shot(shots, winds, best)
+        self.searches += 1
+        return best
+
+    # Best (power, angle, points) for a wind bin, searched in one go
+    def search(self, windSpeed, windAngle):
+        steps = self.searching(windSpeed, windAngle)
+        while True:
+            try:
+                next(steps)
+            except StopIteration as done:
+                return done.value
+
+    # Power and launch angle for this wind, or None while the search for
+    # its bin still needs more ticks.  Each call simulates at most budget
+    # shots; a search left unfinished when the wind moves to another bin
+    # is dropped.
+    def think(self, windSpeed, windAngle, budget=TICKBUDGET):
+        key, wind = self.wind_bin(windSpeed, windAngle)
+        if key not in self.memo:
+            if self.thinking is None or self.thinking[0] != key:
+                self.thinking = (key, self.searching(*wind))
+            steps = self.thinking[1]
+            try:
+                for i in range(budget):
+                    next(steps)
+                return None
+            except StopIteration as done:
+                self.memo[key] = done.value
+                self.thinking = None
+        return self.choose(windSpeed, windAngle)
+
+    # Power and launch angle to shoot with in this wind
+    def choose(self, windSpeed, windAngle):
+        self.lookups += 1
+        key, wind = self.wind_bin(windSpeed, windAngle)
+        if key not in self.memo:
+            self.memo[key] = self.search(*wind)
+        power, angle, points = self.memo[key]
+
+        # Fumble the shot a little on the easier levels
+        level = self.level
+        if level.powerNoise:
+            power *= 1 + self.rng.uniform(-level.powerNoise, level.powerNoise)
+            power = min(MAXPOWER, max(MINPOWER, power))
+        if level.angleNoise:
+            angle += self.rng.uniform(-level.angleNoise, level.angleNoise)
+        return power, angle
+
+
+# Decisions per second from a cold and a warm memo, the most ticks a cold
+# decision thinks for and the slowest tick of thinking, and the points
+# actually scored in random wind for each level
+def benchmark(seconds=1.0, decisions=200):
+    rng = random.Random(3)
+    winds = [(rng.uniform(0, 100), rng.uniform(0, 2 * pi))
+             for i in range(decisions)]
+    geometry = make_geometry()
+    print('{0:<8}{1:>12}{2:>8}{3:>12}{4:>14}{5:>10}'.format(
+        'level', 'cold/s', 'ticks', 'tick ms', 'warm/s', 'points'))
+    for name in LEVELS:
+        opponent = Opponent(name, geometry=geometry, rng=random.Random(4))
+
+        # Cold: every decision searches, a tick's budget at a time
+        worst = 0.0
+        ticks = 0
+        count = 0
+        start = perf_counter()
+        while perf_counter() - start < seconds:
+            opponent.memo.clear()
+            tick = 0
+            shot = None
+            while shot is None:
+                begin = perf_counter()
+                shot = opponent.think(*winds[count % decisions])
+                worst = max(worst, perf_counter() - begin)
+                tick += 1
+            ticks = max(ticks, tick)
+            count += 1
+        cold = count / (perf_counter() - start)
+
+        # Warm: the memo already holds every bin
+        for wind in winds:
+            opponent.choose(*wind)
+        count = 0
+        start = perf_counter()
+        while perf_counter() - start < seconds:
+            opponent.choose(*winds[count % decisions])
+            count += 1
+        warm = count / (perf_counter() - start)
+
+        # How well the chosen shots score in the real, unquantized wind
+        points = sum(simulate_shot(*opponent.choose(*wind), *wind, True,
+                                   geometry, record=False).points
+                     for wind in winds) / decisions
+        print('{0:<8}{1:>12.1f}{2:>8}{3:>12.2f}{4:>14.0f}{5:>10.1f}'
+              .format(name, cold, ticks, 1000 * worst, warm, points))
+
+
+if __name__ == '__main__':
+    benchmark(float(sys.argv[1]) if len(sys.argv) > 1 else 1.0)
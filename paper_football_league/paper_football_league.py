@@ -4,19 +4,42 @@
 # August 9, 2019
 
 import pygame as pg
-import sys, os
+import argparse, sys, os
 from math import *
 from random import *
 from pygame.locals import *
+from physics import WINWIDTH, WINHEIGHT, make_geometry
+from textcache import TextCache
+from assets import split_atlas
+from loader import AssetLoader
+from profiler import Profiler
+from recording import Recorder
+from opponent import Opponent, LEVELS
+from shottable import TABLEPATH, open_table
+from history import HistoryStore, HISTORYPATH
+from audio import open_audio
+from state import GameState, GoalGeometry, TIMERSTEP, AIMTICKS
+from display import Display, fit_scale, parse_size
+from banners import slide, flash, drop
+from surfacecache import SurfaceCache
+from netplay import NetPlay, PORT
+from time import perf_counter
 
 # Main Constants
-WINWIDTH = 1200
-WINHEIGHT = 660
 HALFWIDTH = WINWIDTH // 2
 HALFHEIGHT = WINHEIGHT // 2
 QUARTERWIDTH = HALFWIDTH // 2
 QUARTERHEIGHT = HALFHEIGHT // 2
 FPS = 30
+TICK = 1 / 30 # Seconds of game time per update
+MAXFRAMETIME = .25 # Longest frame the game will catch up on
+PROFILEKEY = K_F3 # Shows or hides the frame profiler
+PROFILERPOS = (HALFWIDTH - 124, 30) # Top left of the profiler overlay
+MAXCATCHUP = 8 # Most ticks a frame plays catching up with a network match
+IDLEWAIT = 1000 # Longest a menu screen sleeps waiting for an event, in ms
+# Events that can change what a menu screen shows, or need it shown again
+REDRAWEVENTS = (MOUSEBUTTONUP, KEYUP, WINDOWEXPOSED, WINDOWRESTORED,
+                VIDEOEXPOSE)
 RADIORADIUS = 20
 DOTRADIUS = 16
 
@@ -42,95 +65,117 @@ WINDCOLOR = BLUE
 MENUCOLOR = BROWN
 MENUTEXTCOLOR = STRAW
 
+# Banner messages: font, text, color, how it moves and the sound it starts
+# with.  Message 9 is the help over the ball, which is not a banner.
+MESSAGES = {1: ('titleOne', 'Ready...', TITLEONECOLOR, slide, 'ready'),
+            2: ('titleOne', 'GO!', TITLEONECOLOR, flash, 'go'),
+            3: ('titleTwo', 'Player One got a high score!', TITLETWOCOLOR,
+                drop, 'cheer'),
+            4: ('titleTwo', 'Player Two got a high score!', TITLETWOCOLOR,
+                drop, 'cheer'),
+            5: ('titleTwo', 'Player One wins!', TITLETWOCOLOR, drop, 'horn'),
+            6: ('titleTwo', 'Player Two wins!', TITLETWOCOLOR, drop, 'horn'),
+            7: ('titleTwo', 'Tie with high score!', TITLETWOCOLOR, drop,
+                'cheer'),
+            8: ('titleTwo', 'Tie game!', TITLETWOCOLOR, drop, 'horn'),
+            10: ('titleOne', 'Player One', TITLEONECOLOR, flash, None),
+            11: ('titleOne', 'Player Two', TITLEONECOLOR, flash, None),
+            12: ('titleTwo', 'High Score!', TITLETWOCOLOR, drop, 'cheer'),
+            13: ('titleTwo', 'Game Over', TITLETWOCOLOR, drop, 'horn')}
+
 # Physics Constants
 WINDRADIUS = 20
 WINDARROW = (int(WINWIDTH - 1.25 * WINDRADIUS), WINHEIGHT - WINDRADIUS)
 WINDARROW2 = (int(1.25 * WINDRADIUS), WINHEIGHT - WINDRADIUS)
-GRAVITY = 9.8
-FRICTION = 0.5
 
 # Initialization function
-def initialize():
-
-    global DISPLAYSURF, VARIABLEDICT, IMGDICT, FONTDICT, RECTDICT, FPSCLOCK
+def initialize(startupReport=False, profile=False, recorder=None,
+               difficulty='normal', historyPath=None, window=None,
+               fullscreen=False, network=None, shotTable=True):
+
+    global DISPLAYSURF, STATE, IMGDICT, FONTDICT, RECTDICT, FPSCLOCK
+    global SCREENDICT, TEXTCACHE, LOADER, PROFILER, RECORDER, OPPONENT
+    global HISTORY, AUDIO, DISPLAY, CACHE, BANNERDICT, NET
+    startTime = perf_counter()
     
     # Initialize pygame and declare fonts
     pg.init()
-    pg.mixer.init() # Initialize sounds
-    DISPLAYSURF = pg.display.set_mode((WINWIDTH, WINHEIGHT))
+    AUDIO = open_audio() # Sound channels, or silence without a device
+    # Everything is drawn to a WINWIDTH x WINHEIGHT canvas, scaled to the
+    # window when it is shown
+    DISPLAY = Display(window, fullscreen)
+    DISPLAYSURF = DISPLAY.canvas
     pg.display.set_caption("Paper Football League Beta -- Josh Klipstein")
     FPSCLOCK = pg.time.Clock()
+    TEXTCACHE = TextCache() # Reuse HUD text until it changes
+    PROFILER = Profiler(profile, FPS) # Frame phase timings, off unless asked
+
+    # Seed the wind from the recorder, so the session can be replayed
+    RECORDER = recorder
+    if RECORDER is not None:
+        seed(RECORDER.seed)
+
+    # Connection to the other side of a network match, if playing one
+    NET = network
+
+    # Computer plays player two in one-player games, reading its coarse
+    # searches from the shot table if one has been built.  A replay has to
+    # play against the same computer.
+    geometry = make_geometry()
+    OPPONENT = Opponent(difficulty, True, geometry,
+                        table=open_table(TABLEPATH, geometry)
+                        if shotTable else None)
+    if RECORDER is not None:
+        RECORDER.recording.difficulty = difficulty
+        RECORDER.recording.shotTable = OPPONENT.table is not None
+
+    # Finished matches are saved here, if anywhere
+    HISTORY = None if historyPath is None else HistoryStore(historyPath)
+
+    # Images come ready to draw from the cache on disk, or are decoded,
+    # scaled and cached on the first start
+    CACHE = SurfaceCache()
+
+    # Load all images and sound files on a worker thread.  Menu screens
+    # come first so the menu can show while gameplay assets load.
+    LOADER = AssetLoader(startTime, startupReport)
+    LOADER.add('menu', 'menu', CACHE.image, 'images/pfootball.png')
+    LOADER.add('menu', 'intro', AUDIO.load,
+               'sounds/Football_Crowd-GoGo-1730947850.wav')
+    LOADER.add('menu', 'select', AUDIO.load,
+               'sounds/Checkout Scanner Beep-SoundBible.com-593325210.wav')
+    LOADER.add('menu', 'optionShow', CACHE.image, 'images/pfootball2.png')
+    LOADER.add('menu', 'instructShow', CACHE.image,
+               'images/pfootinstruct.png')
+    LOADER.add('game', 'background', CACHE.scaled, 'images/pfootback.tif',
+               (WINWIDTH, WINHEIGHT))
+    LOADER.add('game', 'football', CACHE.atlas, 'images')
+    LOADER.add('game', 'goal', CACHE.image, 'images/gp.png', True)
+    LOADER.add('game', 'goal2', CACHE.image, 'images/gp2.png', True)
+    LOADER.add('game', 'launch', AUDIO.load,
+               'sounds/Woosh-Mark_DiAngelo-4778593.wav')
+    LOADER.add('game', 'ready', AUDIO.load,
+               'sounds/Tires Squealing-SoundBible.com-1814115127.wav')
+    LOADER.add('game', 'go', AUDIO.load,
+               'sounds/starting_pistol-Stephan_Schutze-613594351.wav')
+    LOADER.add('game', 'cheer', AUDIO.load,
+               'sounds/Sports_Crowd-GoGo-2100314571.wav')
+    LOADER.add('game', 'horn', AUDIO.load,
+               'sounds/Air Horn-SoundBible.com-964603082.wav')
+    LOADER.add('game', 'wind', AUDIO.load,
+               'sounds/Windy-SoundBible.com-1165996801.wav')
+    LOADER.add('game', 'score', AUDIO.load,
+               'sounds/Beep Ping-SoundBible.com-217088958.wav')
+    LOADER.add('game', 'bounce', AUDIO.load,
+               'sounds/Ball_Bounce-Popup_Pixels-172648817.wav')
+    LOADER.start()
+
     TITLEFONT = pg.font.SysFont('arialblack', 40)
     DEFAULTFONT = pg.font.SysFont('calibri', 16)
     BUTTONFONT = pg.font.SysFont('impact', 20)
     WINDFONT = pg.font.Font('freesansbold.ttf', 16)
     MENUFONT = pg.font.Font('freesansbold.ttf', 48)
 
-    # Load all images and sound files, but raise exception if folder not in
-    # directory
-    try:
-        MENU = pg.image.load('images/pfootball.png') # Main menu screen
-        OPTIONS = pg.image.load('images/pfootball2.png') # Options screen
-        INSTRUCT = pg.image.load('images/pfootinstruct.png') # Instructions screen
-        BACKGROUND = pg.image.load('images/pfootback.tif') # Game background
-        PAPERFOOTBALLIMG = [] # Football image list
-        for i in range(1, 25):
-            PAPERFOOTBALLIMG.append(pg.image.load('images/pfb{0}.png'.format(i)))
-        GOALIMG = pg.image.load('images/gp.png') # Goal post
-        GOALIMG2 = pg.image.load('images/gp2.png') # Second goal post
-
-        # Load all sounds
-        LAUNCH = pg.mixer.Sound('sounds/Woosh-Mark_DiAngelo-4778593.wav')
-        INTRO = pg.mixer.Sound('sounds/Football_Crowd-GoGo-1730947850.wav')
-        SELECT = pg.mixer.Sound('sounds/Checkout Scanner Beep-SoundBible.com-593325210.wav')
-        READY = pg.mixer.Sound('sounds/Tires Squealing-SoundBible.com-1814115127.wav')
-        GO = pg.mixer.Sound('sounds/starting_pistol-Stephan_Schutze-613594351.wav')
-        CHEER = pg.mixer.Sound('sounds/Sports_Crowd-GoGo-2100314571.wav')
-        HORN = pg.mixer.Sound('sounds/Air Horn-SoundBible.com-964603082.wav')
-        WIND = pg.mixer.Sound('sounds/Windy-SoundBible.com-1165996801.wav')
-        SCORE = pg.mixer.Sound('sounds/Beep Ping-SoundBible.com-217088958.wav')
-        BOUNCE = pg.mixer.Sound('sounds/Ball_Bounce-Popup_Pixels-172648817.wav')
-    except:
-        pg.quit()
-        print("Necessary files not found!")
-        sys.exit()
-        
-    # Initialize all game objects
-    
-    MENURECT = MENU.get_rect()
-    MENURECT.center = (HALFWIDTH, HALFHEIGHT)
-    
-    OPTIONSRECT = OPTIONS.get_rect()
-    OPTIONSRECT.center = (HALFWIDTH, HALFHEIGHT)
-    
-    INSTRUCTRECT = INSTRUCT.get_rect()
-    INSTRUCTRECT.center = (HALFWIDTH, HALFHEIGHT)
-    
-    BACKGROUND = pg.transform.smoothscale(BACKGROUND, (WINWIDTH, WINHEIGHT))
-    BACKGROUNDRECT = BACKGROUND.get_rect()
-    BACKGROUNDRECT.center = (HALFWIDTH, HALFHEIGHT)
-    PAPERFOOTBALL = pg.Rect(0, 0, 120, 120) # Football Rect
-    PAPERFOOTBALL.midbottom = (HALFWIDTH + QUARTERWIDTH,
-                               WINHEIGHT)
-    WINDARROW = (WINWIDTH - WINDRADIUS, WINHEIGHT - WINDRADIUS) # Wind guide
-    
-    GOALPOST = GOALIMG.get_rect()
-    GOALPOST2 = GOALIMG2.get_rect()
-    GOALPOST.midbottom = (QUARTERWIDTH, WINHEIGHT + 50)
-    GOALPOST2.midbottom = (HALFWIDTH + QUARTERWIDTH, WINHEIGHT + 50)
-    GOALAREA = pg.Rect((GOALPOST.left + 133, GOALPOST.top + 50),
-                       (37, 237))
-    GOALAREA2 = pg.Rect((GOALPOST2.right - 170, GOALPOST.top + 50),
-                        (37, 237))
-    POSTAREA = pg.Rect((GOALAREA.left, GOALAREA.bottom),
-                       (33, 333))
-    POSTAREA2 = pg.Rect((GOALPOST.left + 48, POSTAREA.bottom),
-                        (404, 88))
-    POSTAREA3 = pg.Rect((GOALAREA2.left, GOALAREA.bottom),
-                       (33, 333))
-    POSTAREA4 = pg.Rect((GOALPOST2.left + 50, POSTAREA3.bottom),
-                        (404, 88))
-
     # Main menu buttons
     # Play button
     playButton = MENUFONT.render('Play', 1, MENUTEXTCOLOR,
@@ -165,6 +210,13 @@ def initialize():
                                    MENUCOLOR)
     returnRect = returnButton.get_rect()
     returnRect.midtop = (HALFWIDTH, WINHEIGHT - 60)
+
+    # Network lobby message
+    waiting = BUTTONFONT.render('Waiting for the other player...  '
+                                'Click to go back', 1, BUTTONTEXTCOLOR,
+                                BUTTONCOLOR)
+    waitingRect = waiting.get_rect()
+    waitingRect.center = (HALFWIDTH, WINHEIGHT // 6)
     
     # End game buttons
     # Quit
@@ -256,45 +308,18 @@ def initialize():
     soundOffRect.midtop = (soundOnRect.centerx,
                            soundOnRect.bottom + 100)
 
-    # Initialize variable dictionary
-    VARIABLEDICT = {'mousePos': (0, 0),
-                    'draggingArrow': False,
-                    'power': 50,
-                    'launchAngle': 0,
-                    'scoreOne': 0,
-                    'scoreTwo': 0,
-                    'hiScore': 0,
-                    'gameTime': 60,
-                    'timer': 0,
-                    'windSpeed': 0,
-                    'windAngle': 0,
-                    'ballSpeed': 0,
-                    'message': 0,
-                    'rotation': 6,
-                    'radius': 60,
-                    'gameOver': False,
-                    'showHelp': True,
-                    'menu': True,
-                    'options': False,
-                    'instruct': False,
-                    'players': 1,
-                    'player': False,
-                    'sound': True,
-                    'start': True}
+    # Game state: options, menu screens, the match, the ball and, once the
+    # goal post images are in, its geometry
+    PAPERFOOTBALL = pg.Rect(0, 0, 120, 120) # Football Rect
+    PAPERFOOTBALL.midbottom = (HALFWIDTH + QUARTERWIDTH, WINHEIGHT)
+    STATE = GameState(PAPERFOOTBALL)
+
+    # Hi-score carries over from earlier sessions
+    if HISTORY is not None:
+        STATE.match.hiScore = HISTORY.high_score()
 
     # Initialize Rect dictionary
-    RECTDICT = {'football': PAPERFOOTBALL,
-                'goal': GOALPOST,
-                'goal2': GOALPOST2,
-                'goalArea': GOALAREA,
-                'goalAreaTwo': GOALAREA2,
-                'brickAreaOne': POSTAREA,
-                'brickAreaTwo': POSTAREA2,
-                'brickAreaThree': POSTAREA3,
-                'brickAreaFour': POSTAREA4,
-                'background': BACKGROUNDRECT,
-                'menu': MENURECT,
-                'message': (0, 0, 0, 0),
+    RECTDICT = {'message': (0, 0, 0, 0),
                 'quit': quitButtonRect,
                 'restart': restartButtonRect,
                 'menuReturn': menuButtonRect,
@@ -303,8 +328,7 @@ def initialize():
                 'options': optionsButtonRect,
                 'instruct': instructButtonRect,
                 'return': returnRect,
-                'optionShow': OPTIONSRECT,
-                'instructShow': INSTRUCTRECT,
+                'waiting': waitingRect,
                 'sound': soundLabelRect,
                 'soundOn': soundOnRect,
                 'soundOff': soundOffRect,
@@ -317,12 +341,7 @@ def initialize():
                 'twoPlayers': twoPlayersRect}
 
     # Initialize image dictionary
-    IMGDICT = {'football': PAPERFOOTBALLIMG,
-               'goal': GOALIMG,
-               'goal2': GOALIMG2,
-               'background': BACKGROUND,
-               'menu': MENU,
-               'message': DEFAULTFONT.render("", 1, DEFAULTFONTCOLOR),
+    IMGDICT = {'message': DEFAULTFONT.render("", 1, DEFAULTFONTCOLOR),
                'quit': quitButton,
                'restart': restartButton,
                'menuReturn': menuButton,
@@ -331,8 +350,7 @@ def initialize():
                'instruct': instructButton,
                'quit2': quitButton2,
                'return': returnButton,
-               'optionShow': OPTIONS,
-               'instructShow': INSTRUCT,
+               'waiting': waiting,
                 'sound': soundLabel,
                 'soundOn': soundOn,
                 'soundOff': soundOff,
@@ -344,6 +362,11 @@ def initialize():
                 'onePlayer': onePlayer,
                 'twoPlayers': twoPlayers}
 
+    # Convert rendered button text to the display format as well
+    for key in IMGDICT:
+        if key != 'message':
+            IMGDICT[key] = IMGDICT[key].convert()
+
     # Initialize font dictionary
     FONTDICT = {'default': DEFAULTFONT,
                 'titleOne': TITLEFONT,
@@ -352,352 +375,735 @@ def initialize():
                 'wind': WINDFONT,
                 'menu': MENUFONT}
 
-    # Sound dictionary
-    SOUNDDICT = {'launch': LAUNCH,
-                 'intro': INTRO,
-                 'select': SELECT,
-                 'ready': READY,
-                 'go': GO,
-                 'horn': HORN,
-                 'cheer': CHEER,
-                 'wind': WIND,
-                 'score': SCORE,
-                 'bounce': BOUNCE}
+    # Banner dictionary, every message rendered once and ready to move
+    BANNERDICT = {}
+    for number, (font, text, color, motion, sound) in MESSAGES.items():
+        image = FONTDICT[font].render(text, 1, color).convert_alpha()
+        BANNERDICT[number] = motion(image)
+    IMGDICT['help'] = DEFAULTFONT.render(
+        'Click and drag arrow to launch ball', 1,
+        DEFAULTBACKCOLOR).convert_alpha()
+
+    # Screen dictionary, remembering what the game scene drew last frame so
+    # only the parts that change need to be redrawn
+    SCREENDICT = {'full': True,
+                  'layers': {},
+                  'arrow': None,
+                  'wind': None,
+                  'menuScreen': None}
+
+    # Sound dictionary, filled in as the loader finishes
+    SOUNDDICT = {}
+
+    # Menu screens are needed before anything can be drawn
+    MENUASSETS = wait_for_assets('menu')
+    for key in ('menu', 'optionShow', 'instructShow'):
+        IMGDICT[key] = MENUASSETS[key]
+        RECTDICT[key] = IMGDICT[key].get_rect()
+        RECTDICT[key].center = (HALFWIDTH, HALFHEIGHT)
+    for key in ('intro', 'select'):
+        SOUNDDICT[key] = AUDIO.wrap(key, MENUASSETS[key])
 
     # Go to menu function
-    menu(VARIABLEDICT, RECTDICT, IMGDICT, FONTDICT, SOUNDDICT)
+    try:
+        run_scenes(STATE, RECTDICT, IMGDICT, FONTDICT, SOUNDDICT)
+    finally:
+        PROFILER.print_summary(caches={'HUD text': TEXTCACHE.stats()})
+        if RECORDER is not None:
+            RECORDER.score(STATE.match.scoreOne, STATE.match.scoreTwo)
+            RECORDER.save()
+        if HISTORY is not None:
+            HISTORY.close() # Waits for the last matches to be saved
+        if NET is not None:
+            NET.close() # Tells the other side this one has gone
+
+# Wait for a group of assets from the loader, but quit if files are not in
+# directory
+def wait_for_assets(group):
+    try:
+        return LOADER.wait(group)
+    except Exception:
+        pg.quit()
+        print("Necessary files not found!")
+        sys.exit()
+
+# Set up gameplay images, sounds and goal post geometry once they are loaded
+def load_game(STATE, RECTDICT, IMGDICT, SOUNDDICT):
+    if 'football' in IMGDICT:
+        return # Already loaded
+    GAMEASSETS = wait_for_assets('game')
+
+    BACKGROUND = GAMEASSETS['background']
+    BACKGROUNDRECT = BACKGROUND.get_rect()
+    BACKGROUNDRECT.center = (HALFWIDTH, HALFHEIGHT)
+    # Football image list, subsurfaces of one atlas surface
+    PAPERFOOTBALLIMG = split_atlas(GAMEASSETS['football'])
+    GOALIMG = GAMEASSETS['goal'] # Goal post
+    GOALIMG2 = GAMEASSETS['goal2'] # Second goal post
+
+    # Goal post geometry is shared with the headless physics module
+    GEOMETRY = make_geometry(GOALIMG.get_size(), GOALIMG2.get_size())
+    STATE.goals = GoalGeometry({key: pg.Rect(GEOMETRY[key])
+                                for key in GEOMETRY})
+    RECTDICT['background'] = BACKGROUNDRECT
+
+    IMGDICT['football'] = PAPERFOOTBALLIMG
+    IMGDICT['goal'] = GOALIMG
+    IMGDICT['goal2'] = GOALIMG2
+    IMGDICT['background'] = BACKGROUND
+
+    for key in ('launch', 'ready', 'go', 'cheer', 'horn', 'wind', 'score',
+                'bounce'):
+        SOUNDDICT[key] = AUDIO.wrap(key, GAMEASSETS[key])
+    if LOADER.report:
+        print('Resident sound memory: {0:.0f} KB'.format(
+            AUDIO.resident_bytes() / 1024))
+        print('Image cache: {hits} hits, {misses} misses'.format(
+            **CACHE.stats))
+    return
+
+# Scene loop.  Every screen is a scene function that runs until it returns
+# the name of the next scene, so nothing is left on the stack between games.
+def run_scenes(STATE, RECTDICT, IMGDICT, FONTDICT, SOUNDDICT):
+    SCENES = {'menu': menu,
+              'options': options,
+              'instructions': instructions,
+              'lobby': lobby,
+              'game': run_game,
+              'gameOver': game_over}
+    scene = 'menu'
+    while True:
+        scene = SCENES[scene](STATE, RECTDICT, IMGDICT, FONTDICT,
+                              SOUNDDICT)
+
+# Get waiting events, with mouse positions on the canvas, toggling the
+# profiler if its key was pressed and passing them to the recorder along
+# with the frame time.  When idle and nothing is waiting, sleep until an
+# event comes in, or at most IDLEWAIT ms.
+def get_events(idle=False):
+    with PROFILER.phase('events'):
+        events = pg.event.get()
+        if idle and not events:
+            event = pg.event.wait(IDLEWAIT)
+            if event.type != NOEVENT:
+                events = [event] + pg.event.get()
+        events = DISPLAY.map_events(events)
+    if RECORDER is not None:
+        RECORDER.frame(events, FPSCLOCK.get_time())
+    for event in events:
+        if event.type == KEYUP and event.key == PROFILEKEY:
+            PROFILER.toggle()
+    return events
 
 # Menu function
-def menu(VARIABLEDICT, RECTDICT, IMGDICT, FONTDICT, SOUNDDICT):
-    if VARIABLEDICT['start']:
+def menu(STATE, RECTDICT, IMGDICT, FONTDICT, SOUNDDICT):
+    scene = STATE.scene
+    scene.menu = True # Main menu is showing
+    if scene.start:
         SOUNDDICT['intro'].play() # Play intro sound if first time playing
-    VARIABLEDICT['start'] = False
-
-    # Show menu
+        redraw_window(STATE, RECTDICT, IMGDICT)
+        LOADER.mark('first menu frame')
+        if LOADER.report:
+            LOADER.print_report()
+    scene.start = False
+
+    # Show menu.  It only needs drawing again after a click or when the
+    # window is uncovered, so in between the loop sleeps on the events
+    # instead of drawing the same frame 30 times a second.
+    redraw = True
     while True:
-        redraw_window(VARIABLEDICT, RECTDICT, IMGDICT)
+        if redraw or PROFILER.enabled:
+            redraw_window(STATE, RECTDICT, IMGDICT)
+        events = get_events(not PROFILER.enabled)
+        redraw = changes_screen(events)
 
         # Event Check
-        for event in pg.event.get():
+        for event in events:
             if event.type == QUIT or event.type == KEYUP and event.key == K_ESCAPE:
                 # Player quits
                 pg.quit()
                 sys.exit()
             if event.type == MOUSEMOTION:
-                VARIABLEDICT['mousePos'] = event.pos
+                STATE.match.mousePos = event.pos
             if event.type == MOUSEBUTTONUP:
-                if VARIABLEDICT['sound']:
+                if STATE.config.sound:
                     SOUNDDICT['select'].play() # Play select sound
                 # Check which button was clicked
-                if RECTDICT['play'].collidepoint(VARIABLEDICT['mousePos']):
+                if RECTDICT['play'].collidepoint(STATE.match.mousePos):
                     # Play button
-                    VARIABLEDICT['menu'] = False # Main menu is not showing
-                    run_game(VARIABLEDICT, FONTDICT, IMGDICT, RECTDICT, SOUNDDICT)
-                elif RECTDICT['options'].collidepoint(VARIABLEDICT['mousePos']):
+                    scene.menu = False # Main menu is not showing
+                    if NET is not None:
+                        # Network match, wait for the other side
+                        return 'lobby'
+                    load_game(STATE, RECTDICT, IMGDICT, SOUNDDICT)
+                    return 'game'
+                elif RECTDICT['options'].collidepoint(STATE.match.mousePos):
                     # Options button
-                    VARIABLEDICT['menu'] = False
-                    VARIABLEDICT['options'] = True # Options screen is showing
-                    options(VARIABLEDICT, RECTDICT, IMGDICT, SOUNDDICT)
-                    VARIABLEDICT['options'] = False # Options screen is not showing
-                    VARIABLEDICT['menu'] = True
-                elif RECTDICT['instruct'].collidepoint(VARIABLEDICT['mousePos']):
+                    scene.menu = False
+                    return 'options'
+                elif RECTDICT['instruct'].collidepoint(STATE.match.mousePos):
                     # Instructions button
-                    VARIABLEDICT['menu'] = False
-                    VARIABLEDICT['instruct'] = True # Instructions are showing
-                    instructions(VARIABLEDICT, RECTDICT, IMGDICT, SOUNDDICT)
-                    VARIABLEDICT['instruct'] = False # Main menu showing again
-                    VARIABLEDICT['menu'] = True
-                elif RECTDICT['quit2'].collidepoint(VARIABLEDICT['mousePos']):
+                    scene.menu = False
+                    return 'instructions'
+                elif RECTDICT['quit2'].collidepoint(STATE.match.mousePos):
                     # Quit button
                     pg.quit()
                     sys.exit()
 
-def options(VARIABLEDICT, RECTDICT, IMGDICT, SOUNDDICT):
+def options(STATE, RECTDICT, IMGDICT, FONTDICT, SOUNDDICT):
+    scene = STATE.scene
+    config = STATE.config
+    scene.options = True # Options screen is showing
 
-    # Show options
+    # Show options, drawing them again only when a click may have changed
+    # them
+    redraw = True
     while True:
-        redraw_window(VARIABLEDICT, RECTDICT, IMGDICT)
+        if redraw or PROFILER.enabled:
+            redraw_window(STATE, RECTDICT, IMGDICT)
+        events = get_events(not PROFILER.enabled)
+        redraw = changes_screen(events)
 
-        for event in pg.event.get():
+        for event in events:
             if event.type == QUIT or event.type == KEYUP and event.key == K_ESCAPE:
                 # Player quits
                 pg.quit()
                 sys.exit()
             if event.type == MOUSEMOTION:
-                VARIABLEDICT['mousePos'] = event.pos
+                STATE.match.mousePos = event.pos
             if event.type == MOUSEBUTTONUP:
-                if VARIABLEDICT['sound']:
+                if config.sound:
                     SOUNDDICT['select'].play()
-                if RECTDICT['return'].collidepoint(VARIABLEDICT['mousePos']):
-                    return
-                elif RECTDICT['onePlayer'].collidepoint(VARIABLEDICT['mousePos']):
-                    VARIABLEDICT['players'] = 1
-                    VARIABLEDICT['player'] = False
-                elif RECTDICT['twoPlayers'].collidepoint(VARIABLEDICT['mousePos']):
-                    VARIABLEDICT['players'] = 2
-                    VARIABLEDICT['player'] = False
-                elif RECTDICT['oneMin'].collidepoint(VARIABLEDICT['mousePos']):
-                    VARIABLEDICT['gameTime'] = 60
-                elif RECTDICT['threeMin'].collidepoint(VARIABLEDICT['mousePos']):
-                    VARIABLEDICT['gameTime'] = 180
-                elif RECTDICT['fiveMin'].collidepoint(VARIABLEDICT['mousePos']):
-                    VARIABLEDICT['gameTime'] = 300
-                elif RECTDICT['soundOn'].collidepoint(VARIABLEDICT['mousePos']):
-                    VARIABLEDICT['sound'] = True
-                elif RECTDICT['soundOff'].collidepoint(VARIABLEDICT['mousePos']):
-                    VARIABLEDICT['sound'] = False
+                if RECTDICT['return'].collidepoint(STATE.match.mousePos):
+                    scene.options = False # Options screen is not showing
+                    return 'menu'
+                elif RECTDICT['onePlayer'].collidepoint(STATE.match.mousePos):
+                    config.players = 1
+                    STATE.match.player = False
+                elif RECTDICT['twoPlayers'].collidepoint(STATE.match.mousePos):
+                    config.players = 2
+                    STATE.match.player = False
+                elif RECTDICT['oneMin'].collidepoint(STATE.match.mousePos):
+                    config.gameTime = 60
+                elif RECTDICT['threeMin'].collidepoint(STATE.match.mousePos):
+                    config.gameTime = 180
+                elif RECTDICT['fiveMin'].collidepoint(STATE.match.mousePos):
+                    config.gameTime = 300
+                elif RECTDICT['soundOn'].collidepoint(STATE.match.mousePos):
+                    config.sound = True
+                elif RECTDICT['soundOff'].collidepoint(STATE.match.mousePos):
+                    config.sound = False
                     
-def instructions(VARIABLEDICT, RECTDICT, IMGDICT, SOUNDDICT):
+def instructions(STATE, RECTDICT, IMGDICT, FONTDICT, SOUNDDICT):
+    STATE.scene.instruct = True # Instructions are showing
 
     # Show instructions  
+    redraw = True
     while True:
-        redraw_window(VARIABLEDICT, RECTDICT, IMGDICT)
+        if redraw or PROFILER.enabled:
+            redraw_window(STATE, RECTDICT, IMGDICT)
+        events = get_events(not PROFILER.enabled)
+        redraw = changes_screen(events)
 
-        for event in pg.event.get():
+        for event in events:
             if event.type == QUIT or event.type == KEYUP and event.key == K_ESCAPE:
                 # Player quits
                 pg.quit()
                 sys.exit()
             if event.type == MOUSEMOTION:
-                VARIABLEDICT['mousePos'] = event.pos
+                STATE.match.mousePos = event.pos
             if event.type == MOUSEBUTTONUP:
-                if VARIABLEDICT['sound']:
+                if STATE.config.sound:
                     SOUNDDICT['select'].play()
-                if RECTDICT['return'].collidepoint(VARIABLEDICT['mousePos']):
-                    return
-
-# Game function
-def run_game(VARIABLEDICT, FONTDICT, IMGDICT, RECTDICT, SOUNDDICT):
-    pg.mixer.pause() # Stop previous sounds when game starts
+                if RECTDICT['return'].collidepoint(STATE.match.mousePos):
+                    STATE.scene.instruct = False # Main menu showing again
+                    return 'menu'
+
+# Network lobby, waiting for the other side of a network match.  The host
+# starts the match as soon as someone has joined, picking the wind seed and
+# the time per half; the side that joined plays whatever the host started.
+# A click goes back to the menu.
+def lobby(STATE, RECTDICT, IMGDICT, FONTDICT, SOUNDDICT):
+    scene = STATE.scene
+    scene.lobby = True # Lobby is showing over the main menu
+
+    redraw = True
+    while True:
+        start = NET.start_match(STATE.config.gameTime)
+        if start is not None:
+            # Same seed on both sides, so both get the same wind
+            matchSeed, STATE.config.gameTime = start
+            seed(matchSeed)
+            STATE.config.players = 2
+            scene.lobby = False
+            load_game(STATE, RECTDICT, IMGDICT, SOUNDDICT)
+            return 'game'
+
+        if redraw or PROFILER.enabled:
+            redraw_window(STATE, RECTDICT, IMGDICT)
+        # The network wakes this up when the other side gets going
+        events = get_events(not PROFILER.enabled)
+        redraw = changes_screen(events)
+
+        for event in events:
+            if event.type == QUIT or event.type == KEYUP and event.key == K_ESCAPE:
+                # Player quits
+                pg.quit()
+                sys.exit()
+            if event.type == MOUSEBUTTONUP:
+                if STATE.config.sound:
+                    SOUNDDICT['select'].play()
+                scene.lobby = False
+                return 'menu'
+
+# Whether any of the events can change a menu screen or need it shown again
+def changes_screen(events):
+    for event in events:
+        if event.type in REDRAWEVENTS:
+            return True
+    return False
+
+# Game function, playing one player's turn
+def run_game(STATE, RECTDICT, IMGDICT, FONTDICT, SOUNDDICT):
+    match = STATE.match
+    ball = STATE.ball
+    AUDIO.stop() # Stop previous sounds when game starts
 
     # Set game time
-    VARIABLEDICT['timer'] = VARIABLEDICT['gameTime']
+    match.timer = STATE.config.gameTime
 
     # Set graphics according to player settings
-    if not VARIABLEDICT['player']:
-        # Greet player one at start
-        VARIABLEDICT['message'] = 10
-        write_message(VARIABLEDICT, FONTDICT, RECTDICT, IMGDICT)
-        
-        RECTDICT['football'].midbottom = (HALFWIDTH + QUARTERWIDTH,
-                                          WINHEIGHT)
-        VARIABLEDICT['rotation'] = 6
-        RECTDICT['goal'].midbottom = (QUARTERWIDTH, WINHEIGHT + 50)
+    if not match.player:
+        match.shotLog = [] # New match
+        match.ticks = 0
+        greeting = 10 # Greet player one at start
+        ball.rect.midbottom = (HALFWIDTH + QUARTERWIDTH, WINHEIGHT)
+        ball.rotation = 6
+        STATE.goals.goal.midbottom = (QUARTERWIDTH, WINHEIGHT + 50)
     else:
-        # Greet Player Two at start
-        VARIABLEDICT['message'] = 11
-        write_message(VARIABLEDICT, FONTDICT, RECTDICT, IMGDICT)
-        
-        RECTDICT['football'].midbottom = (QUARTERWIDTH,
-                                          WINHEIGHT)
-        VARIABLEDICT['rotation'] = 18
-        RECTDICT['goal2'].midbottom = (HALFWIDTH + QUARTERWIDTH,
+        greeting = 11 # Greet Player Two at start
+        ball.rect.midbottom = (QUARTERWIDTH, WINHEIGHT)
+        ball.rotation = 18
+        STATE.goals.goal2.midbottom = (HALFWIDTH + QUARTERWIDTH,
                                       WINHEIGHT + 50)
-    
-    # Call writing messages function to tell player to get ready
-    if VARIABLEDICT['sound']:
-        SOUNDDICT['ready'].play() # Play ready sound
-    VARIABLEDICT['message'] = 1
-    write_message(VARIABLEDICT, FONTDICT, RECTDICT, IMGDICT)
-
-    # Tell player to start playing
-    if VARIABLEDICT['sound']:
-        SOUNDDICT['go'].play() # Play go sound
-    VARIABLEDICT['message'] = 2
-    write_message(VARIABLEDICT, FONTDICT, RECTDICT, IMGDICT)
 
-    # Main loop
-    while not VARIABLEDICT['gameOver']:
+    # Greet the player, then tell them to get ready and start playing
+    show_banners(STATE, RECTDICT, IMGDICT, SOUNDDICT, [greeting, 1, 2])
+
+    # Main loop.  Game time, wind and the ball in flight move in fixed ticks
+    # that are caught up with whatever time the last frame took, so a slow
+    # frame never changes the game, it only skips a picture.  The clock
+    # starts once the banners are done, and a click skips them.  In a
+    # network match the side whose player is not shooting follows the
+    # ticks of the side that is.
+    ball.shot = None
+    computer = match.player and STATE.config.players == 1
+    remote = NET is not None and match.player != NET.player
+    accumulator = 0.0
+    FPSCLOCK.tick()
+    while not match.gameOver:
+        starting = banners_playing(match)
 
         # Event Check
-        for event in pg.event.get():
+        for event in get_events():
             if event.type == QUIT or event.type == KEYUP and event.key == K_ESCAPE:
                 # Player quits
                 pg.quit()
                 sys.exit()
+            if starting:
+                # Banners are up, a click skips them
+                if event.type == MOUSEBUTTONDOWN:
+                    skip_banners(STATE, RECTDICT)
+                elif event.type == MOUSEMOTION and not computer:
+                    match.mousePos = event.pos
+                continue
+            if computer or remote:
+                # Computer or the other side is taking this turn
+                continue
             if event.type == MOUSEMOTION:
-                VARIABLEDICT['mousePos'] = event.pos
+                match.mousePos = event.pos
             if event.type == MOUSEBUTTONDOWN:
-                if RECTDICT['football'].collidepoint((VARIABLEDICT['mousePos']))\
-                     and not VARIABLEDICT['draggingArrow']:
+                if ball.rect.collidepoint((match.mousePos))\
+                     and not match.draggingArrow\
+                     and ball.shot is None:
                     # Player clicked ball
-                    VARIABLEDICT['draggingArrow'] = True
-                    VARIABLEDICT['showHelp'] = False
-            elif event.type == MOUSEMOTION and VARIABLEDICT['draggingArrow']:
+                    match.draggingArrow = True
+                    match.showHelp = False
+            elif event.type == MOUSEMOTION and match.draggingArrow:
                     # Player is dragging arrow
-                    VARIABLEDICT['mousePos'] = event.pos
-                    VARIABLEDICT['power'], VARIABLEDICT['launchAngle'] = power_gague(VARIABLEDICT, RECTDICT)
-                    draw_arrow(VARIABLEDICT, RECTDICT, FONTDICT)
-            elif event.type == MOUSEBUTTONUP and VARIABLEDICT['draggingArrow']:
+                    match.mousePos = event.pos
+                    match.power, match.launchAngle = power_gague(STATE)
+            elif event.type == MOUSEBUTTONUP and match.draggingArrow:
                 # Ball is launched
-                VARIABLEDICT['draggingArrow'] = False
-                if VARIABLEDICT['sound']:
+                match.draggingArrow = False
+                if STATE.config.sound:
                     SOUNDDICT['launch'].play() # Play launch sound
-                launch_ball(VARIABLEDICT, RECTDICT, IMGDICT, SOUNDDICT)
-                VARIABLEDICT['power'] = 50
-                VARIABLEDICT['launchAngle'] = 0
+                launch_ball(STATE)
+                if NET is not None:
+                    # Other side takes the same shot after the same tick
+                    NET.send_shot(match.ticks, match.power, match.launchAngle)
+                match.power = 50
+                match.launchAngle = 0
+
+        frameTime = min(FPSCLOCK.get_time(), 1000 * MAXFRAMETIME)
+        if starting:
+            advance_banners(STATE, RECTDICT, IMGDICT, SOUNDDICT, frameTime)
+            redraw_window(STATE, RECTDICT, IMGDICT)
+            continue
+
+        # Run every tick that is due
+        newTurn = False
+        with PROFILER.phase('physics'):
+            if remote:
+                newTurn = follow_remote(STATE, SOUNDDICT)
+            else:
+                accumulator += frameTime / 1000
+                while accumulator >= TICK and not match.gameOver:
+                    accumulator -= TICK
+                    match.ticks += 1
+                    if update_game(STATE, SOUNDDICT):
+                        newTurn = True
+                        break
+                if NET is not None:
+                    NET.send_ticks(match.ticks)
+        if newTurn:
+            # Player two's turn
+            ball.shot = None
+            return 'game'
+        if remote and NET.left and match.ticks >= NET.horizon:
+            # The other side left with no more ticks to follow
+            print('The other player left the match', file=sys.stderr)
+            clear_match(match)
+            AUDIO.stop()
+            return 'menu'
 
         # Show instructions to play for first time in game
-        if VARIABLEDICT['showHelp'] and not VARIABLEDICT['player']:
-            VARIABLEDICT['message'] = 9
-            write_message(VARIABLEDICT, FONTDICT, RECTDICT, IMGDICT)
+        if match.showHelp and not match.player and not remote:
+            show_help(STATE, RECTDICT, IMGDICT)
         else:
-            VARIABLEDICT['message'] = 0
-
-        # Randomize wind speed and angle
-        if randint(1, 100) == 50:
-            VARIABLEDICT['windAngle'] = random() * 2 * pi
-            VARIABLEDICT['windSpeed'] = random() * 100
-            if VARIABLEDICT['sound']:
-                SOUNDDICT['wind'].play(0, 3000) # Play wind sound for a few seconds
-
-
-        VARIABLEDICT['timer'] -= .05 # decrease time as you go
-                
-        # Check if time runs out
-        if VARIABLEDICT['timer'] < 0:
-            VARIABLEDICT['timer'] = 0
-            if VARIABLEDICT['player'] or VARIABLEDICT['players'] == 1:
-                # End of player two's game
-                VARIABLEDICT['gameOver'] = True
-            else:
-                # Reset game for player 2
-                VARIABLEDICT['gameOver'] = False
-                VARIABLEDICT['player'] = True
-                VARIABLEDICT['windSpeed'] = 0
-                VARIABLEDICT['windAngle'] = 0
-                VARIABLEDICT['message'] = 0
-                run_game(VARIABLEDICT, FONTDICT, IMGDICT, RECTDICT, SOUNDDICT)
-
-        # Reset center based on settings
-        if not VARIABLEDICT['player']:
-            RECTDICT['football'].midbottom = (HALFWIDTH + QUARTERWIDTH,
-                                              WINHEIGHT)
-            VARIABLEDICT['rotation'] = 6
-            RECTDICT['goal'].midbottom = (QUARTERWIDTH, WINHEIGHT + 50)
+            match.message = 0
+
+        redraw_window(STATE, RECTDICT, IMGDICT) # redraw window
+
+    ball.shot = None
+    return 'gameOver'
+
+# Advance the game by one tick.  Returns True when it is player two's turn.
+def update_game(STATE, SOUNDDICT):
+    match = STATE.match
+    ball = STATE.ball
+
+    # Move the ball if it is in flight
+    if ball.shot is not None:
+        fly_ball(STATE, SOUNDDICT)
+
+    # Randomize wind speed and angle
+    if randint(1, 100) == 50:
+        match.windAngle = random() * 2 * pi
+        match.windSpeed = random() * 100
+        if STATE.config.sound:
+            SOUNDDICT['wind'].play(0, 3000) # Play wind sound for a few seconds
+
+    match.timer -= TIMERSTEP # decrease time as you go
+
+    # Check if time runs out
+    if match.timer < 0:
+        match.timer = 0
+        match.draggingArrow = False
+        if match.player:
+            # End of player two's game
+            match.gameOver = True
+        else:
+            # Reset game for player 2
+            match.gameOver = False
+            match.player = True
+            match.windSpeed = 0
+            match.windAngle = 0
+            match.message = 0
+            return True
+
+    # Reset center based on settings while the ball is not in flight
+    if ball.shot is None:
+        if not match.player:
+            ball.rect.midbottom = (HALFWIDTH + QUARTERWIDTH, WINHEIGHT)
+            ball.rotation = 6
+            STATE.goals.goal.midbottom = (QUARTERWIDTH, WINHEIGHT + 50)
         else:
-            RECTDICT['football'].midbottom = (QUARTERWIDTH,
-                                              WINHEIGHT)
-            VARIABLEDICT['rotation'] = 18
-            RECTDICT['goal2'].midbottom = (HALFWIDTH + QUARTERWIDTH,
+            ball.rect.midbottom = (QUARTERWIDTH, WINHEIGHT)
+            ball.rotation = 18
+            STATE.goals.goal2.midbottom = (HALFWIDTH + QUARTERWIDTH,
                                           WINHEIGHT + 50)
-        redraw_window(VARIABLEDICT, RECTDICT, IMGDICT) # redraw window
-
-    # Call function to write appropriate game over message on screen,
-    # depending on which player wins or if there is a tie
-    if VARIABLEDICT['players'] == 1:
-        # One Player Game
-        if VARIABLEDICT['scoreOne'] > VARIABLEDICT['hiScore']:
-            # Player One got high score
-            if VARIABLEDICT['sound']:
-                SOUNDDICT['cheer'].play() # Play crow cheering sound
-            VARIABLEDICT['message'] = 12
-            write_message(VARIABLEDICT, FONTDICT, RECTDICT, IMGDICT)
-            VARIABLEDICT['hiScore'] = VARIABLEDICT['scoreOne']
+
+    # Computer takes player two's shots in one-player games
+    if match.player and STATE.config.players == 1:
+        computer_turn(STATE, SOUNDDICT)
+    return False
+
+# Follow the other side of a network match: play the ticks it has played,
+# at most MAXCATCHUP a frame, taking its shots after the ticks it took them.
+# Returns True when it is player two's turn.
+def follow_remote(STATE, SOUNDDICT):
+    match = STATE.match
+    NET.poll()
+    for i in range(MAXCATCHUP):
+        if match.gameOver or match.ticks >= NET.horizon:
+            break
+        shot = NET.take_shot(match.ticks)
+        if shot is not None:
+            # Ball is launched
+            match.power, match.launchAngle = shot
+            if STATE.config.sound:
+                SOUNDDICT['launch'].play() # Play launch sound
+            launch_ball(STATE)
+            match.power = 50
+            match.launchAngle = 0
+        match.ticks += 1
+        if update_game(STATE, SOUNDDICT):
+            return True
+    return False
+
+# Aim and take the computer's shot, one tick at a time
+def computer_turn(STATE, SOUNDDICT):
+    match = STATE.match
+    if STATE.ball.shot is not None:
+        return
+
+    if not match.draggingArrow:
+        # Pick a shot for this wind and show the arrow for it.  A wind the
+        # computer has not seen before takes it a few ticks of thinking.
+        shot = OPPONENT.think(match.windSpeed, match.windAngle)
+        if shot is None:
+            return
+        power, angle = shot
+        match.power = power
+        match.launchAngle = angle
+        match.mousePos = (
+            int(STATE.ball.rect.centerx - power * cos(angle)),
+            int(STATE.ball.rect.centery - power * sin(angle)))
+        match.draggingArrow = True
+        match.aimTicks = AIMTICKS
+        return
+
+    match.aimTicks -= 1
+    if match.aimTicks <= 0:
+        # Ball is launched
+        match.draggingArrow = False
+        if STATE.config.sound:
+            SOUNDDICT['launch'].play() # Play launch sound
+        launch_ball(STATE)
+        match.power = 50
+        match.launchAngle = 0
+    return
+
+# Game over function
+def game_over(STATE, RECTDICT, IMGDICT, FONTDICT, SOUNDDICT):
+    match = STATE.match
+    if RECORDER is not None:
+        RECORDER.score(match.scoreOne, match.scoreTwo)
+    if NET is not None:
+        print(NET.summary(), file=sys.stderr)
+    if HISTORY is not None:
+        # Handed to the history writer thread, nothing waits on the disk
+        HISTORY.record_match(STATE.config.gameTime,
+                             [player_info(STATE, False),
+                              player_info(STATE, True)],
+                             match.shotLog)
+
+    # Pick the game over banner, depending on which player wins or if there
+    # is a tie
+    if STATE.config.players == 1:
+        # One Player Game against the computer.  Only player one's score
+        # counts for the high score.
+        if match.scoreOne > match.scoreTwo\
+            and match.scoreOne > match.hiScore:
+            # Player One beats the computer with high score
+            result = 12
+        elif match.scoreOne > match.scoreTwo:
+            # Player One beats the computer
+            result = 5
         else:
-            if VARIABLEDICT['sound']:
-                SOUNDDICT['horn'].play() # Play air horn sound
-            VARIABLEDICT['message'] = 13
-            write_message(VARIABLEDICT, FONTDICT, RECTDICT, IMGDICT)
+            result = 13
+        match.hiScore = max(match.hiScore, match.scoreOne)
     else:
         # Two Player Game
-        if VARIABLEDICT['scoreOne'] > VARIABLEDICT['hiScore']\
-            and VARIABLEDICT['scoreOne'] > VARIABLEDICT['scoreTwo']:
+        if match.scoreOne > match.hiScore\
+            and match.scoreOne > match.scoreTwo:
             # Player One beats Player Two with hi score
-            if VARIABLEDICT['sound']:
-                SOUNDDICT['cheer'].play() 
-            VARIABLEDICT['message'] = 3
-            write_message(VARIABLEDICT, FONTDICT, RECTDICT, IMGDICT)
-            VARIABLEDICT['hiScore'] = VARIABLEDICT['scoreOne']
-        elif VARIABLEDICT['scoreTwo'] > VARIABLEDICT['hiScore']\
-            and VARIABLEDICT['scoreTwo'] > VARIABLEDICT['scoreOne']:
+            result = 3
+            match.hiScore = match.scoreOne
+        elif match.scoreTwo > match.hiScore\
+            and match.scoreTwo > match.scoreOne:
             # Player Two beats Player One with hi score
-            if VARIABLEDICT['sound']:
-                SOUNDDICT['cheer'].play()
-            VARIABLEDICT['message'] = 4
-            write_message(VARIABLEDICT, FONTDICT, RECTDICT, IMGDICT)
-            VARIABLEDICT['hiScore'] = VARIABLEDICT['scoreTwo']
-        elif VARIABLEDICT['scoreOne'] <= VARIABLEDICT['hiScore']\
-            and VARIABLEDICT['scoreOne'] > VARIABLEDICT['scoreTwo']:
+            result = 4
+            match.hiScore = match.scoreTwo
+        elif match.scoreOne <= match.hiScore\
+            and match.scoreOne > match.scoreTwo:
             # Player One beats Player Two
-            if VARIABLEDICT['sound']:
-                SOUNDDICT['horn'].play()
-            VARIABLEDICT['message'] = 5
-            write_message(VARIABLEDICT, FONTDICT, RECTDICT, IMGDICT)
-        elif VARIABLEDICT['scoreTwo'] <= VARIABLEDICT['hiScore']\
-            and VARIABLEDICT['scoreTwo'] > VARIABLEDICT['scoreOne']:
+            result = 5
+        elif match.scoreTwo <= match.hiScore\
+            and match.scoreTwo > match.scoreOne:
             # Player Two beats Player One
-            if VARIABLEDICT['sound']:
-                SOUNDDICT['horn'].play()
-            VARIABLEDICT['message'] = 6
-            write_message(VARIABLEDICT, FONTDICT, RECTDICT, IMGDICT)
-        elif VARIABLEDICT['scoreOne'] > VARIABLEDICT['hiScore']\
-            and VARIABLEDICT['scoreTwo'] > VARIABLEDICT['hiScore']\
-            and VARIABLEDICT['scoreOne'] == VARIABLEDICT['scoreTwo']:
+            result = 6
+        elif match.scoreOne > match.hiScore\
+            and match.scoreTwo > match.hiScore\
+            and match.scoreOne == match.scoreTwo:
             # Both players tie for hi score
-            if VARIABLEDICT['sound']:
-                SOUNDDICT['cheer'].play()
-            VARIABLEDICT['message'] = 7
-            write_message(VARIABLEDICT, FONTDICT, RECTDICT, IMGDICT)
-            VARIABLEDICT['hiScore'] = VARIABLEDICT['scoreOne']
-        elif VARIABLEDICT['scoreOne'] == VARIABLEDICT['scoreTwo']:
+            result = 7
+            match.hiScore = match.scoreOne
+        elif match.scoreOne == match.scoreTwo:
             # Both players tie
-            if VARIABLEDICT['sound']:
-                SOUNDDICT['horn'].play()
-            VARIABLEDICT['message'] = 8
-            write_message(VARIABLEDICT, FONTDICT, RECTDICT, IMGDICT)
+            result = 8
+    show_banners(STATE, RECTDICT, IMGDICT, SOUNDDICT, [result])
+
+    while match.gameOver:
+        # The other side of a network match restarting or leaving takes
+        # this side along
+        button = None
+        if NET is not None:
+            NET.poll()
+            if NET.restarted:
+                NET.restarted = False
+                button = 'restart'
+            elif NET.left:
+                button = 'menuReturn'
 
-    while VARIABLEDICT['gameOver']:
-        
         # Check event loop if player clicks button
-        for event in pg.event.get():
+        for event in get_events():
             if event.type == QUIT or event.type == KEYUP and event.key == K_ESCAPE:
                 pg.quit()
                 sys.exit()
             if event.type == MOUSEMOTION:
-                VARIABLEDICT['mousePos'] = event.pos
-            if event.type == MOUSEBUTTONDOWN:
-                if VARIABLEDICT['sound']:
+                match.mousePos = event.pos
+            if event.type == MOUSEBUTTONDOWN and banners_playing(match):
+                # Click skips the banner dropping in
+                skip_banners(STATE, RECTDICT)
+            elif event.type == MOUSEBUTTONDOWN:
+                if STATE.config.sound:
                     SOUNDDICT['select'].play()
-                if RECTDICT['quit'].collidepoint(VARIABLEDICT['mousePos']):
+                if RECTDICT['quit'].collidepoint(match.mousePos):
                     # Player quits
                     pg.quit()
                     sys.exit()
-                elif RECTDICT['restart'].collidepoint(VARIABLEDICT['mousePos']):
+                elif RECTDICT['restart'].collidepoint(match.mousePos):
                     # Player resets game
-                    VARIABLEDICT['gameOver'] = False
-                    VARIABLEDICT['scoreOne'] = 0
-                    VARIABLEDICT['scoreTwo'] = 0
-                    VARIABLEDICT['windSpeed'] = 0
-                    VARIABLEDICT['windAngle'] = 0
-                    VARIABLEDICT['message'] = 0
-                    VARIABLEDICT['player'] = False
-                    run_game(VARIABLEDICT, FONTDICT, IMGDICT, RECTDICT, SOUNDDICT)
-                elif RECTDICT['menuReturn'].collidepoint(VARIABLEDICT['mousePos']):
+                    button = 'restart'
+                    if NET is not None:
+                        NET.restart()
+                elif RECTDICT['menuReturn'].collidepoint(match.mousePos):
                     # Player goes back to menu
-                    VARIABLEDICT['gameOver'] = False
-                    VARIABLEDICT['scoreOne'] = 0
-                    VARIABLEDICT['scoreTwo'] = 0
-                    VARIABLEDICT['windSpeed'] = 0
-                    VARIABLEDICT['windAngle'] = 0
-                    VARIABLEDICT['message'] = 0
-                    VARIABLEDICT['menu'] = True
-                    pg.mixer.pause() 
-                    menu(VARIABLEDICT, RECTDICT, IMGDICT, FONTDICT, SOUNDDICT)
-                    return
-
-        redraw_window(VARIABLEDICT, RECTDICT, IMGDICT)
+                    button = 'menuReturn'
+                    if NET is not None:
+                        NET.leave()
+
+        if button == 'restart':
+            clear_match(match)
+            return 'game'
+        elif button == 'menuReturn':
+            clear_match(match)
+            AUDIO.stop()
+            return 'menu'
+
+        advance_banners(STATE, RECTDICT, IMGDICT, SOUNDDICT,
+                        min(FPSCLOCK.get_time(), 1000 * MAXFRAMETIME))
+        redraw_window(STATE, RECTDICT, IMGDICT)
+
+# Clear a finished match for the next one, keeping the hi-score
+def clear_match(match):
+    match.gameOver = False
+    match.scoreOne = 0
+    match.scoreTwo = 0
+    match.windSpeed = 0
+    match.windAngle = 0
+    match.message = 0
+    match.messages = []
+    match.player = False
+
+# Name, whether a person played and score of either player, for the history
+def player_info(STATE, player):
+    if not player:
+        return 'Player One', True, STATE.match.scoreOne
+    if STATE.config.players == 1:
+        return ('Computer ({0})'.format(OPPONENT.name), False,
+                STATE.match.scoreTwo)
+    return 'Player Two', True, STATE.match.scoreTwo
 
 # Redraw window
-def redraw_window(VARIABLEDICT, RECTDICT, IMGDICT):
-    if VARIABLEDICT['menu']:
+def redraw_window(STATE, RECTDICT, IMGDICT):
+    scene = STATE.scene
+    match = STATE.match
+    ball = STATE.ball
+    if not (scene.menu or scene.options or scene.instruct or scene.lobby):
+        # Game is showing.  List everything on screen in drawing order as
+        # (name, key, image, rect); the key changes whenever the image does
+        with PROFILER.phase('hud'):
+            windLayer = draw_wind(STATE, FONTDICT)
+            infoLayers = write_info(STATE, FONTDICT)
+        with PROFILER.phase('blits'):
+            layers = [('background', 'background', IMGDICT['background'],
+                       RECTDICT['background']),
+                      windLayer]
+            layers.extend(infoLayers)
+            layers.append(('football', ball.rotation,
+                           IMGDICT['football'][ball.rotation],
+                           ball.rect.copy()))
+            if not match.player:
+                layers.append(('goal', 'goal', IMGDICT['goal'],
+                               STATE.goals.goal))
+            else:
+                layers.append(('goal', 'goal2', IMGDICT['goal2'],
+                               STATE.goals.goal2))
+            if match.message > 0:
+                layers.append(('message', match.message,
+                               IMGDICT['message'],
+                               pg.Rect(RECTDICT['message'])))
+            if match.gameOver:
+                for button in ('quit', 'restart', 'menuReturn'):
+                    layers.append((button, button, IMGDICT[button],
+                                   RECTDICT[button]))
+            if match.draggingArrow:
+                layers.append(draw_arrow(STATE, FONTDICT))
+            if PROFILER.enabled:
+                layers.append(PROFILER.overlay(FONTDICT['default'],
+                                               PROFILERPOS))
+            dirty = draw_layers(layers)
+    else:
+        # Menu screens are drawn in full from their cached picture, and the
+        # game is redrawn in full when it comes back
+        with PROFILER.phase('blits'):
+            DISPLAYSURF.blit(menu_screen(STATE, RECTDICT, IMGDICT), (0, 0))
+            if PROFILER.enabled:
+                name, key, image, rect = PROFILER.overlay(FONTDICT['default'],
+                                                          PROFILERPOS)
+                DISPLAYSURF.blit(image, rect)
+        SCREENDICT['full'] = True
+        dirty = None
+
+    with PROFILER.phase('update'):
+        DISPLAY.present(dirty)
+    with PROFILER.phase('tick'):
+        FPSCLOCK.tick(FPS)
+    PROFILER.end_frame()
+    return
+
+# Picture of the menu screen showing, drawn once and kept until the screen
+# or the options on it change
+def menu_screen(STATE, RECTDICT, IMGDICT):
+    scene = STATE.scene
+    key = (scene.menu, scene.options, scene.instruct, scene.lobby,
+           STATE.config.players, STATE.config.gameTime, STATE.config.sound)
+    cached = SCREENDICT['menuScreen']
+    if cached is not None and cached[0] == key:
+        return cached[1]
+    screen = cached[1] if cached is not None else \
+        pg.Surface((WINWIDTH, WINHEIGHT)).convert()
+    if scene.menu:
         # Main menu is showing
-        DISPLAYSURF.blit(IMGDICT['menu'], RECTDICT['menu'])
-        DISPLAYSURF.blit(IMGDICT['play'], RECTDICT['play'])
-        DISPLAYSURF.blit(IMGDICT['options'], RECTDICT['options'])
-        DISPLAYSURF.blit(IMGDICT['instruct'], RECTDICT['instruct'])
-        DISPLAYSURF.blit(IMGDICT['quit2'], RECTDICT['quit2'])
-    elif VARIABLEDICT['options']:
+        screen.blit(IMGDICT['menu'], RECTDICT['menu'])
+        screen.blit(IMGDICT['play'], RECTDICT['play'])
+        screen.blit(IMGDICT['options'], RECTDICT['options'])
+        screen.blit(IMGDICT['instruct'], RECTDICT['instruct'])
+        screen.blit(IMGDICT['quit2'], RECTDICT['quit2'])
+    elif scene.options:
         # Options is showing
         # Initialize list of centers of Rect objects for radio buttons
         radioList = [(RECTDICT['onePlayer'].left - RADIORADIUS,
@@ -715,215 +1121,184 @@ def redraw_window(VARIABLEDICT, RECTDICT, IMGDICT):
                      (RECTDICT['soundOff'].left - RADIORADIUS,
                       RECTDICT['soundOff'].centery) #sound off button
                      ]
-        DISPLAYSURF.blit(IMGDICT['optionShow'], RECTDICT['optionShow'])
-        DISPLAYSURF.blit(IMGDICT['numPlayers'], RECTDICT['numPlayers'])
-        DISPLAYSURF.blit(IMGDICT['onePlayer'], RECTDICT['onePlayer'])
-        DISPLAYSURF.blit(IMGDICT['twoPlayers'], RECTDICT['twoPlayers'])
-        DISPLAYSURF.blit(IMGDICT['minutes'], RECTDICT['minutes'])
-        DISPLAYSURF.blit(IMGDICT['oneMin'], RECTDICT['oneMin'])
-        DISPLAYSURF.blit(IMGDICT['threeMin'], RECTDICT['threeMin'])
-        DISPLAYSURF.blit(IMGDICT['fiveMin'], RECTDICT['fiveMin'])
-        DISPLAYSURF.blit(IMGDICT['sound'], RECTDICT['sound'])
-        DISPLAYSURF.blit(IMGDICT['soundOn'], RECTDICT['soundOn'])
-        DISPLAYSURF.blit(IMGDICT['soundOff'], RECTDICT['soundOff'])
-        DISPLAYSURF.blit(IMGDICT['return'], RECTDICT['return'])
+        screen.blit(IMGDICT['optionShow'], RECTDICT['optionShow'])
+        screen.blit(IMGDICT['numPlayers'], RECTDICT['numPlayers'])
+        screen.blit(IMGDICT['onePlayer'], RECTDICT['onePlayer'])
+        screen.blit(IMGDICT['twoPlayers'], RECTDICT['twoPlayers'])
+        screen.blit(IMGDICT['minutes'], RECTDICT['minutes'])
+        screen.blit(IMGDICT['oneMin'], RECTDICT['oneMin'])
+        screen.blit(IMGDICT['threeMin'], RECTDICT['threeMin'])
+        screen.blit(IMGDICT['fiveMin'], RECTDICT['fiveMin'])
+        screen.blit(IMGDICT['sound'], RECTDICT['sound'])
+        screen.blit(IMGDICT['soundOn'], RECTDICT['soundOn'])
+        screen.blit(IMGDICT['soundOff'], RECTDICT['soundOff'])
+        screen.blit(IMGDICT['return'], RECTDICT['return'])
         for b in radioList:
-            pg.draw.circle(DISPLAYSURF, WHITE, b, RADIORADIUS)
-        if (VARIABLEDICT['players'] == 1):
-            pg.draw.circle(DISPLAYSURF, BLACK, radioList[0], RADIORADIUS - 3)
+            pg.draw.circle(screen, WHITE, b, RADIORADIUS)
+        if (STATE.config.players == 1):
+            pg.draw.circle(screen, BLACK, radioList[0], RADIORADIUS - 3)
         else:
-            pg.draw.circle(DISPLAYSURF, BLACK, radioList[1], RADIORADIUS - 3)
-        if (VARIABLEDICT['gameTime'] == 60):
-            pg.draw.circle(DISPLAYSURF, BLACK, radioList[2], RADIORADIUS - 3)
-        elif (VARIABLEDICT['gameTime'] == 180):
-            pg.draw.circle(DISPLAYSURF, BLACK, radioList[3], RADIORADIUS - 3)
+            pg.draw.circle(screen, BLACK, radioList[1], RADIORADIUS - 3)
+        if (STATE.config.gameTime == 60):
+            pg.draw.circle(screen, BLACK, radioList[2], RADIORADIUS - 3)
+        elif (STATE.config.gameTime == 180):
+            pg.draw.circle(screen, BLACK, radioList[3], RADIORADIUS - 3)
         else:
-            pg.draw.circle(DISPLAYSURF, BLACK, radioList[4], RADIORADIUS - 3)
-        if (VARIABLEDICT['sound'] == True):
-            pg.draw.circle(DISPLAYSURF, BLACK, radioList[5], RADIORADIUS - 3)
+            pg.draw.circle(screen, BLACK, radioList[4], RADIORADIUS - 3)
+        if (STATE.config.sound == True):
+            pg.draw.circle(screen, BLACK, radioList[5], RADIORADIUS - 3)
         else:
-            pg.draw.circle(DISPLAYSURF, BLACK, radioList[6], RADIORADIUS - 3)
-    elif VARIABLEDICT['instruct']:
+            pg.draw.circle(screen, BLACK, radioList[6], RADIORADIUS - 3)
+    elif scene.instruct:
         # Instructions showing
-        DISPLAYSURF.blit(IMGDICT['instructShow'], RECTDICT['instructShow'])
-        DISPLAYSURF.blit(IMGDICT['return'], RECTDICT['return'])
+        screen.blit(IMGDICT['instructShow'], RECTDICT['instructShow'])
+        screen.blit(IMGDICT['return'], RECTDICT['return'])
+    elif scene.lobby:
+        # Network lobby showing over the main menu
+        screen.blit(IMGDICT['menu'], RECTDICT['menu'])
+        screen.blit(IMGDICT['waiting'], RECTDICT['waiting'])
+    SCREENDICT['menuScreen'] = (key, screen)
+    return screen
+
+# Draw game layers, only touching the parts of the screen that changed.
+# Returns the areas to update, or None if the whole screen was drawn.
+def draw_layers(layers):
+    lastLayers = SCREENDICT['layers']
+    current = {}
+    for name, key, image, rect in layers:
+        current[name] = (key, rect)
+
+    if SCREENDICT['full']:
+        # Scene change, draw everything
+        for name, key, image, rect in layers:
+            DISPLAYSURF.blit(image, rect)
+        SCREENDICT['full'] = False
+        dirty = None
     else:
-        # Game is showing
-        DISPLAYSURF.blit(IMGDICT['background'], RECTDICT['background'])
-        draw_wind(VARIABLEDICT, FONTDICT)
-        write_info(VARIABLEDICT, FONTDICT)
-        DISPLAYSURF.blit(IMGDICT['football'][VARIABLEDICT['rotation']],
-                                             RECTDICT['football'])
-        if not VARIABLEDICT['player']:
-            DISPLAYSURF.blit(IMGDICT['goal'], RECTDICT['goal'])
-        else:
-            DISPLAYSURF.blit(IMGDICT['goal2'], RECTDICT['goal2'])
-        if VARIABLEDICT['message'] > 0:
-            DISPLAYSURF.blit(IMGDICT['message'], RECTDICT['message'])
-        if VARIABLEDICT['gameOver']:
-            DISPLAYSURF.blit(IMGDICT['quit'], RECTDICT['quit'])
-            DISPLAYSURF.blit(IMGDICT['restart'], RECTDICT['restart'])
-            DISPLAYSURF.blit(IMGDICT['menuReturn'], RECTDICT['menuReturn'])
-    pg.display.update()
-    FPSCLOCK.tick(FPS)
-    return
-
-# Show player messages on screen
-def write_message(VARIABLEDICT, FONTDICT, RECTDICT, IMGDICT):
-
-    # Basically create messages and then flash them for an alloted time
-    if VARIABLEDICT['message'] == 1:
-        IMGDICT['message'] = FONTDICT['titleOne'].render('Ready...',
-                                                    1, TITLEONECOLOR)
-        RECTDICT['message'] = IMGDICT['message'].get_rect()
-        for x in range(0, HALFWIDTH + RECTDICT['message'].width // 2, 100):
-            RECTDICT['message'].center = (x, HALFHEIGHT)
-            redraw_window(VARIABLEDICT, RECTDICT, IMGDICT)
-        pg.time.wait(1000)
-        for x in range(HALFWIDTH, WINWIDTH + RECTDICT['message'].width // 2,
-                       100):
-            RECTDICT['message'].center = (x, HALFHEIGHT)
-            redraw_window(VARIABLEDICT, RECTDICT, IMGDICT)
-    elif VARIABLEDICT['message'] == 2:
-        IMGDICT['message'] = FONTDICT['titleOne'].render('GO!', 1,
-                                                         TITLEONECOLOR)
-        RECTDICT['message'] = IMGDICT['message'].get_rect()
-        RECTDICT['message'].center = (HALFWIDTH, HALFHEIGHT)
-        redraw_window(VARIABLEDICT, RECTDICT, IMGDICT)
-        pg.time.wait(500)
-    elif VARIABLEDICT['message'] == 3:
-        IMGDICT['message'] = FONTDICT['titleTwo'].render('Player One got a high score!',
-                                                         1, TITLETWOCOLOR)
-        RECTDICT['message'] = IMGDICT['message'].get_rect()
-        for y in range(0, HALFHEIGHT, 5):
-            RECTDICT['message'].midbottom = (HALFWIDTH, y)
-            redraw_window(VARIABLEDICT, RECTDICT, IMGDICT)
-        pg.time.wait(1000)
-    elif VARIABLEDICT['message'] == 4:
-        IMGDICT['message'] = FONTDICT['titleTwo'].render('Player Two got a high score!',
-                                                         1, TITLETWOCOLOR)
-        RECTDICT['message'] = IMGDICT['message'].get_rect()
-        for y in range(0, HALFHEIGHT, 5):
-            RECTDICT['message'].midbottom = (HALFWIDTH, y)
-            redraw_window(VARIABLEDICT, RECTDICT, IMGDICT)
-        pg.time.wait(1000)
-    elif VARIABLEDICT['message'] == 5:
-        IMGDICT['message'] = FONTDICT['titleTwo'].render('Player One wins!', 1,
-                                                         TITLETWOCOLOR)
-        RECTDICT['message'] = IMGDICT['message'].get_rect()
-        for y in range(0, HALFHEIGHT, 5):
-            RECTDICT['message'].midbottom = (HALFWIDTH, y)
-            redraw_window(VARIABLEDICT, RECTDICT, IMGDICT)
-        pg.time.wait(1000)
-    elif VARIABLEDICT['message'] == 6:
-        IMGDICT['message'] = FONTDICT['titleTwo'].render('Player Two wins!', 1,
-                                                         TITLETWOCOLOR)
-        RECTDICT['message'] = IMGDICT['message'].get_rect()
-        for y in range(0, HALFHEIGHT, 5):
-            RECTDICT['message'].midbottom = (HALFWIDTH, y)
-            redraw_window(VARIABLEDICT, RECTDICT, IMGDICT)
-        pg.time.wait(1000)
-    elif VARIABLEDICT['message'] == 7:
-        IMGDICT['message'] = FONTDICT['titleTwo'].render('Tie with high score!',
-                                                         1, TITLETWOCOLOR)
-        RECTDICT['message'] = IMGDICT['message'].get_rect()
-        for y in range(0, HALFHEIGHT, 5):
-            RECTDICT['message'].midbottom = (HALFWIDTH, y)
-            redraw_window(VARIABLEDICT, RECTDICT, IMGDICT)
-        pg.time.wait(1000)
-    elif VARIABLEDICT['message'] == 8:
-        IMGDICT['message'] = FONTDICT['titleTwo'].render('Tie game!', 1,
-                                                         TITLETWOCOLOR)
-        RECTDICT['message'] = IMGDICT['message'].get_rect()
-        for y in range(0, HALFHEIGHT, 5):
-            RECTDICT['message'].midbottom = (HALFWIDTH, y)
-            redraw_window(VARIABLEDICT, RECTDICT, IMGDICT)
-        pg.time.wait(1000)
-
-    elif VARIABLEDICT['message'] == 9:
-        IMGDICT['message'] = FONTDICT['default'].render('Click and drag arrow to launch ball', 1,
-                                                         DEFAULTBACKCOLOR)
-        RECTDICT['message'] = IMGDICT['message'].get_rect()
-        RECTDICT['message'].midbottom = (RECTDICT['football'].centerx,
-                                         RECTDICT['football'].top)
-        redraw_window(VARIABLEDICT, RECTDICT, IMGDICT)
-        
-    # Greet Player 1
-    elif VARIABLEDICT['message'] == 10:
-        IMGDICT['message'] = FONTDICT['titleOne'].render('Player One', 1,
-                                                         TITLEONECOLOR)
-        RECTDICT['message'] = IMGDICT['message'].get_rect()
-        RECTDICT['message'].center = (HALFWIDTH, HALFHEIGHT)
-        redraw_window(VARIABLEDICT, RECTDICT, IMGDICT)
-        pg.time.wait(500)
-
-    # Greet Player 2
-    elif VARIABLEDICT['message'] == 11:
-        IMGDICT['message'] = FONTDICT['titleOne'].render('Player Two', 1,
-                                                         TITLEONECOLOR)
-        RECTDICT['message'] = IMGDICT['message'].get_rect()
-        RECTDICT['message'].center = (HALFWIDTH, HALFHEIGHT)
-        redraw_window(VARIABLEDICT, RECTDICT, IMGDICT)
-        pg.time.wait(500)
-
-    # One-Player hi score
-    elif VARIABLEDICT['message'] == 12:
-        IMGDICT['message'] = FONTDICT['titleTwo'].render('High Score!',
-                                                         1, TITLETWOCOLOR)
-        RECTDICT['message'] = IMGDICT['message'].get_rect()
-        for y in range(0, HALFHEIGHT, 5):
-            RECTDICT['message'].midbottom = (HALFWIDTH, y)
-            redraw_window(VARIABLEDICT, RECTDICT, IMGDICT)
-        pg.time.wait(1000)
-
-    # One-Player game over
-    elif VARIABLEDICT['message'] == 13:
-        IMGDICT['message'] = FONTDICT['titleTwo'].render('Game Over',
-                                                         1, TITLETWOCOLOR)
-        RECTDICT['message'] = IMGDICT['message'].get_rect()
-        for y in range(0, HALFHEIGHT, 5):
-            RECTDICT['message'].midbottom = (HALFWIDTH, y)
-            redraw_window(VARIABLEDICT, RECTDICT, IMGDICT)
-        pg.time.wait(1000)
-    return
-
-# Create and write all score and time info about on screen
-def write_info(VARIABLEDICT, FONTDICT):
-    
-    scoreWrite1 = FONTDICT['default'].render('P1: {0}'.format(VARIABLEDICT['scoreOne']),
-                                             1,
+        # Mark old and new areas of every layer that moved or changed, then
+        # merge overlapping areas so nothing gets drawn twice
+        dirty = []
+        areas = []
+        for name in lastLayers.keys() | current.keys():
+            if lastLayers.get(name) != current.get(name):
+                if name in lastLayers:
+                    areas.append(lastLayers[name][1])
+                if name in current:
+                    areas.append(current[name][1])
+        for area in areas:
+            area = pg.Rect(area).clip(RECTDICT['background'])
+            i = area.collidelist(dirty)
+            while i != -1:
+                area.union_ip(dirty.pop(i))
+                i = area.collidelist(dirty)
+            if area.width and area.height:
+                dirty.append(area)
+
+        # Restore the background and redraw every layer inside each area
+        for area in dirty:
+            DISPLAYSURF.set_clip(area)
+            for name, key, image, rect in layers:
+                if rect.colliderect(area):
+                    DISPLAYSURF.blit(image, rect)
+        DISPLAYSURF.set_clip(None)
+
+    SCREENDICT['layers'] = current
+    return dirty
+
+# Show banners one after another, starting with the first right away
+def show_banners(STATE, RECTDICT, IMGDICT, SOUNDDICT, numbers):
+    match = STATE.match
+    match.message = 0
+    match.messages = list(numbers)
+    advance_banners(STATE, RECTDICT, IMGDICT, SOUNDDICT, 0)
+
+# Whether a banner is still moving or waiting its turn.  A banner that
+# stays once it is done, such as a game over result, does not count.
+def banners_playing(match):
+    return bool(match.messages) or (
+        match.message in BANNERDICT
+        and not BANNERDICT[match.message].done(match.messageTime))
+
+# Move the banners on by ms milliseconds, starting the next one when the
+# last is done, and put the one showing in the message image and rect
+def advance_banners(STATE, RECTDICT, IMGDICT, SOUNDDICT, ms):
+    match = STATE.match
+    if match.message in BANNERDICT:
+        match.messageTime += ms
+        banner = BANNERDICT[match.message]
+        if banner.done(match.messageTime) and (match.messages
+                                               or not banner.stays):
+            match.message = 0
+    if match.message not in BANNERDICT and match.messages:
+        match.message = match.messages.pop(0)
+        match.messageTime = 0
+        sound = MESSAGES[match.message][4]
+        if sound is not None and STATE.config.sound:
+            SOUNDDICT[sound].play()
+    if match.message in BANNERDICT:
+        banner = BANNERDICT[match.message]
+        IMGDICT['message'] = banner.image
+        RECTDICT['message'] = banner.rect(match.messageTime)
+
+# Skip to the end of the banners: the last one is shown where it stops if
+# it stays, the rest are dropped
+def skip_banners(STATE, RECTDICT):
+    match = STATE.match
+    if match.messages:
+        match.message = match.messages[-1]
+        match.messages = []
+    if match.message in BANNERDICT:
+        banner = BANNERDICT[match.message]
+        match.messageTime = banner.duration
+        if not banner.stays:
+            match.message = 0
+            return
+        RECTDICT['message'] = banner.rect(match.messageTime)
+
+# Show the help message over the ball
+def show_help(STATE, RECTDICT, IMGDICT):
+    STATE.match.message = 9
+    IMGDICT['message'] = IMGDICT['help']
+    RECTDICT['message'] = IMGDICT['help'].get_rect(
+        midbottom=(STATE.ball.rect.centerx, STATE.ball.rect.top))
+
+# Create all score and time info, returned as layers for redraw_window
+def write_info(STATE, FONTDICT):
+    match = STATE.match
+
+    score1Text = 'P1: {0}'.format(match.scoreOne)
+    scoreWrite1 = TEXTCACHE.render(FONTDICT['default'], score1Text, 1,
                                      DEFAULTFONTCOLOR, DEFAULTBACKCOLOR)
     score1Rect = scoreWrite1.get_rect()
     score1Rect.topleft = (5, 5)
-    scoreWrite2 = FONTDICT['default'].render('P2: {0}'.format(VARIABLEDICT['scoreTwo']),
-                                     1,
+    score2Text = 'P2: {0}'.format(match.scoreTwo)
+    scoreWrite2 = TEXTCACHE.render(FONTDICT['default'], score2Text, 1,
                                      DEFAULTFONTCOLOR, DEFAULTBACKCOLOR)
     score2Rect = scoreWrite2.get_rect()
     score2Rect.topright = (WINWIDTH - 5, 5)
-    hiScoreWrite = FONTDICT['default'].render('Hi-Score: {0}'.format(VARIABLEDICT['hiScore']),
-                                              1,
+    hiScoreText = 'Hi-Score: {0}'.format(match.hiScore)
+    hiScoreWrite = TEXTCACHE.render(FONTDICT['default'], hiScoreText, 1,
                                       DEFAULTFONTCOLOR, DEFAULTBACKCOLOR)
     hiScoreRect = hiScoreWrite.get_rect()
     hiScoreRect.center = (HALFWIDTH, 5)
-    timeWrite = FONTDICT['default'].render('Time: {0:.0f}'.format(VARIABLEDICT['timer']),
-                                           1,
+    timeText = 'Time: {0:.0f}'.format(match.timer)
+    timeWrite = TEXTCACHE.render(FONTDICT['default'], timeText, 1,
                                    DEFAULTFONTCOLOR, DEFAULTBACKCOLOR)
     timeRect = timeWrite.get_rect()
     timeRect.topright = score2Rect.bottomright
-    DISPLAYSURF.blit(scoreWrite1, score1Rect)
-    DISPLAYSURF.blit(scoreWrite2, score2Rect)
-    DISPLAYSURF.blit(hiScoreWrite, hiScoreRect)
-    DISPLAYSURF.blit(timeWrite, timeRect)
-    return
+    return [('score1', score1Text, scoreWrite1, score1Rect),
+            ('score2', score2Text, scoreWrite2, score2Rect),
+            ('hiScore', hiScoreText, hiScoreWrite, hiScoreRect),
+            ('time', timeText, timeWrite, timeRect)]
 
 # Calculate launch power and angle from dragging arrow
-def power_gague(VARIABLEDICT, RECTDICT):
+def power_gague(STATE):
 
     # Set relevant variables to names
-    mousex = VARIABLEDICT['mousePos'][0]
-    mousey = VARIABLEDICT['mousePos'][1]
-    centerx = RECTDICT['football'].centerx
-    centery = RECTDICT['football'].centery
+    mousex = STATE.match.mousePos[0]
+    mousey = STATE.match.mousePos[1]
+    centerx = STATE.ball.rect.centerx
+    centery = STATE.ball.rect.centery
     
     power = hypot(mousex - centerx,
                   mousey - centery)
@@ -938,15 +1313,23 @@ def power_gague(VARIABLEDICT, RECTDICT):
         
     return (power, angle)
 
-# Calculate length of arrow
-def draw_arrow(VARIABLEDICT, RECTDICT, FONTDICT):
+# Calculate length of arrow and draw it onto its own surface, returned as a
+# layer for redraw_window
+def draw_arrow(STATE, FONTDICT):
+    match = STATE.match
+
+    # Reuse the last arrow if nothing about it has changed
+    arrowKey = (match.mousePos, match.power, match.launchAngle,
+                STATE.ball.rect.center)
+    if SCREENDICT['arrow'] is not None and SCREENDICT['arrow'][1] == arrowKey:
+        return SCREENDICT['arrow']
 
-    mousex = VARIABLEDICT['mousePos'][0]
-    mousey = VARIABLEDICT['mousePos'][1]
-    centerx = RECTDICT['football'].centerx
-    centery = RECTDICT['football'].centery
-    power = VARIABLEDICT['power']
-    angle = VARIABLEDICT['launchAngle']
+    mousex = match.mousePos[0]
+    mousey = match.mousePos[1]
+    centerx = STATE.ball.rect.centerx
+    centery = STATE.ball.rect.centery
+    power = match.power
+    angle = match.launchAngle
 
     # Set points for arrow head          
     points = [(mousex - power * cos(angle),
@@ -970,287 +1353,225 @@ def draw_arrow(VARIABLEDICT, RECTDICT, FONTDICT):
                   maxy - power * sin(angle - 3 * pi / 4)),
                  (maxx  - power * cos(angle + 3 * pi / 4),
                   maxy - power * sin(angle + 3 * pi / 4))]
-        points2 = [RECTDICT['football'].center, (maxx, maxy)]
+        points2 = [STATE.ball.rect.center, (maxx, maxy)]
 
     else:
         # Arrow does not exceed power limit        
 
-        points2 = [RECTDICT['football'].center, (mousex, mousey)]
+        points2 = [STATE.ball.rect.center, (mousex, mousey)]
         
+    # Power level goes next to arrow
+    powerLvl = TEXTCACHE.render(FONTDICT['default'], str(int(power)),
+                                1, DEFAULTFONTCOLOR)
+    powerRect = powerLvl.get_rect()
+    powerRect.topleft = (mousex - 50, mousey)
+
+    # Size the arrow surface to fit the head, the thick shaft and the text
+    xs = [x for x, y in points + points2]
+    ys = [y for x, y in points + points2]
+    arrowRect = pg.Rect(int(min(xs)) - 26, int(min(ys)) - 26,
+                        int(max(xs) - min(xs)) + 53,
+                        int(max(ys) - min(ys)) + 53)
+    arrowRect.union_ip(powerRect)
+    arrowImg = pg.Surface(arrowRect.size, SRCALPHA)
+    points = [(x - arrowRect.left, y - arrowRect.top) for x, y in points]
+    points2 = [(x - arrowRect.left, y - arrowRect.top) for x, y in points2]
+
     # Draw arrowhead
-    pg.draw.polygon(DISPLAYSURF, ARROWCOLOR, points)
+    pg.draw.polygon(arrowImg, ARROWCOLOR, points)
 
     # Draw arrow shaft
-    pg.draw.polygon(DISPLAYSURF, ARROWCOLOR, points2, 50)
+    pg.draw.polygon(arrowImg, ARROWCOLOR, points2, 50)
 
     # Write power level next to arrow
-    powerLvl = FONTDICT['default'].render(str(int(power)),
-                                          1, DEFAULTFONTCOLOR)
-    DISPLAYSURF.blit(powerLvl, (mousex - 50, mousey))
-
-    pg.display.update()
-    FPSCLOCK.tick(FPS)
+    arrowImg.blit(powerLvl, powerRect.move(-arrowRect.left, -arrowRect.top))
+
+    SCREENDICT['arrow'] = ('arrow', arrowKey, arrowImg, arrowRect)
+    return SCREENDICT['arrow']
+
+# Launch the ball.  It is moved along one step per tick by fly_ball.
+def launch_ball(STATE):
+    match = STATE.match
+    ball = STATE.ball
+    ball.fly(match.power, match.launchAngle, match.windSpeed,
+             match.windAngle, match.player, STATE.goals, ball.rect.center,
+             ball.rotation, ball.radius)
+
+    # Player, power, launch angle, wind, then points, bounces and steps
+    # counted as the ball flies
+    match.shotLog.append([player_info(STATE, match.player)[0], match.power,
+                          match.launchAngle, match.windSpeed,
+                          match.windAngle, 0, 0, 0])
     return
 
-# Calculate ball trajectory and speed
-def launch_ball(VARIABLEDICT, RECTDICT, IMGDICT, SOUNDDICT):
-
-    # Initialize all relevant variables
-    launchTime = 1
-    shoot = True
-    center = RECTDICT['football'].center
-    negative = 1 # Reversal of ball direction both x- and y-
-    negative2 = 1
-    negative3 = 3 # Reversal of ball rotation
-    power = VARIABLEDICT['power']
-    angle = VARIABLEDICT['launchAngle']
-    winds = VARIABLEDICT['windSpeed']
-    winda = VARIABLEDICT['windAngle']
-    radius = VARIABLEDICT['radius']
-
-    # Check which player is playing
-    if not VARIABLEDICT['player']:
-        # False = Player 1, True = Player 2
-
-        # Shoot loop
-        while shoot:
-
-            # Set speed of ball
-            velocity = (negative * (power * cos(angle) + winds * cos(winda)),
-                        negative2 * (power * sin(angle) + winds * sin(winda)
-                                     - GRAVITY * launchTime))
-            
-            # Set center accordingly
-            center = find_center(center, velocity, launchTime)
-            
-            # Collision checking
-            # We check if the center of the ball will be out of bounds, and correct
-            # centering if it is
-                
-            # Goal area of goal post
-            if center[0] <= RECTDICT['goalArea'].centerx\
-               and center[1] >= RECTDICT['goalArea'].top - radius\
-               and center[1] <= RECTDICT['goalArea'].bottom - radius:
-                if VARIABLEDICT['sound']:
-                    SOUNDDICT['score'].play() # Play scoring sound each time player
-                                              # scores a goal
-                VARIABLEDICT['scoreOne'] += 10
-
-            # Stem of goal post
-            if center[0] <= RECTDICT['brickAreaOne'].right + radius:
-                if center[1] < RECTDICT['brickAreaTwo'].top - radius\
-                   and center[1] >= RECTDICT['brickAreaOne'].top - radius:
-                    if VARIABLEDICT['sound']:
-                        SOUNDDICT['bounce'].play() # Play sound effect for ball
-                                                   # rebounding off of brick area
-                                                   # every time ball hits brick area
-                    center = (RECTDICT['brickAreaOne'].right + radius, center[1])
-                    negative = -negative * FRICTION
-                    negative3 = -negative3
-                elif center[1] >= RECTDICT['brickAreaTwo'].top - radius:
-                    # Ball collides with stem and base of goal post
-                    if VARIABLEDICT['sound']:
-                        SOUNDDICT['bounce'].play()
-                    center = (RECTDICT['brickAreaOne'].right + radius,
-                              RECTDICT['brickAreaOne'].top - radius)
-                    negative = -negative * FRICTION
-                    negative2 = -negative2 * FRICTION
-                    negative3 = -negative3
-                    
-            # Right of base of goal post
-            if center[0] <= RECTDICT['brickAreaTwo'].right + radius:
-                if center[1] >= RECTDICT['brickAreaTwo'].top:
-                    if VARIABLEDICT['sound']:
-                        SOUNDDICT['bounce'].play()
-                    center = (RECTDICT['brickAreaTwo'].right + radius, center[1])
-                    negative = -negative * FRICTION
-                    negative3 = -negative3
-                if center[1] >= RECTDICT['brickAreaTwo'].top - radius:
-                    if VARIABLEDICT['sound']:
-                        SOUNDDICT['bounce'].play()
-                    center = (center[0], RECTDICT['brickAreaTwo'].top - radius)
-                    negative2 = -negative2 * FRICTION
-
-            # Left side of screen -- end launch
-            if center[0] < radius:
-                center = (radius, center[1])
-                shoot = False
-
-            # Right side of screen -- end launch
-            if center[0] > WINWIDTH - radius:
-                center = (WINWIDTH - radius, center[1])
-                shoot = False
-
-            # Table collision checking
-            if center[1] > WINHEIGHT - radius:
-                if VARIABLEDICT['sound']:
-                        SOUNDDICT['bounce'].play()
-                center = (center[0], WINHEIGHT - radius)
-                negative2 = -negative2 * FRICTION
-
-            RECTDICT['football'].center = center # Set new center
-                
-            # Do ball rotation, checking if ball is over-rotated
-            if VARIABLEDICT['rotation'] + 3 > 23 \
-               or VARIABLEDICT['rotation'] - 3 < 0:
-                negative3 = -negative3
-            else:
-                VARIABLEDICT['rotation'] += negative3
-                    
-            # End loop if ball comes to stop
-            if abs(velocity[0]) < 1 or abs(velocity[1]) < 1:
-                shoot = False
-
-            redraw_window(VARIABLEDICT, RECTDICT, IMGDICT)
-
-            launchTime += 1 # Increase ball launch time
-
-    else:
-        # Player 2
-        negative3 = -3
-        
-        while shoot:
-
-            velocity = (negative * (power * cos(angle) + winds * cos(winda)),
-                        negative2 * (power * sin(angle) + winds * sin(winda)
-                                     - GRAVITY * launchTime))
-
-            center = find_center(center, velocity, launchTime)
-                
-            # Goal area of goal post
-            if center[0] >= RECTDICT['goalAreaTwo'].centerx\
-               and center[1] >= RECTDICT['goalAreaTwo'].top - radius\
-               and center[1] <= RECTDICT['goalAreaTwo'].bottom - radius:
-                SOUNDDICT['score'].play()
-                VARIABLEDICT['scoreTwo'] += 10
-
-            # Stem of goal post
-            if center[0] >= RECTDICT['brickAreaThree'].left - radius:
-                if center[1] < RECTDICT['brickAreaFour'].top - radius\
-                   and center[1] >= RECTDICT['brickAreaThree'].top - radius:
-                    center = (RECTDICT['brickAreaThree'].left - radius, center[1])
-                    negative = -negative * FRICTION
-                    negative3 = -negative3
-                elif center[1] >= RECTDICT['brickAreaFour'].top - radius:
-                    # Ball collides with stem and base of goal post
-                    center = (RECTDICT['brickAreaThree'].left - radius,
-                              RECTDICT['brickAreaThree'].top - radius)
-                    negative = -negative * FRICTION
-                    negative2 = -negative2 * FRICTION
-                    negative3 = -negative3
-                    
-            # Right of base of goal post
-            if center[0] >= RECTDICT['brickAreaFour'].left - radius:
-                if center[1] >= RECTDICT['brickAreaFour'].top:
-                    center = (RECTDICT['brickAreaFour'].left - radius, center[1])
-                    negative = -negative * FRICTION
-                    negative3 = -negative3
-                if center[1] >= RECTDICT['brickAreaFour'].top - radius:
-                    center = (center[0], RECTDICT['brickAreaFour'].top - radius)
-                    negative2 = -negative2 * FRICTION
-
-            # Left side of screen -- end launch
-            if center[0] < radius:
-                center = (radius, center[1])
-                shoot = False
-
-            # Right side of screen -- end launch
-            if center[0] > WINWIDTH - radius:
-                center = (WINWIDTH - radius, center[1])
-                shoot = False
-
-            # Table collision checking
-            if center[1] > WINHEIGHT - radius:
-                center = (center[0], WINHEIGHT - radius)
-                negative2 = -negative2 * FRICTION
-
-            RECTDICT['football'].center = center
-                
-            if VARIABLEDICT['rotation'] + 3 > 23 \
-               or VARIABLEDICT['rotation'] - 3 < 0:
-                negative3 = -negative3
+# Move the ball in flight one step, playing sounds and keeping score
+def fly_ball(STATE, SOUNDDICT):
+    ball = STATE.ball
+    try:
+        center, rotation, events = next(ball.shot)
+    except StopIteration:
+        # Ball has come to a stop
+        ball.shot = None
+        return
+    ball.steps += 1
+
+    match = STATE.match
+    shot = match.shotLog[-1]
+    shot[7] += 1
+    for event in events:
+        if event == 'score':
+            # False = Player 1, True = Player 2
+            if not match.player:
+                match.scoreOne += 10
             else:
-                VARIABLEDICT['rotation'] += negative3
-                    
-            if abs(velocity[0]) < 1 or abs(velocity[1]) < 1:
-                shoot = False
-
-            redraw_window(VARIABLEDICT, RECTDICT, IMGDICT)
+                match.scoreTwo += 10
+            shot[5] += 10
+        else:
+            shot[6] += 1
+        if STATE.config.sound:
+            SOUNDDICT[event].play() # Play scoring or rebounding sound
 
-            launchTime += 1
-        
+    ball.rect.center = center # Set new center
+    ball.rotation = rotation
     return
 
-# Find center of object
-def find_center(center, velocity, time):
-    
-    return (int(center[0] - velocity[0] * time),
-            int(center[1] - velocity[1] * time))
+# Draw wind arrow and information onto its own surface, returned as a layer
+# for redraw_window
+def draw_wind(STATE, FONTDICT):
+    match = STATE.match
 
-# Draw wind arrow
-def draw_wind(VARIABLEDICT, FONTDICT):
+    # Reuse the last gauge if the wind has not changed
+    windKey = (match.player, match.windSpeed, match.windAngle)
+    if SCREENDICT['wind'] is not None and SCREENDICT['wind'][1] == windKey:
+        return SCREENDICT['wind']
 
     # Initialize point of arrow depending on which player is up
-    if not VARIABLEDICT['player']:
-        points = [(WINDARROW[0] - WINDRADIUS * cos(VARIABLEDICT['windAngle']),
-                   WINDARROW[1] - WINDRADIUS * sin(VARIABLEDICT['windAngle'])),
-                  (WINDARROW[0] + WINDRADIUS * cos(VARIABLEDICT['windAngle'] - pi / 3),
-                   WINDARROW[1] + WINDRADIUS * sin(VARIABLEDICT['windAngle'] - pi / 3)),
-                  (WINDARROW[0] + WINDRADIUS * cos(VARIABLEDICT['windAngle'] + pi / 3),
-                   WINDARROW[1] + WINDRADIUS * sin(VARIABLEDICT['windAngle'] + pi / 3)),
-                  (WINDARROW[0] - WINDRADIUS * cos(VARIABLEDICT['windAngle']),
-                   WINDARROW[1] - WINDRADIUS * sin(VARIABLEDICT['windAngle']))]
-        
-        # Draw arrow parts
-        pg.draw.circle(DISPLAYSURF, WINDCOLOR, WINDARROW, WINDRADIUS, 1)
-        pg.draw.polygon(DISPLAYSURF, WINDCOLOR, points)
-        pg.draw.line(DISPLAYSURF, WINDCOLOR, points[0],
-                     (WINDARROW[0] - WINDRADIUS * cos(VARIABLEDICT['windAngle']
-                                                      - pi),
-                       WINDARROW[1] - WINDRADIUS * sin(VARIABLEDICT['windAngle']
-                                                       - pi)), 3)
-
-        # Initialize information to print
-        winds = FONTDICT['default'].render('Wind: {0:.1f} cm/s'.format(VARIABLEDICT['windSpeed']),
-                            1, DEFAULTFONTCOLOR)
-        winda = FONTDICT['default'].render('Angle: {0:.1f} deg'.format(VARIABLEDICT['windAngle'] * (180 / pi)),
-                            1, DEFAULTFONTCOLOR)
-        windsRect = winds.get_rect()
-        windaRect = winda.get_rect()
-        windsRect.bottomright = (WINDARROW[0] - WINDRADIUS, WINDARROW[1])
+    if not match.player:
+        arrow = WINDARROW
+    else:
+        arrow = WINDARROW2
+
+    # Initialize information to print
+    winds = TEXTCACHE.render(FONTDICT['default'],
+                             'Wind: {0:.1f} cm/s'.format(match.windSpeed),
+                             1, DEFAULTFONTCOLOR)
+    winda = TEXTCACHE.render(FONTDICT['default'],
+                             'Angle: {0:.1f} deg'.format(match.windAngle * (180 / pi)),
+                             1, DEFAULTFONTCOLOR)
+    windsRect = winds.get_rect()
+    windaRect = winda.get_rect()
+    if not match.player:
+        windsRect.bottomright = (arrow[0] - WINDRADIUS, arrow[1])
         windaRect.topright = windsRect.bottomright
     else:
-
-        points = [(WINDARROW2[0] - WINDRADIUS * cos(VARIABLEDICT['windAngle']),
-                   WINDARROW2[1] - WINDRADIUS * sin(VARIABLEDICT['windAngle'])),
-                  (WINDARROW2[0] + WINDRADIUS * cos(VARIABLEDICT['windAngle'] - pi / 3),
-                   WINDARROW2[1] + WINDRADIUS * sin(VARIABLEDICT['windAngle'] - pi / 3)),
-                  (WINDARROW2[0] + WINDRADIUS * cos(VARIABLEDICT['windAngle'] + pi / 3),
-                   WINDARROW2[1] + WINDRADIUS * sin(VARIABLEDICT['windAngle'] + pi / 3)),
-                  (WINDARROW2[0] - WINDRADIUS * cos(VARIABLEDICT['windAngle']),
-                   WINDARROW2[1] - WINDRADIUS * sin(VARIABLEDICT['windAngle']))]
-        
-        pg.draw.circle(DISPLAYSURF, WINDCOLOR, WINDARROW2, WINDRADIUS, 1)
-        pg.draw.polygon(DISPLAYSURF, WINDCOLOR, points)
-        pg.draw.line(DISPLAYSURF, WINDCOLOR, points[0],
-                     (WINDARROW2[0] - WINDRADIUS * cos(VARIABLEDICT['windAngle']
-                                                      - pi),
-                       WINDARROW2[1] - WINDRADIUS * sin(VARIABLEDICT['windAngle']
-                                                       - pi)), 3)
-
-        winds = FONTDICT['default'].render('Wind: {0:.1f} cm/s'.format(VARIABLEDICT['windSpeed']),
-                            1, DEFAULTFONTCOLOR)
-        winda = FONTDICT['default'].render('Angle: {0:.1f} deg'.format(VARIABLEDICT['windAngle'] * (180 / pi)),
-                            1, DEFAULTFONTCOLOR)
-        windsRect = winds.get_rect()
-        windaRect = winda.get_rect()
-        windsRect.bottomleft = (WINDARROW2[0] + WINDRADIUS, WINDARROW2[1])
+        windsRect.bottomleft = (arrow[0] + WINDRADIUS, arrow[1])
         windaRect.topleft = windsRect.bottomleft
 
+    # Size the widget surface to fit the gauge and both readouts
+    windRect = pg.Rect(0, 0, 2 * WINDRADIUS + 4, 2 * WINDRADIUS + 4)
+    windRect.center = arrow
+    windRect.union_ip(windsRect)
+    windRect.union_ip(windaRect)
+    windImg = pg.Surface(windRect.size, SRCALPHA)
+    center = (arrow[0] - windRect.left, arrow[1] - windRect.top)
+
+    points = [(center[0] - WINDRADIUS * cos(match.windAngle),
+               center[1] - WINDRADIUS * sin(match.windAngle)),
+              (center[0] + WINDRADIUS * cos(match.windAngle - pi / 3),
+               center[1] + WINDRADIUS * sin(match.windAngle - pi / 3)),
+              (center[0] + WINDRADIUS * cos(match.windAngle + pi / 3),
+               center[1] + WINDRADIUS * sin(match.windAngle + pi / 3)),
+              (center[0] - WINDRADIUS * cos(match.windAngle),
+               center[1] - WINDRADIUS * sin(match.windAngle))]
+
+    # Draw arrow parts
+    pg.draw.circle(windImg, WINDCOLOR, center, WINDRADIUS, 1)
+    pg.draw.polygon(windImg, WINDCOLOR, points)
+    pg.draw.line(windImg, WINDCOLOR, points[0],
+                 (center[0] - WINDRADIUS * cos(match.windAngle - pi),
+                  center[1] - WINDRADIUS * sin(match.windAngle - pi)),
+                 3)
+
     # Display wind information (speed and angle)
-    DISPLAYSURF.blit(winds, windsRect)
-    DISPLAYSURF.blit(winda, windaRect)
-    return
+    windImg.blit(winds, windsRect.move(-windRect.left, -windRect.top))
+    windImg.blit(winda, windaRect.move(-windRect.left, -windRect.top))
+    SCREENDICT['wind'] = ('wind', windKey, windImg, windRect)
+    return SCREENDICT['wind']
+
+# Window size for the command line, as WxH no smaller than the game fits
+def window_argument(text):
+    try:
+        size = parse_size(text)
+    except ValueError:
+        raise argparse.ArgumentTypeError(
+            'window size must be WxH, not {0!r}'.format(text))
+    try:
+        fit_scale(size)
+    except ValueError as error:
+        raise argparse.ArgumentTypeError(str(error))
+    return size
+
+# Port number for the command line
+def port_argument(text):
+    if not text.isdigit() or int(text) > 65535:
+        raise argparse.ArgumentTypeError(
+            'port must be a number from 0 to 65535, not {0!r}'.format(text))
+    return int(text)
+
+# HOST or HOST:PORT to join for the command line, as (host, port)
+def join_argument(text):
+    host, colon, port = text.partition(':')
+    if not host:
+        raise argparse.ArgumentTypeError(
+            'expected HOST or HOST:PORT, not {0!r}'.format(text))
+    return host, port_argument(port) if colon else PORT
+
+# Command line options.  Usage errors go to stderr and exit with status 2.
+def parse_arguments(argv=None):
+    parser = argparse.ArgumentParser(description='Paper Football League')
+    parser.add_argument('--record', metavar='FILE',
+                        help='record this session to FILE for replay.py')
+    parser.add_argument('--difficulty', default='normal', choices=list(LEVELS),
+                        help='level of the computer opponent')
+    parser.add_argument('--window', type=window_argument, metavar='WxH',
+                        help='window size, the game is scaled to fit it')
+    parser.add_argument('--fullscreen', action='store_true')
+    network = parser.add_mutually_exclusive_group()
+    network.add_argument('--host', type=port_argument, nargs='?', const=PORT,
+                         metavar='PORT',
+                         help='host a network match as player one')
+    network.add_argument('--join', type=join_argument,
+                         metavar='HOST[:PORT]',
+                         help='join a network match as player two')
+    parser.add_argument('--startup-report', action='store_true',
+                        help='print startup and asset load times')
+    parser.add_argument('--profile', action='store_true',
+                        help='start with the frame profiler on')
+    parser.add_argument('--no-history', action='store_true',
+                        help='do not save finished matches')
+    args = parser.parse_args(argv)
+    if args.record is not None and (args.host is not None
+                                    or args.join is not None):
+        parser.error('network matches can not be recorded')
+    return args
 
 if __name__ == '__main__':
-    initialize()
+    args = parse_arguments()
+    recorder = None if args.record is None else Recorder(args.record)
+    network = None
+    if args.host is not None or args.join is not None:
+        # Network match: host one as player one, or join one as player two
+        host, port = (None, args.host) if args.join is None else args.join
+        try:
+            network = NetPlay(host, port)
+        except OSError as error:
+            if host is None:
+                print('Could not host on port {0}: {1}'.format(port, error),
+                      file=sys.stderr)
+            else:
+                print('Could not join {0}:{1}: {2}'.format(host, port, error),
+                      file=sys.stderr)
+            sys.exit(1)
+    initialize(args.startup_report, args.profile, recorder, args.difficulty,
+               None if args.no_history else HISTORYPATH, args.window,
+               args.fullscreen, network)
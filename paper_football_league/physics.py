@@ -0,0 +1,299 @@
+# Paper Football League
+# Shot physics
+# By Josh Klipstein
+#
+# Headless version of the ball flight used by launch_ball.  Nothing in here
+# touches the display or the mixer, so shots can be simulated as fast as
+# Python allows for tuning, bots and tools.
+#
+# Between frames the ball moves in a straight line, and every move is swept
+# against the goal post: the ball stops at the exact point it first touches
+# the stem, the base or the table, bounces, and carries on with what is left
+# of the move.  A goal is scored where the move crosses the goal line
+# between the top of the goal area and the stem, however far the ball
+# travelled that frame.
+
+from collections import namedtuple
+from math import cos, sin
+
+# Table Constants
+WINWIDTH = 1200
+WINHEIGHT = 660
+HALFWIDTH = WINWIDTH // 2
+QUARTERWIDTH = HALFWIDTH // 2
+
+# Physics Constants
+GRAVITY = 9.8
+FRICTION = 0.5
+BALLRADIUS = 60
+BALLSIZE = (120, 120)
+GOALSIZE = (500, 750) # Size of images/gp.png and images/gp2.png
+ROTATIONS = 24 # Number of football rotation frames
+MAXHITS = 4 # Most bounces in one frame, the rest of the move is dropped
+RULES = 2 # Bumped whenever shot outcomes change, to retire stored results
+INFINITY = float('inf')
+
+
+# Rectangle that does not need pygame.  Being a 4-tuple it can be handed
+# straight to pg.Rect.
+class Box(namedtuple('Box', 'left top width height')):
+    __slots__ = ()
+
+    @property
+    def right(self):
+        return self.left + self.width
+
+    @property
+    def bottom(self):
+        return self.top + self.height
+
+    @property
+    def centerx(self):
+        return self.left + self.width // 2
+
+    @property
+    def centery(self):
+        return self.top + self.height // 2
+
+
+# Outcome of one shot
+ShotResult = namedtuple('ShotResult', 'points center rotation bounces steps '
+                                      'trajectory events')
+
+
+# Place a box by its midbottom point, the same way pg.Rect does
+def midbottom_box(size, midbottom):
+    return Box(midbottom[0] - size[0] // 2, midbottom[1] - size[1],
+               size[0], size[1])
+
+
+# Build goal post geometry for both players from the goal image sizes
+def make_geometry(goalSize=GOALSIZE, goalSize2=GOALSIZE):
+    goal = midbottom_box(goalSize, (QUARTERWIDTH, WINHEIGHT + 50))
+    goal2 = midbottom_box(goalSize2, (HALFWIDTH + QUARTERWIDTH,
+                                      WINHEIGHT + 50))
+    goalArea = Box(goal.left + 133, goal.top + 50, 37, 237)
+    goalArea2 = Box(goal2.right - 170, goal.top + 50, 37, 237)
+    postArea = Box(goalArea.left, goalArea.bottom, 33, 333)
+    postArea2 = Box(goal.left + 48, postArea.bottom, 404, 88)
+    postArea3 = Box(goalArea2.left, goalArea.bottom, 33, 333)
+    postArea4 = Box(goal2.left + 50, postArea3.bottom, 404, 88)
+
+    return {'goal': goal,
+            'goal2': goal2,
+            'goalArea': goalArea,
+            'goalAreaTwo': goalArea2,
+            'brickAreaOne': postArea,
+            'brickAreaTwo': postArea2,
+            'brickAreaThree': postArea3,
+            'brickAreaFour': postArea4}
+
+
+# Starting center and rotation of the ball for either player
+def start_position(player):
+    if not player:
+        return (midbottom_box(BALLSIZE, (HALFWIDTH + QUARTERWIDTH,
+                                         WINHEIGHT)).centerx,
+                WINHEIGHT - BALLSIZE[1] // 2), 6
+    return (midbottom_box(BALLSIZE, (QUARTERWIDTH, WINHEIGHT)).centerx,
+            WINHEIGHT - BALLSIZE[1] // 2), 18
+
+
+# Boxes the ball center cannot enter, as (left, right, top, bottom): the
+# stem and base of the goal post grown by the ball radius, and the table
+def obstacles(geometry, player, radius=BALLRADIUS):
+    if not player:
+        stem, base = geometry['brickAreaOne'], geometry['brickAreaTwo']
+    else:
+        stem, base = geometry['brickAreaThree'], geometry['brickAreaFour']
+    return [(stem.left - radius, stem.right + radius,
+             stem.top - radius, stem.bottom + radius),
+            (base.left - radius, base.right + radius,
+             base.top - radius, base.bottom + radius),
+            (-INFINITY, INFINITY, WINHEIGHT - radius, INFINITY)]
+
+
+# Fraction of the move (dx, dy) from (x, y) at which the ball enters box,
+# and whether it hit a side (True) or the top or bottom (False).  None if
+# the move misses, or starts inside the box.
+def box_entry(x, y, dx, dy, box):
+    left, right, top, bottom = box
+
+    # Most moves are nowhere near the box
+    endx, endy = x + dx, y + dy
+    if (x < left and endx < left or x > right and endx > right
+            or y < top and endy < top or y > bottom and endy > bottom):
+        return None
+    if dx:
+        near, far = (left - x) / dx, (right - x) / dx
+        if near > far:
+            near, far = far, near
+    elif left <= x <= right:
+        near, far = -INFINITY, INFINITY
+    else:
+        return None
+    if dy:
+        nearY, farY = (top - y) / dy, (bottom - y) / dy
+        if nearY > farY:
+            nearY, farY = farY, nearY
+    elif top <= y <= bottom:
+        nearY, farY = -INFINITY, INFINITY
+    else:
+        return None
+    enter = max(near, nearY)
+    if enter < 0 or enter > 1 or enter > min(far, farY):
+        return None
+    return enter, near >= nearY
+
+
+# Move the ball by (dx, dy) from (x, y), one stretch at a time up to each
+# box it bounces off, keeping the rest of the move after every bounce.
+# goalLine is the goal's x and the top and bottom of the band a crossing
+# scores in.  Returns the new center, the events, whether each bounce was
+# off a side, and whether the ball hit a side of the screen.
+def sweep_move(x, y, dx, dy, boxes, goalLine, player, radius=BALLRADIUS):
+    goalx, goalTop, goalBottom = goalLine
+    events = []
+    sides = []
+    wall = False
+    for hit in range(MAXHITS):
+        first = None
+        for box in boxes:
+            contact = box_entry(x, y, dx, dy, box)
+            if contact is not None and (first is None
+                                        or contact[0] < first[0]):
+                first = contact
+        reach = 1 if first is None else first[0]
+
+        # Sides of screen end the launch
+        if x + reach * dx < radius:
+            reach = (radius - x) / dx
+            wall = True
+            first = None
+        elif x + reach * dx > WINWIDTH - radius:
+            reach = (WINWIDTH - radius - x) / dx
+            wall = True
+            first = None
+
+        # Goal line crossed inside the goal area
+        if (x > goalx >= x + reach * dx if not player
+                else x < goalx <= x + reach * dx):
+            crossy = y + (goalx - x) / dx * dy
+            if crossy >= goalTop and crossy <= goalBottom:
+                events.append('score')
+
+        x += reach * dx
+        y += reach * dy
+        if first is None:
+            break
+
+        # Bounce off, keeping the rest of the move
+        events.append('bounce')
+        sides.append(first[1])
+        dx *= 1 - reach
+        dy *= 1 - reach
+        if first[1]:
+            dx = -dx * FRICTION
+        else:
+            dy = -dy * FRICTION
+    return x, y, events, sides, wall
+
+
+# Find center of object
+def find_center(center, velocity, time):
+
+    return (int(center[0] - velocity[0] * time),
+            int(center[1] - velocity[1] * time))
+
+
+# Step a shot until the ball stops, yielding (center, rotation, events) once
+# per frame.  Events are 'score' and 'bounce', in the order they happened.
+def shot_steps(power, angle, windSpeed, windAngle, player, geometry,
+               center=None, rotation=None, radius=BALLRADIUS):
+
+    # Initialize all relevant variables
+    startCenter, startRotation = start_position(player)
+    if center is None:
+        center = startCenter
+    if rotation is None:
+        rotation = startRotation
+    launchTime = 1
+    shoot = True
+    negative = 1 # Reversal of ball direction both x- and y-
+    negative2 = 1
+    negative3 = -3 if player else 3 # Reversal of ball rotation
+    pushx = power * cos(angle) + windSpeed * cos(windAngle)
+    pushy = power * sin(angle) + windSpeed * sin(windAngle)
+
+    # Pull out the edges we collide with
+    goalArea = geometry['goalAreaTwo' if player else 'goalArea']
+    goalLine = (goalArea.centerx, goalArea.top - radius,
+                goalArea.bottom - radius)
+    boxes = obstacles(geometry, player, radius)
+    x, y = center
+
+    while shoot:
+        events = []
+
+        # Set speed of ball
+        velocity = (negative * pushx,
+                    negative2 * (pushy - GRAVITY * launchTime))
+
+        # Move the ball toward where it would be this frame
+        endx, endy = find_center((x, y), velocity, launchTime)
+        x, y, events, sides, wall = sweep_move(x, y, endx - x, endy - y,
+                                               boxes, goalLine, player,
+                                               radius)
+        for side in sides:
+            if side:
+                negative = -negative * FRICTION
+                negative3 = -negative3
+            else:
+                negative2 = -negative2 * FRICTION
+        if wall:
+            shoot = False
+        x, y = int(x), int(y)
+        center = (x, y)
+
+        # Do ball rotation, checking if ball is over-rotated
+        if rotation + 3 > ROTATIONS - 1 or rotation - 3 < 0:
+            negative3 = -negative3
+        else:
+            rotation += negative3
+
+        # End loop if ball comes to stop
+        if abs(velocity[0]) < 1 or abs(velocity[1]) < 1:
+            shoot = False
+
+        yield center, rotation, events
+
+        launchTime += 1 # Increase ball launch time
+
+
+# Simulate a whole shot and return its outcome.  Leave record off when only
+# the final result is needed.
+def simulate_shot(power, angle, windSpeed, windAngle, player, geometry,
+                  center=None, rotation=None, radius=BALLRADIUS,
+                  record=True):
+    points = 0
+    bounces = 0
+    steps = 0
+    trajectory = []
+    eventList = []
+
+    for center, rotation, events in shot_steps(power, angle, windSpeed,
+                                               windAngle, player, geometry,
+                                               center, rotation, radius):
+        for event in events:
+            if event == 'score':
+                points += 10
+            else:
+                bounces += 1
+            if record:
+                eventList.append((steps, event))
+        if record:
+            trajectory.append(center)
+        steps += 1
+
+    return ShotResult(points, center, rotation, bounces, steps,
+                      trajectory, eventList)
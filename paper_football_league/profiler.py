@@ -0,0 +1,166 @@
+# Paper Football League
+# Frame profiler
+# By Josh Klipstein
+#
+# Times each phase of a frame (event pumping, physics, HUD text, blits,
+# display update and the frame clock) and keeps a rolling history of them.
+# The overlay shows a frame time graph with p50/p95/p99 for every phase,
+# and a summary of the session, up to its last SESSION frames, can be
+# printed on exit.  While the
+# profiler is off the phase timers do nothing.
+
+import sys
+from collections import deque
+from time import perf_counter
+
+import pygame as pg
+from pygame.locals import *
+
+PHASES = ('events', 'physics', 'hud', 'blits', 'update', 'tick')
+HISTORY = 120 # Frames shown on the overlay
+SESSION = 108000 # Frames kept for the summary, an hour at 30 fps
+OVERLAYRATE = 10 # Frames between overlay redraws
+GRAPHSIZE = (240, 60)
+OVERLAYCOLOR = (0, 0, 0, 170)
+TEXTCOLOR = (255, 255, 255)
+BARCOLOR = (0, 255, 0)
+SLOWCOLOR = (255, 64, 64)
+BUDGETCOLOR = (255, 255, 128)
+
+
+# Nearest rank percentile of a list of numbers
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+# Times one phase: use as "with profiler.phase(name):"
+class PhaseTimer:
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+        self.start = None
+
+    def __enter__(self):
+        if self.profiler.enabled:
+            self.start = perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        if self.start is not None:
+            self.profiler.current[self.name] += perf_counter() - self.start
+            self.start = None
+        return False
+
+
+class Profiler:
+
+    def __init__(self, enabled=False, fps=30, history=HISTORY,
+                 session=SESSION):
+        self.enabled = enabled
+        self.budget = 1000 / fps # Milliseconds per frame at full speed
+        self.timers = {name: PhaseTimer(self, name) for name in PHASES}
+        self.current = dict.fromkeys(PHASES, 0.0) # Seconds this frame
+        self.recent = {name: deque(maxlen=history)
+                       for name in PHASES + ('frame',)} # Milliseconds
+        self.session = {name: deque(maxlen=session)
+                        for name in PHASES + ('frame',)}
+        self.frameStart = None
+        self.frames = 0
+        self.overlayLayer = None
+
+    def toggle(self):
+        self.enabled = not self.enabled
+        self.frameStart = None
+        self.current = dict.fromkeys(PHASES, 0.0)
+
+    def phase(self, name):
+        return self.timers[name]
+
+    # Close off a frame, called once the frame has been shown and ticked
+    def end_frame(self):
+        if not self.enabled:
+            return
+        now = perf_counter()
+        if self.frameStart is not None:
+            self.current['frame'] = now - self.frameStart
+            for name, seconds in self.current.items():
+                self.recent[name].append(1000 * seconds)
+                self.session[name].append(1000 * seconds)
+            self.frames += 1
+        self.current = dict.fromkeys(PHASES, 0.0)
+        self.frameStart = now
+
+    # Overlay as a (name, key, image, rect) layer, redrawn every few frames
+    def overlay(self, font, topleft=(0, 0)):
+        key = self.frames // OVERLAYRATE
+        if self.overlayLayer is not None and self.overlayLayer[1] == key:
+            return self.overlayLayer
+
+        rows = [('phase', 'p50', 'p95', 'p99')]
+        for name in PHASES + ('frame',):
+            samples = self.recent[name]
+            rows.append((name,) + tuple(
+                '{0:.2f}'.format(percentile(samples, fraction))
+                for fraction in (.5, .95, .99)))
+        lineHeight = font.get_linesize()
+        width = GRAPHSIZE[0] + 8
+        height = GRAPHSIZE[1] + 8 + lineHeight * len(rows)
+        image = pg.Surface((width, height), SRCALPHA)
+        image.fill(OVERLAYCOLOR)
+
+        # Frame time graph, newest frame on the right, scaled to two budgets
+        graph = pg.Rect(4, 4, GRAPHSIZE[0], GRAPHSIZE[1])
+        scale = graph.height / (2 * self.budget)
+        frameTimes = list(self.recent['frame'])[-graph.width // 2:]
+        x = graph.right - 2 * len(frameTimes)
+        for frameTime in frameTimes:
+            barHeight = min(graph.height, int(frameTime * scale))
+            color = BARCOLOR if frameTime <= self.budget else SLOWCOLOR
+            pg.draw.line(image, color, (x, graph.bottom),
+                         (x, graph.bottom - barHeight))
+            x += 2
+        budgetY = graph.bottom - int(self.budget * scale)
+        pg.draw.line(image, BUDGETCOLOR, (graph.left, budgetY),
+                     (graph.right, budgetY))
+
+        # Percentile table in milliseconds
+        y = graph.bottom + 4
+        columns = (4, 90, 140, 190)
+        for row in rows:
+            for column, text in zip(columns, row):
+                image.blit(font.render(text, 1, TEXTCOLOR), (column, y))
+            y += lineHeight
+
+        rect = image.get_rect()
+        rect.topleft = topleft
+        self.overlayLayer = ('profiler', key, image, rect)
+        return self.overlayLayer
+
+    # Session summary.  caches maps a name to a cache's stats() dictionary,
+    # printed under the phase timings.
+    def print_summary(self, file=None, caches=None):
+        if not self.frames:
+            return
+        file = sys.stdout if file is None else file
+        frameTimes = self.session['frame']
+        print('Frame profile: {0} frames, {1:.1f} fps{2}'.format(
+            self.frames, 1000 * len(frameTimes) / sum(frameTimes),
+            '' if len(frameTimes) == self.frames else
+            ' over the last {0}'.format(len(frameTimes))), file=file)
+        print('  {0:<8}{1:>9}{2:>9}{3:>9}{4:>9}{5:>9}'.format(
+            'phase', 'mean', 'p50', 'p95', 'p99', 'max'), file=file)
+        for name in PHASES + ('frame',):
+            samples = self.session[name]
+            print('  {0:<8}{1:>9.2f}{2:>9.2f}{3:>9.2f}{4:>9.2f}{5:>9.2f}'
+                  .format(name, sum(samples) / len(samples),
+                          percentile(samples, .5), percentile(samples, .95),
+                          percentile(samples, .99), max(samples)), file=file)
+        print('  (milliseconds per frame)', file=file)
+        for name, stats in (caches or {}).items():
+            print('  {0} cache: {hits} hits, {misses} misses, {hitRate:.1%} '
+                  'hit rate, {evictions} evicted, {size} held'.format(
+                      name, **stats), file=file)
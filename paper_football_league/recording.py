@@ -0,0 +1,142 @@
+# Paper Football League
+# Game recordings
+# By Josh Klipstein
+#
+# A recording holds everything needed to play a session back exactly: the
+# seed for the wind, the level the computer played at and whether it read
+# the shot table, how long every frame took on the frame clock and the mouse
+# events each frame saw.  Game time runs in fixed ticks counted from
+# the frame times, so feeding back the same frames and events reproduces
+# the same wind, shots and scores.  The scores at every game over are kept
+# too, so a replay can be checked against them.
+#
+# File layout, little endian, zlib compressed after the magic:
+#   header    version, physics rules, seed, frame, event and score counts
+#             and the computer's level and shot table flag
+#   frames    one byte of milliseconds per frame (capped, see MAXFRAMEMS)
+#   events    frame number, type, x, y and button per mouse event, and
+#             the frame the player quit on
+#   scores    scoreOne and scoreTwo per game over, then at exit
+
+import os
+import struct
+import zlib
+from random import getrandbits
+
+from pygame.locals import *
+
+from opponent import LEVELS
+from physics import RULES
+
+MAGIC = b'PFLR'
+VERSION = 5
+HEADER = struct.Struct('<HHQIIIBB')
+EVENT = struct.Struct('<IBiiB')
+SCORE = struct.Struct('<ii')
+MAXFRAMEMS = 255 # The game never catches up more than 250 ms in one frame
+EVENTTYPES = (MOUSEBUTTONDOWN, MOUSEMOTION, MOUSEBUTTONUP, QUIT)
+
+
+class Recording:
+
+    def __init__(self, seed=None, rules=RULES, difficulty='normal',
+                 shotTable=False):
+        self.seed = getrandbits(64) if seed is None else seed
+        self.rules = rules # Shots only replay the same under the same rules
+        self.difficulty = difficulty # And against the same computer player
+        self.shotTable = shotTable
+        self.frameTimes = bytearray() # Milliseconds per frame
+        self.events = [] # (frame, index in EVENTTYPES, x, y, button)
+        self.scores = [] # (scoreOne, scoreTwo)
+
+    # Events for every frame, as lists of (type, x, y, button)
+    def frames(self):
+        frames = [[] for time in self.frameTimes]
+        for frame, eventType, x, y, button in self.events:
+            frames[frame].append((EVENTTYPES[eventType], x, y, button))
+        return frames
+
+    def save(self, path):
+        body = [HEADER.pack(VERSION, self.rules, self.seed,
+                            len(self.frameTimes), len(self.events),
+                            len(self.scores),
+                            list(LEVELS).index(self.difficulty),
+                            self.shotTable),
+                bytes(self.frameTimes)]
+        body.extend(EVENT.pack(*event) for event in self.events)
+        body.extend(SCORE.pack(*score) for score in self.scores)
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        with open(path, 'wb') as file:
+            file.write(MAGIC + zlib.compress(b''.join(body), 9))
+
+
+# Read a recording, raising ValueError if the file is not one
+def load_recording(path):
+    with open(path, 'rb') as file:
+        data = file.read()
+    if data[:len(MAGIC)] != MAGIC:
+        raise ValueError('{0} is not a game recording'.format(path))
+    try:
+        body = zlib.decompress(data[len(MAGIC):])
+        (version, rules, seed, frameCount, eventCount, scoreCount,
+         level, shotTable) = HEADER.unpack_from(body)
+    except (zlib.error, struct.error):
+        raise ValueError('{0} is damaged'.format(path))
+    if version != VERSION:
+        raise ValueError('{0} is recording version {1}, expected {2}'
+                         .format(path, version, VERSION))
+    if rules != RULES:
+        raise ValueError('{0} was recorded under physics rules {1}, these '
+                         'are rules {2}'.format(path, rules, RULES))
+
+    if level >= len(LEVELS) or shotTable > 1:
+        raise ValueError('{0} is damaged'.format(path))
+
+    recording = Recording(seed, difficulty=list(LEVELS)[level],
+                          shotTable=bool(shotTable))
+    offset = HEADER.size
+    recording.frameTimes = bytearray(body[offset:offset + frameCount])
+    offset += frameCount
+    for i in range(eventCount):
+        recording.events.append(EVENT.unpack_from(body, offset))
+        offset += EVENT.size
+    for i in range(scoreCount):
+        recording.scores.append(SCORE.unpack_from(body, offset))
+        offset += SCORE.size
+    if offset != len(body) or len(recording.frameTimes) != frameCount:
+        raise ValueError('{0} is damaged'.format(path))
+    return recording
+
+
+# Builds a recording as the game runs.  The game calls frame() with each
+# frame's events and score() at every game over, and save() on exit.
+class Recorder:
+
+    def __init__(self, path=None, seed=None):
+        self.path = path # Nothing is written without a path
+        self.recording = Recording(seed)
+        self.seed = self.recording.seed
+
+    def frame(self, events, frameTime):
+        recording = self.recording
+        frame = len(recording.frameTimes)
+        recording.frameTimes.append(min(int(frameTime), MAXFRAMEMS))
+        for event in events:
+            # Quitting first, a QUIT event has no position
+            if event.type == QUIT or (event.type == KEYUP
+                                      and event.key == K_ESCAPE):
+                recording.events.append((frame, EVENTTYPES.index(QUIT),
+                                         0, 0, 0))
+            elif event.type in EVENTTYPES:
+                recording.events.append((frame, EVENTTYPES.index(event.type),
+                                         event.pos[0], event.pos[1],
+                                         getattr(event, 'button', 0)))
+
+    def score(self, scoreOne, scoreTwo):
+        self.recording.scores.append((scoreOne, scoreTwo))
+
+    def save(self):
+        if self.path is not None:
+            self.recording.save(self.path)
@@ -0,0 +1,128 @@
+# Paper Football League
+# Replay a recorded game
+# By Josh Klipstein
+#
+# Plays a recording made with "paper_football_league.py --record FILE" back
+# through the real game and checks that every game ends with the same
+# scores.  By default it runs headless and as fast as it can, with the
+# frame clock taken out; --realtime shows it in a window at normal speed
+# instead.
+#
+#   python replay.py FILE [--realtime]
+
+import os
+import sys
+from time import perf_counter
+
+import pygame as pg
+from pygame.locals import *
+
+import paper_football_league as pfl
+from recording import Recorder, load_recording
+from shottable import open_table
+
+RealClock = pg.time.Clock
+
+
+# Hands the game the recorded events one frame at a time
+class ReplayDriver:
+
+    def __init__(self, recording, realtime=False):
+        self.recording = recording
+        self.frames = recording.frames()
+        self.realtime = realtime
+        self.frame = 0
+        self.frameTime = 0
+        self.realGet = pg.event.get
+
+    def get(self, *args, **kwargs):
+        # Keep the window responsive and let the viewer close it
+        for event in self.realGet():
+            if event.type == QUIT:
+                return [event]
+        if self.frame >= len(self.frames):
+            return [pg.event.Event(QUIT)]
+
+        self.frameTime = self.recording.frameTimes[self.frame]
+        events = []
+        for eventType, x, y, button in self.frames[self.frame]:
+            if eventType == MOUSEMOTION:
+                events.append(pg.event.Event(MOUSEMOTION, pos=(x, y),
+                                             rel=(0, 0), buttons=(0, 0, 0)))
+            elif eventType == QUIT:
+                events.append(pg.event.Event(QUIT))
+            else:
+                events.append(pg.event.Event(eventType, pos=(x, y),
+                                             button=button))
+        self.frame += 1
+        return events
+
+    # The recorded frames already hold whatever an idle screen waited for
+    def wait(self, timeout=0):
+        return pg.event.Event(NOEVENT)
+
+
+# Frame clock that reports the recorded frame times.  It only waits out
+# the frame when replaying in real time.
+class ReplayClock:
+
+    def __init__(self, driver):
+        self.driver = driver
+        self.clock = RealClock() if driver.realtime else None
+
+    def tick(self, framerate=0):
+        if self.clock is not None:
+            self.clock.tick(framerate)
+        return self.driver.frameTime
+
+    def get_time(self):
+        return self.driver.frameTime
+
+
+def replay(path, realtime=False):
+    recording = load_recording(path)
+    if recording.shotTable and open_table() is None:
+        # The computer's searches would not come out the same without it
+        print('{0} was recorded against the shot table, build it first with '
+              '"python shottable.py"'.format(path), file=sys.stderr)
+        return 1
+    if not realtime:
+        os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+        os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+    driver = ReplayDriver(recording, realtime)
+    pg.event.get = driver.get
+    pg.event.wait = driver.wait
+    pg.time.Clock = lambda: ReplayClock(driver)
+    recorder = Recorder(seed=recording.seed)
+
+    start = perf_counter()
+    try:
+        pfl.initialize(recorder=recorder,
+                       difficulty=recording.difficulty,
+                       shotTable=recording.shotTable)
+    except SystemExit:
+        pass
+    elapsed = perf_counter() - start
+
+    print('{0} frames in {1:.2f} s ({2:.0f} frames/s)'.format(
+        driver.frame, elapsed, driver.frame / elapsed))
+    expected = recording.scores
+    actual = recorder.recording.scores
+    for game, (before, after) in enumerate(zip(expected, actual), 1):
+        label = 'exit' if game == len(expected) else 'game {0}'.format(game)
+        print('  {0:<8} recorded {1[0]:>5} {1[1]:>5}   replayed {2[0]:>5} '
+              '{2[1]:>5}{3}'.format(label, before, after,
+                                    '' if before == after else '  MISMATCH'))
+    if expected != actual:
+        print('FAIL')
+        return 1
+    print('OK')
+    return 0
+
+
+if __name__ == '__main__':
+    if len(sys.argv) < 2:
+        print('usage: python replay.py FILE [--realtime]')
+        sys.exit(2)
+    sys.exit(replay(sys.argv[1], '--realtime' in sys.argv))
@@ -0,0 +1,214 @@
+# Paper Football League
+# Precomputed shot outcome table
+# By Josh Klipstein
+#
+# Sweeps every (player, power, launch angle, wind speed, wind angle) cell at a
+# fixed resolution and stores each outcome in a flat binary file.  Reading the
+# table only needs mmap and struct, so the game can look shots up without
+# NumPy; building it uses the batch simulator.
+#
+# The header carries a fingerprint of the goal post geometry, the physics
+# rules and constants and the grid, so a table built for different offsets
+# is treated as stale and rebuilt.
+
+import hashlib
+import mmap
+import os
+import struct
+import sys
+from math import pi
+from time import perf_counter
+
+import physics
+
+TABLEPATH = 'data/shots.tbl'
+TABLEMAGIC = b'PFLT'
+TABLEVERSION = 1
+
+# Grid resolution: (number of steps, lowest value, highest value).  Angles
+# wrap, so their highest value is never sampled.
+POWERGRID = (41, 0.0, 200.0)
+ANGLEGRID = (72, 0.0, 2 * pi)
+WINDSPEEDGRID = (21, 0.0, 100.0)
+WINDANGLEGRID = (36, 0.0, 2 * pi)
+
+# magic, version, fingerprint, then the step count of each axis
+HEADER = struct.Struct('<4sI32s4I')
+# points, resting x, resting y, bounces
+RECORD = struct.Struct('<HhiB')
+
+
+# Fingerprint the geometry and physics a table was built against
+def fingerprint(geometry, grids=(POWERGRID, ANGLEGRID, WINDSPEEDGRID,
+                                 WINDANGLEGRID)):
+    parts = [TABLEVERSION, physics.RULES, physics.WINWIDTH,
+             physics.WINHEIGHT, physics.GRAVITY, physics.FRICTION,
+             physics.BALLRADIUS, physics.ROTATIONS, physics.MAXHITS, grids]
+    for key in sorted(geometry):
+        parts.append((key, tuple(geometry[key])))
+    return hashlib.sha256(repr(parts).encode()).digest()
+
+
+# Sample values along one axis of the grid
+def grid_values(grid, wraps=False):
+    steps, low, high = grid
+    if steps == 1:
+        return [low]
+    span = steps if wraps else steps - 1
+    return [low + (high - low) * i / span for i in range(steps)]
+
+
+# Index of the cell nearest to a value along one axis
+def grid_index(value, grid, wraps=False):
+    steps, low, high = grid
+    if wraps:
+        index = int(round((value - low) / (high - low) * steps)) % steps
+    else:
+        index = int(round((value - low) / (high - low) * (steps - 1)))
+        index = min(max(index, 0), steps - 1)
+    return index
+
+
+# Read-only view of a table file
+class ShotTable:
+
+    def __init__(self, path, geometry=None):
+        if geometry is None:
+            geometry = physics.make_geometry()
+        self.file = open(path, 'rb')
+        try:
+            self.data = mmap.mmap(self.file.fileno(), 0,
+                                  access=mmap.ACCESS_READ)
+        except ValueError:
+            # Empty file
+            self.file.close()
+            raise ValueError('{0} is not a shot table'.format(path))
+        self.grids = (POWERGRID, ANGLEGRID, WINDSPEEDGRID, WINDANGLEGRID)
+
+        if len(self.data) < HEADER.size:
+            self.close()
+            raise ValueError('{0} is not a shot table'.format(path))
+        magic, version, stamp, *steps = HEADER.unpack_from(self.data)
+        if magic != TABLEMAGIC or version != TABLEVERSION:
+            self.close()
+            raise ValueError('{0} is not a shot table'.format(path))
+        if stamp != fingerprint(geometry, self.grids)\
+           or tuple(steps) != tuple(grid[0] for grid in self.grids):
+            self.close()
+            raise ValueError('{0} was built for different goal '
+                             'geometry'.format(path))
+        if len(self.data) != HEADER.size + RECORD.size * 2 * steps[0]\
+           * steps[1] * steps[2] * steps[3]:
+            self.close()
+            raise ValueError('{0} is truncated'.format(path))
+
+        # Record strides of each axis, player first
+        self.strides = (steps[0] * steps[1] * steps[2] * steps[3],
+                        steps[1] * steps[2] * steps[3],
+                        steps[2] * steps[3],
+                        steps[3],
+                        1)
+
+    # Outcome of the cell nearest to a shot as (points, center, bounces)
+    def lookup(self, power, angle, windSpeed, windAngle, player=False):
+        cell = (bool(player) * self.strides[0]
+                + grid_index(power, POWERGRID) * self.strides[1]
+                + grid_index(angle, ANGLEGRID, True) * self.strides[2]
+                + grid_index(windSpeed, WINDSPEEDGRID) * self.strides[3]
+                + grid_index(windAngle, WINDANGLEGRID, True))
+        points, x, y, bounces = RECORD.unpack_from(
+            self.data, HEADER.size + cell * RECORD.size)
+        return points, (x, y), bounces
+
+    # Points of every power and angle cell in the wind cell nearest to a
+    # wind, as one row of angles per power
+    def points_grid(self, windSpeed, windAngle, player=False):
+        strides = self.strides
+        base = (bool(player) * strides[0]
+                + grid_index(windSpeed, WINDSPEEDGRID) * strides[3]
+                + grid_index(windAngle, WINDANGLEGRID, True))
+        rows = []
+        for power in range(POWERGRID[0]):
+            cell = base + power * strides[1]
+            rows.append([RECORD.unpack_from(
+                self.data, HEADER.size + (cell + angle * strides[2])
+                * RECORD.size)[0] for angle in range(ANGLEGRID[0])])
+        return rows
+
+    def close(self):
+        if self.data is not None:
+            self.data.close()
+            self.data = None
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+# Sweep the whole shot space and write the table to path
+def build_table(path=TABLEPATH, geometry=None, chunk=8):
+    import numpy as np
+    from batchsim import simulate_batch, shot_grid
+
+    if geometry is None:
+        geometry = physics.make_geometry()
+    grids = (POWERGRID, ANGLEGRID, WINDSPEEDGRID, WINDANGLEGRID)
+    powers = grid_values(POWERGRID)
+    angles = grid_values(ANGLEGRID, True)
+    windSpeeds = grid_values(WINDSPEEDGRID)
+    windAngles = grid_values(WINDANGLEGRID, True)
+    record = np.dtype([('points', '<u2'), ('x', '<i2'), ('y', '<i4'),
+                       ('bounces', 'u1')])
+
+    folder = os.path.dirname(path)
+    if folder:
+        os.makedirs(folder, exist_ok=True)
+
+    # Write to a scratch file first so readers never see half a table
+    scratch = path + '.tmp'
+    with open(scratch, 'wb') as tableFile:
+        tableFile.write(HEADER.pack(TABLEMAGIC, TABLEVERSION,
+                                    fingerprint(geometry, grids),
+                                    *(grid[0] for grid in grids)))
+        for player in (False, True):
+            for start in range(0, len(powers), chunk):
+                result = simulate_batch(*shot_grid(powers[start:start + chunk],
+                                                   angles, windSpeeds,
+                                                   windAngles, (player,)),
+                                        geometry=geometry)
+                rows = np.empty(result.points.size, dtype=record)
+                rows['points'] = result.points
+                rows['x'] = result.x
+                rows['y'] = result.y
+                rows['bounces'] = result.bounces
+                tableFile.write(rows.tobytes())
+    os.replace(scratch, path)
+
+
+# Open the table at path, or None if it has not been built or is stale.
+# Never builds it, which takes NumPy and a while.
+def open_table(path=TABLEPATH, geometry=None):
+    try:
+        return ShotTable(path, geometry)
+    except (OSError, ValueError):
+        return None
+
+
+# Open the table at path, rebuilding it first if it is missing or stale
+def load_table(path=TABLEPATH, geometry=None):
+    try:
+        return ShotTable(path, geometry)
+    except (OSError, ValueError):
+        build_table(path, geometry)
+        return ShotTable(path, geometry)
+
+
+if __name__ == '__main__':
+    path = sys.argv[1] if len(sys.argv) > 1 else TABLEPATH
+    start = perf_counter()
+    build_table(path)
+    print('Built {0} ({1} bytes) in {2:.1f} s'.format(
+        path, os.path.getsize(path), perf_counter() - start))
@@ -0,0 +1,144 @@
+# Paper Football League
+# Soak test
+# By Josh Klipstein
+#
+# Plays short games back to back with scripted clicks and no frame limit:
+# menu, play, a few shots, game over, then alternately restart or go back
+# to the main menu.  Stack depth and traced memory are sampled as it goes
+# and the run fails if either keeps growing.
+#
+#   python soak.py [games] [checkpoint]
+
+import os
+import sys
+import tracemalloc
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+import pygame as pg
+from pygame.locals import *
+
+import paper_football_league as pfl
+
+GAMETIME = 0.5 # Seconds per turn, so a game takes a handful of frames
+MEMORYSLACK = 256 * 1024 # Bytes the heap may grow by after warming up
+
+
+# Runs instead of the frame clock so the game goes as fast as it can
+class NoClock:
+    def tick(self, *args):
+        return 0
+
+    # Every frame counts as exactly one tick of game time
+    def get_time(self):
+        return 1000 * pfl.TICK
+
+
+# Feeds the game the clicks for whatever scene it is showing
+class Driver:
+
+    def __init__(self, games, checkpoint):
+        self.games = games
+        self.checkpoint = checkpoint
+        self.played = 0
+        self.frames = 0
+        self.inGameOver = False
+        self.maxDepth = 0
+        self.samples = [] # (games played, traced bytes, deepest stack)
+
+    def click(self, pos, button=MOUSEBUTTONUP):
+        return [pg.event.Event(MOUSEMOTION, pos=pos, rel=(0, 0), buttons=()),
+                pg.event.Event(button, pos=pos, button=1)]
+
+    def get(self, *args, **kwargs):
+        pg.event.pump()
+        self.frames += 1
+
+        # Track how deep the stack is whenever the game asks for events
+        depth = 0
+        frame = sys._getframe()
+        while frame is not None:
+            depth += 1
+            frame = frame.f_back
+        self.maxDepth = max(self.maxDepth, depth)
+
+        S = pfl.STATE
+        R = pfl.RECTDICT
+        if S.scene.menu:
+            if self.played >= self.games:
+                return [pg.event.Event(QUIT)]
+            S.config.gameTime = GAMETIME
+            S.config.players = 1 + self.played % 2
+            return self.click(R['play'].center)
+        if S.match.gameOver:
+            if not self.inGameOver:
+                self.inGameOver = True
+                self.played += 1
+                if self.played % self.checkpoint == 0:
+                    self.sample()
+            button = 'restart' if self.played % 2 else 'menuReturn'
+            return self.click(R[button].center, MOUSEBUTTONDOWN)
+        self.inGameOver = False
+
+        # Take a shot every few frames
+        step = self.frames % 4
+        center = S.ball.rect.center
+        if step == 0:
+            return self.click(center, MOUSEBUTTONDOWN)
+        if step == 1:
+            return [pg.event.Event(MOUSEMOTION, pos=(center[0] + 80,
+                                                     center[1] + 40),
+                                   rel=(0, 0), buttons=(1, 0, 0))]
+        if step == 2:
+            return [pg.event.Event(MOUSEBUTTONUP, pos=(center[0] + 80,
+                                                       center[1] + 40),
+                                   button=1)]
+        return []
+
+    # Never sleep on an idle screen, the next get has the next clicks
+    def wait(self, timeout=0):
+        return pg.event.Event(NOEVENT)
+
+    def sample(self):
+        traced = tracemalloc.get_traced_memory()[0]
+        self.samples.append((self.played, traced, self.maxDepth))
+        print('{0:>8} games {1:>10.1f} KB traced {2:>4} frames deep'.format(
+            self.played, traced / 1024, self.maxDepth), flush=True)
+
+
+def main(games=2000, checkpoint=200):
+    driver = Driver(games, checkpoint)
+    pg.event.get = driver.get
+    pg.event.wait = driver.wait
+    pg.time.Clock = NoClock
+
+    tracemalloc.start()
+    try:
+        pfl.initialize()
+    except SystemExit:
+        pass
+    tracemalloc.stop()
+
+    if len(driver.samples) < 2:
+        # The game quit early, most likely on missing files, or too few
+        # games were asked for to compare two checkpoints
+        print('FAIL: {0} games played, not enough for a verdict'.format(
+            driver.played))
+        return 1
+
+    # Compare against the first sample, once caches have warmed up
+    games, startBytes, startDepth = driver.samples[0]
+    games, endBytes, endDepth = driver.samples[-1]
+    print('{0} games, {1} frames: heap {2:+.1f} KB, stack {3:+d} frames'
+          .format(driver.played, driver.frames,
+                  (endBytes - startBytes) / 1024, endDepth - startDepth))
+    if endDepth > startDepth or endBytes - startBytes > MEMORYSLACK:
+        print('FAIL')
+        return 1
+    print('OK')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(*(int(arg) for arg in sys.argv[1:3])))
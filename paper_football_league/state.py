@@ -0,0 +1,352 @@
+# Paper Football League
+# Game state
+# By Josh Klipstein
+#
+# Everything the game keeps from frame to frame, split by how long it
+# lives: the options (GameConfig), which menu screen is up (SceneState),
+# the match being played (MatchState), the ball (BallState) and the goal
+# post geometry (GoalGeometry).  Each is a small class with __slots__, so
+# the game reads fixed attributes instead of looking strings up in one
+# shared dictionary, and a snapshot of the whole state for a replay or a
+# search is a few small copies.
+#
+#   python state.py [frames]     per-frame reads, memory and snapshots,
+#                                dictionaries against slots
+
+import sys
+import tracemalloc
+from copy import deepcopy
+from itertools import islice
+from time import perf_counter
+
+from physics import make_geometry, shot_steps
+
+# Match clock, shared with the league runner so its matches run as long as
+# the game's
+TIMERSTEP = .05 # Timer drop per tick
+AIMTICKS = 20 # Ticks the computer shows its arrow before shooting
+
+
+# Copy of a state value that shares nothing mutable with it
+def _copied(value):
+    if isinstance(value, list):
+        return [_copied(item) for item in value]
+    copy = getattr(value, 'copy', None)
+    return value if copy is None else copy()
+
+
+# Copy of any of the state classes below, slot by slot
+def copy_slots(state):
+    copy = object.__new__(type(state))
+    for name in type(state).__slots__:
+        setattr(copy, name, _copied(getattr(state, name)))
+    return copy
+
+
+# Options picked on the options screen
+class GameConfig:
+    __slots__ = ('players', 'gameTime', 'sound')
+
+    def __init__(self, players=1, gameTime=60, sound=True):
+        self.players = players
+        self.gameTime = gameTime # Seconds per half
+        self.sound = sound
+
+    copy = copy_slots
+
+
+# Which menu screen is showing, if any
+class SceneState:
+    __slots__ = ('menu', 'options', 'instruct', 'lobby', 'start')
+
+    def __init__(self):
+        self.menu = True
+        self.options = False
+        self.instruct = False
+        self.lobby = False # Waiting for the other side of a network match
+        self.start = True # Nothing has been shown yet
+
+    copy = copy_slots
+
+
+# Scores, clock, wind, messages and aiming for the match being played
+class MatchState:
+    __slots__ = ('player', 'scoreOne', 'scoreTwo', 'hiScore', 'timer',
+                 'windSpeed', 'windAngle', 'message', 'messageTime', 'messages',
+                 'gameOver', 'showHelp', 'shotLog', 'mousePos', 'draggingArrow',
+                 'aimTicks', 'power', 'launchAngle', 'ticks')
+
+    def __init__(self, hiScore=0):
+        self.player = False # False for player one, True for player two
+        self.scoreOne = 0
+        self.scoreTwo = 0
+        self.hiScore = hiScore
+        self.timer = 0
+        self.windSpeed = 0
+        self.windAngle = 0
+        self.message = 0 # Message on screen, 0 for none
+        self.messageTime = 0 # Milliseconds the message has been up
+        self.messages = [] # Banners waiting to show after it
+        self.gameOver = False
+        self.showHelp = True
+        self.shotLog = [] # Shots of this match, for the history
+        self.mousePos = (0, 0)
+        self.draggingArrow = False
+        self.aimTicks = 0
+        self.power = 50
+        self.launchAngle = 0
+        self.ticks = 0 # Ticks played this match, kept in step over a network
+
+    copy = copy_slots
+
+    # Back to the start of a match, keeping the hi-score
+    def reset(self):
+        self.__init__(self.hiScore)
+
+
+# The ball, and the shot it is flying if any.  launch holds the shot_steps
+# arguments of that shot and steps the frames flown so far, so a copy can
+# pick the flight up at the same frame.
+class BallState:
+    __slots__ = ('rect', 'rotation', 'radius', 'shot', 'launch', 'steps')
+
+    def __init__(self, rect, rotation=6, radius=60):
+        self.rect = rect
+        self.rotation = rotation
+        self.radius = radius
+        self.shot = None
+        self.launch = None
+        self.steps = 0
+
+    def fly(self, *launch):
+        self.shot = shot_steps(*launch)
+        self.launch = launch
+        self.steps = 0
+
+    # Copy with a fresh generator for the shot in flight.  Shots are
+    # deterministic, so replaying the frames flown lands on the same frame;
+    # that is at most a few dozen steps.
+    def copy(self):
+        ball = BallState(self.rect.copy(), self.rotation, self.radius)
+        if self.shot is not None:
+            ball.fly(*self.launch)
+            ball.steps = self.steps
+            for step in islice(ball.shot, self.steps):
+                pass
+        return ball
+
+
+# Goal post rects for both players.  Indexing by name works too, so it can
+# be handed to physics in place of make_geometry's dictionary.
+class GoalGeometry:
+    __slots__ = ('goal', 'goal2', 'goalArea', 'goalAreaTwo', 'brickAreaOne',
+                 'brickAreaTwo', 'brickAreaThree', 'brickAreaFour')
+
+    def __init__(self, boxes):
+        for name in self.__slots__:
+            setattr(self, name, boxes[name])
+
+    def __getitem__(self, name):
+        return getattr(self, name)
+
+    copy = copy_slots
+
+
+class GameState:
+    __slots__ = ('config', 'scene', 'match', 'ball', 'goals')
+
+    def __init__(self, ballRect, hiScore=0):
+        self.config = GameConfig()
+        self.scene = SceneState()
+        self.match = MatchState(hiScore)
+        self.ball = BallState(ballRect)
+        self.goals = None # Set up once the goal images are loaded
+
+    # Copy of everything, sharing nothing the game changes
+    def snapshot(self):
+        return copy_slots(self)
+
+    # Go back to a snapshot, which stays usable for another restore.  The
+    # parts are filled in where they are, so the game's references to
+    # them stay good.
+    def restore(self, snapshot):
+        for name in self.__slots__:
+            part = getattr(self, name)
+            saved = _copied(getattr(snapshot, name))
+            if part is None or saved is None:
+                setattr(self, name, saved)
+                continue
+            for slot in type(part).__slots__:
+                setattr(part, slot, getattr(saved, slot))
+
+
+# The game's variable and rect dictionaries as they were before GameState,
+# for the benchmark
+def _old_state(pg):
+    VARIABLEDICT = {'mousePos': (0, 0), 'draggingArrow': False,
+                    'aimTicks': 0, 'power': 50, 'launchAngle': 0,
+                    'scoreOne': 0, 'scoreTwo': 0, 'hiScore': 0,
+                    'gameTime': 60, 'timer': 60, 'windSpeed': 0,
+                    'windAngle': 0, 'ballSpeed': 0, 'message': 0,
+                    'rotation': 6, 'radius': 60, 'gameOver': False,
+                    'showHelp': True, 'menu': False, 'options': False,
+                    'instruct': False, 'players': 1, 'player': False,
+                    'sound': False, 'start': False, 'shotLog': [],
+                    'shot': None}
+    RECTDICT = {key: pg.Rect(box) for key, box in make_geometry().items()}
+    RECTDICT['football'] = pg.Rect(840, 540, 120, 120)
+    return VARIABLEDICT, RECTDICT
+
+
+def _new_state(pg):
+    STATE = GameState(pg.Rect(840, 540, 120, 120))
+    STATE.scene.menu = STATE.scene.start = False
+    STATE.config.sound = False
+    STATE.match.timer = 60
+    STATE.goals = GoalGeometry({key: pg.Rect(box) for key, box
+                                in make_geometry().items()})
+    return STATE
+
+
+# The state a game frame reads and writes outside of drawing: the checks
+# of redraw_window, write_info, draw_wind and draw_arrow, one tick of
+# update_game and a step of fly_ball, written against the dictionaries
+def _old_frame(VARIABLEDICT, RECTDICT, steps):
+    if not (VARIABLEDICT['menu'] or VARIABLEDICT['options']
+            or VARIABLEDICT['instruct']):
+        key = (VARIABLEDICT['scoreOne'], VARIABLEDICT['scoreTwo'],
+               VARIABLEDICT['hiScore'], VARIABLEDICT['timer'],
+               VARIABLEDICT['player'], VARIABLEDICT['windSpeed'],
+               VARIABLEDICT['windAngle'], VARIABLEDICT['rotation'],
+               RECTDICT['football'].center, VARIABLEDICT['message'],
+               VARIABLEDICT['gameOver'])
+        if VARIABLEDICT['draggingArrow']:
+            key = (VARIABLEDICT['mousePos'], VARIABLEDICT['power'],
+                   VARIABLEDICT['launchAngle'], RECTDICT['football'].center)
+    if VARIABLEDICT['shot'] is None:
+        VARIABLEDICT['shotLog'].append([VARIABLEDICT['player'], 0, 0, 0])
+        VARIABLEDICT['shot'] = iter(steps)
+    try:
+        center, rotation, events = next(VARIABLEDICT['shot'])
+    except StopIteration:
+        VARIABLEDICT['shot'] = None
+    else:
+        scoreKey = 'scoreTwo' if VARIABLEDICT['player'] else 'scoreOne'
+        shot = VARIABLEDICT['shotLog'][-1]
+        shot[3] += 1
+        for event in events:
+            if event == 'score':
+                VARIABLEDICT[scoreKey] += 10
+                shot[1] += 10
+            else:
+                shot[2] += 1
+        RECTDICT['football'].center = center
+        VARIABLEDICT['rotation'] = rotation
+    VARIABLEDICT['timer'] -= .05
+    if VARIABLEDICT['timer'] < 0:
+        VARIABLEDICT['timer'] = 60
+    if VARIABLEDICT['shot'] is None and not VARIABLEDICT['player']:
+        RECTDICT['goal'].midbottom = (300, 710)
+    return VARIABLEDICT['player'] and VARIABLEDICT['players'] == 1
+
+
+# The same frame against GameState
+def _new_frame(STATE, steps):
+    scene = STATE.scene
+    match = STATE.match
+    ball = STATE.ball
+    if not (scene.menu or scene.options or scene.instruct):
+        key = (match.scoreOne, match.scoreTwo, match.hiScore, match.timer,
+               match.player, match.windSpeed, match.windAngle, ball.rotation,
+               ball.rect.center, match.message, match.gameOver)
+        if match.draggingArrow:
+            key = (match.mousePos, match.power, match.launchAngle,
+                   ball.rect.center)
+    if ball.shot is None:
+        match.shotLog.append([match.player, 0, 0, 0])
+        ball.shot = iter(steps)
+    try:
+        center, rotation, events = next(ball.shot)
+    except StopIteration:
+        ball.shot = None
+    else:
+        shot = match.shotLog[-1]
+        shot[3] += 1
+        for event in events:
+            if event == 'score':
+                if match.player:
+                    match.scoreTwo += 10
+                else:
+                    match.scoreOne += 10
+                shot[1] += 10
+            else:
+                shot[2] += 1
+        ball.rect.center = center
+        ball.rotation = rotation
+    match.timer -= .05
+    if match.timer < 0:
+        match.timer = 60
+    if ball.shot is None and not match.player:
+        STATE.goals.goal.midbottom = (300, 710)
+    return match.player and STATE.config.players == 1
+
+
+# Bytes allocated while building a state
+def _traced_bytes(build):
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    state = build()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return after - before, state
+
+
+def benchmark(frames=200000):
+    import pygame as pg
+
+    steps = list(shot_steps(120, .4, 20, 1.0, False, make_geometry()))
+    oldBytes, (VARIABLEDICT, RECTDICT) = _traced_bytes(lambda: _old_state(pg))
+    newBytes, STATE = _traced_bytes(lambda: _new_state(pg))
+
+    timings = []
+    for frame in (lambda: _old_frame(VARIABLEDICT, RECTDICT, steps),
+                  lambda: _new_frame(STATE, steps)):
+        best = float('inf')
+        for repeat in range(5):
+            start = perf_counter()
+            for i in range(frames // 5):
+                frame()
+            best = min(best, (perf_counter() - start) / (frames // 5))
+        timings.append(best)
+
+    # Snapshots mid flight.  A deep copy can not copy the dictionaries'
+    # shot generator, so it is left out of theirs.
+    shot = VARIABLEDICT['shot']
+    VARIABLEDICT['shot'] = None
+    VARIABLEDICT['shotLog'] = VARIABLEDICT['shotLog'][-3:]
+    start = perf_counter()
+    for i in range(2000):
+        deepcopy((VARIABLEDICT, RECTDICT))
+    oldSnapshot = (perf_counter() - start) / 2000
+    VARIABLEDICT['shot'] = shot
+    STATE.match.shotLog = STATE.match.shotLog[-3:]
+    STATE.ball.fly(120, .4, 20, 1.0, False, STATE.goals)
+    for i in range(len(steps) // 2):
+        next(STATE.ball.shot)
+        STATE.ball.steps += 1
+    start = perf_counter()
+    for i in range(2000):
+        STATE.snapshot()
+    newSnapshot = (perf_counter() - start) / 2000
+
+    print('{0:<28}{1:>14}{2:>14}'.format('', 'dictionaries', 'GameState'))
+    print('{0:<28}{1:>11.0f} ns{2:>11.0f} ns'.format(
+        'state reads per frame', 1e9 * timings[0], 1e9 * timings[1]))
+    print('{0:<28}{1:>11.0f} B {2:>11.0f} B'.format(
+        'state memory', oldBytes, newBytes))
+    print('{0:<28}{1:>11.1f} us{2:>11.1f} us'.format(
+        'snapshot', 1e6 * oldSnapshot, 1e6 * newSnapshot))
+
+
+if __name__ == '__main__':
+    benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 200000)
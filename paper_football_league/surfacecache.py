@@ -0,0 +1,202 @@
+# Paper Football League
+# Preprocessed image cache
+# By Josh Klipstein
+#
+# Decoding the images and resampling the background is most of what startup
+# costs.  Each image is kept on disk the way the game draws it: decoded,
+# scaled and in the display's pixel format, stored as its raw pixel rows
+# behind a small header.  A later start reads the rows straight into a new
+# surface, with nothing to decode, resample or convert.
+#
+# An entry is named after a hash of its source files' contents, the size it
+# was scaled to and the display's pixel format, so changing an image or
+# starting on a display with another format misses the cache and makes the
+# image again.  Every cache file and conversion works without touching the
+# display once the cache is made, so images load on the loader thread.
+#
+#   python surfacecache.py [runs]     image load times, cold and cached
+
+import hashlib
+import os
+import struct
+import sys
+import tempfile
+from time import perf_counter
+
+import pygame as pg
+from pygame.locals import *
+
+from assets import (convert_image, frame_paths, load_frames, load_scaled,
+                    make_atlas, pack_frames)
+
+CACHEPATH = 'data/surfaces'
+VERSION = 1
+MAGIC = b'PFLS'
+# Magic, version, bits per pixel, width, height, pitch, RGBA masks
+HEADER = struct.Struct('<4sHHIII4I')
+SUFFIX = '.surf'
+
+
+class SurfaceCache:
+
+    # Needs the display mode set, for its pixel formats
+    def __init__(self, folder=CACHEPATH):
+        self.folder = folder
+        # One pixel surfaces in the display format, opaque and see-through
+        self.formats = {False: pg.Surface((1, 1)).convert(),
+                        True: pg.Surface((1, 1), SRCALPHA).convert_alpha()}
+        self.stats = {'hits': 0, 'misses': 0}
+        self.error = None # Last error saving an entry, images still load
+
+    # Entry name for an image made from sources with params
+    def key(self, name, sources, alpha, params=()):
+        digest = hashlib.blake2b(digest_size=16)
+        format = self.formats[alpha]
+        digest.update(repr((VERSION, alpha, format.get_bitsize(),
+                            format.get_masks(), params)).encode())
+        for path in sources:
+            with open(path, 'rb') as file:
+                digest.update(file.read())
+        return '{0}-{1}'.format(name, digest.hexdigest())
+
+    def path(self, key):
+        return os.path.join(self.folder, key + SUFFIX)
+
+    # Surface stored under key, or None if there is none or it is unusable
+    def read(self, key):
+        try:
+            with open(self.path(key), 'rb') as file:
+                header = file.read(HEADER.size)
+                if len(header) != HEADER.size:
+                    return None
+                magic, version, bitsize, width, height, pitch, *masks = (
+                    HEADER.unpack(header))
+                if magic != MAGIC or version != VERSION:
+                    return None
+                surface = pg.Surface((width, height),
+                                     SRCALPHA if masks[3] else 0, bitsize,
+                                     masks)
+                if surface.get_pitch() != pitch:
+                    return None
+                # Read the rows straight into the surface's pixels
+                if (file.readinto(surface.get_buffer()) != pitch * height
+                        or file.read(1)):
+                    return None
+        except OSError:
+            return None
+        return surface
+
+    # Store a surface under key, replacing older entries of the same image
+    def write(self, key, surface):
+        width, height = surface.get_size()
+        header = HEADER.pack(MAGIC, VERSION, surface.get_bitsize(), width,
+                             height, surface.get_pitch(), *surface.get_masks())
+        name = key.rsplit('-', 1)[0] + '-'
+        try:
+            os.makedirs(self.folder, exist_ok=True)
+            temp = self.path(key) + '.tmp'
+            with open(temp, 'wb') as file:
+                file.write(header)
+                file.write(surface.get_buffer().raw)
+            os.replace(temp, self.path(key))
+            for entry in os.listdir(self.folder):
+                if (entry.startswith(name) and entry.endswith(SUFFIX)
+                        and entry != key + SUFFIX):
+                    os.remove(os.path.join(self.folder, entry))
+        except OSError as error:
+            self.error = error
+            print('Could not cache image:', error, file=sys.stderr)
+
+    # An image in the display format, from the cache or else made by
+    # make() and cached for next time
+    def get(self, name, sources, make, alpha=False, params=()):
+        key = self.key(name, sources, alpha, params)
+        surface = self.read(key)
+        if surface is not None:
+            self.stats['hits'] += 1
+            return surface
+        self.stats['misses'] += 1
+        surface = make().convert(self.formats[alpha])
+        self.write(key, surface)
+        return surface
+
+    # Loader functions
+
+    def image(self, path, alpha=False):
+        return self.get(os.path.basename(path), [path],
+                        lambda: pg.image.load(path), alpha)
+
+    def scaled(self, path, size):
+        return self.get(os.path.basename(path), [path],
+                        lambda: load_scaled(path, size), False, tuple(size))
+
+    # The football rotation frames packed into one atlas
+    def atlas(self, folder='images'):
+        paths = frame_paths(folder)
+        return self.get('football', paths, lambda: pack_frames(
+            [pg.image.load(path) for path in paths]), True)
+
+
+# The game's images through a cache
+def load_all(cache):
+    return [cache.image('images/pfootball.png'),
+            cache.image('images/pfootball2.png'),
+            cache.image('images/pfootinstruct.png'),
+            cache.scaled('images/pfootback.tif', (1200, 660)),
+            cache.atlas('images'),
+            cache.image('images/gp.png', True),
+            cache.image('images/gp2.png', True)]
+
+
+# The game's images decoded and converted without a cache
+def load_uncached():
+    return [convert_image(pg.image.load('images/pfootball.png')),
+            convert_image(pg.image.load('images/pfootball2.png')),
+            convert_image(pg.image.load('images/pfootinstruct.png')),
+            convert_image(load_scaled('images/pfootback.tif', (1200, 660))),
+            make_atlas(load_frames('images'))[0],
+            convert_image(pg.image.load('images/gp.png'), True),
+            convert_image(pg.image.load('images/gp2.png'), True)]
+
+
+# Time loading the game's images with no cache, an empty cache and a full
+# one, and check the cached images come back exactly as they were made
+def benchmark(runs=10):
+    pg.init()
+    pg.display.set_mode((1200, 660))
+    with tempfile.TemporaryDirectory() as folder:
+        timings = {'no cache': [], 'cold': [], 'cached': []}
+        for run in range(runs):
+            start = perf_counter()
+            load_uncached()
+            timings['no cache'].append(perf_counter() - start)
+
+            for entry in os.listdir(folder):
+                os.remove(os.path.join(folder, entry))
+            cache = SurfaceCache(folder)
+            start = perf_counter()
+            made = load_all(cache)
+            timings['cold'].append(perf_counter() - start)
+
+            cache = SurfaceCache(folder)
+            start = perf_counter()
+            cached = load_all(cache)
+            timings['cached'].append(perf_counter() - start)
+            assert cache.stats['misses'] == 0, cache.stats
+
+        same = all(image.get_flags() == copy.get_flags()
+                   and pg.image.tobytes(image, 'RGBA')
+                   == pg.image.tobytes(copy, 'RGBA')
+                   for image, copy in zip(made, cached))
+        size = sum(os.path.getsize(os.path.join(folder, entry))
+                   for entry in os.listdir(folder))
+    print('{0} images, {1:.0f} KB cached, identical: {2}'.format(
+        len(made), size / 1024, 'yes' if same else 'NO'))
+    for name, seconds in timings.items():
+        print('  {0:<10}{1:>8.1f} ms (best of {2})'.format(
+            name, 1000 * min(seconds), runs))
+    pg.quit()
+
+
+if __name__ == '__main__':
+    benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 10)
@@ -0,0 +1,36 @@
+# Paper Football League
+# Test setup
+# By Josh Klipstein
+#
+# The game's modules sit flat in the folder above and find their images and
+# sounds relative to it, so tests import from there and any test that loads
+# assets runs from there.  SDL gets its dummy drivers, nothing opens a
+# window or needs a sound card.
+
+import os
+import subprocess
+import sys
+
+import pytest
+
+GAMEFOLDER = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, GAMEFOLDER)
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+
+
+# Run one of the game's scripts, or Python code, in a fresh interpreter from
+# the game's folder, headless.  The game patches pygame to be driven, so
+# every run gets its own process.  Skips when the game can not start for
+# want of its images and sounds.
+def run_game(*args, timeout=300):
+    environment = dict(os.environ, SDL_VIDEODRIVER='dummy',
+                       SDL_AUDIODRIVER='dummy', PYGAME_HIDE_SUPPORT_PROMPT='1')
+    result = subprocess.run([sys.executable] + list(args), cwd=GAMEFOLDER,
+                            env=environment, capture_output=True, text=True,
+                            timeout=timeout)
+    if ('Necessary files not found!' in result.stdout
+            or 'could not load its images and sounds' in result.stderr):
+        pytest.skip('the game\'s images and sounds are not all here')
+    return result
@@ -0,0 +1,36 @@
+import pytest
+
+from netplay import PORT
+from paper_football_league import parse_arguments
+
+
+def test_options():
+    args = parse_arguments(['--difficulty', 'hard', '--window', '800x450',
+                            '--join', 'example.org:4000', '--no-history'])
+    assert args.difficulty == 'hard'
+    assert args.window == (800, 450)
+    assert args.join == ('example.org', 4000) and args.host is None
+    assert args.no_history and not args.profile
+    assert parse_arguments(['--join', 'example.org']).join == (
+        'example.org', PORT)
+    assert parse_arguments(['--host']).host == PORT
+    assert parse_arguments([]).difficulty == 'normal'
+
+
+# Mistakes on the command line are reported on stderr, not as a traceback
+@pytest.mark.parametrize('argv', [
+    ['--difficulty'],
+    ['--difficulty', 'impossible'],
+    ['--window', 'big'],
+    ['--window', '10x10'],
+    ['--join', ':4000'],
+    ['--join', 'example.org:99999'],
+    ['--host', '--join', 'example.org'],
+    ['--record', 'session.pflr', '--host'],
+])
+def test_usage_errors(argv, capsys):
+    with pytest.raises(SystemExit) as exit:
+        parse_arguments(argv)
+    assert exit.value.code == 2
+    output = capsys.readouterr()
+    assert output.out == '' and 'error:' in output.err
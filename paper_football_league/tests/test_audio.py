@@ -0,0 +1,29 @@
+import inspect
+import os
+import subprocess
+import sys
+
+from audio import NULLSOUND, AudioManager, NullAudio
+
+from conftest import GAMEFOLDER
+
+
+# Without a sound device the game gets a NullAudio, which has to take the
+# same calls the game and the memory report make on an AudioManager
+def test_null_audio_matches_manager():
+    for name in ('load', 'wrap', 'stop', 'resident_bytes'):
+        assert (inspect.signature(getattr(NullAudio, name))
+                == inspect.signature(getattr(AudioManager, name)))
+    audio = NullAudio()
+    assert audio.load('sounds/any.wav', 0) is NULLSOUND
+    assert audio.resident_bytes() == 0
+
+
+def test_memory_report_without_audio_device():
+    environment = dict(os.environ, SDL_AUDIODRIVER='nosuchdriver')
+    result = subprocess.run([sys.executable, 'audio.py'], cwd=GAMEFOLDER,
+                            env=environment, capture_output=True, text=True,
+                            timeout=60)
+    assert result.returncode == 0, result.stderr
+    assert 'No audio device' in result.stderr
+    assert result.stdout.splitlines()[-1].startswith('total')
@@ -0,0 +1,44 @@
+from math import pi
+from random import Random
+
+import pytest
+
+np = pytest.importorskip('numpy')
+
+from batchsim import shot_grid, simulate_batch
+from physics import make_geometry, simulate_shot
+
+
+# Random shots over the whole power, angle and wind range for both players
+def random_shots(count, seed):
+    rng = Random(seed)
+    return [(rng.uniform(0, 200), rng.uniform(0, 2 * pi),
+             rng.uniform(0, 100), rng.uniform(0, 2 * pi), rng.random() < .5)
+            for i in range(count)]
+
+
+# The batch simulator has to land every shot exactly where the plain one
+# does, bounces, goals and all
+@pytest.mark.parametrize('seed', [1, 2, 3])
+def test_batch_matches_shot_steps(seed):
+    geometry = make_geometry()
+    shots = random_shots(8000, seed)
+    batch = simulate_batch(*zip(*shots), geometry=geometry)
+    for i, shot in enumerate(shots):
+        result = simulate_shot(*shot, geometry, record=False)
+        assert (batch.points[i], (batch.x[i], batch.y[i]), batch.rotation[i],
+                batch.bounces[i], batch.steps[i]) == (
+            result.points, result.center, result.rotation, result.bounces,
+            result.steps), shot
+
+
+def test_grid_shape():
+    geometry = make_geometry()
+    shots = shot_grid(np.linspace(20, 200, 4), np.linspace(0, 2 * pi, 5),
+                      [0, 50], [0, pi])
+    batch = simulate_batch(*shots, geometry=geometry)
+    assert batch.points.shape == (2 * 4 * 5 * 2 * 2,)
+    power, angle, windSpeed, windAngle, player = (value[7] for value in shots)
+    assert batch.steps[7] == simulate_shot(power, angle, windSpeed, windAngle,
+                                           bool(player), geometry,
+                                           record=False).steps
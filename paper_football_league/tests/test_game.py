@@ -0,0 +1,138 @@
+# Whole-game checks: a recorded session replays to the same scores, long
+# runs do not leak, and drawing only the dirty parts of the screen gives
+# the same picture as drawing all of it.  Each runs the real game headless
+# in its own process.
+
+import pytest
+
+from conftest import run_game
+
+# Plays a one player game against the computer at the level given with
+# scripted clicks, recording it, and closes the window partway through
+SESSION = '''
+import sys
+from random import Random
+
+import pygame as pg
+from pygame.locals import *
+
+import paper_football_league as pfl
+from recording import Recorder
+
+FRAMES = 900
+rng = Random(2)
+frames = [0]
+
+
+# Whole milliseconds a frame, like pygame's clock, with some long frames
+# for the game to catch up on
+class Clock:
+    time = 33
+
+    def tick(self, *args):
+        self.time = rng.choice((16, 33, 33, 34, 50, 300))
+        return self.time
+
+    def get_time(self):
+        return self.time
+
+
+def click(pos, button=MOUSEBUTTONUP):
+    return [pg.event.Event(MOUSEMOTION, pos=pos, rel=(0, 0), buttons=()),
+            pg.event.Event(button, pos=pos, button=1)]
+
+
+def get(*args, **kwargs):
+    pg.event.pump()
+    frames[0] += 1
+    if frames[0] > FRAMES:
+        return [pg.event.Event(QUIT)]
+    if pfl.STATE.scene.menu:
+        return click(pfl.RECTDICT['play'].center)
+    x, y = pfl.STATE.ball.rect.center
+    step = frames[0] % 5
+    if step == 0:
+        return click((x, y), MOUSEBUTTONDOWN)
+    if step == 1:
+        pull = (x + rng.randint(-150, 150), y + rng.randint(-60, 100))
+        return [pg.event.Event(MOUSEMOTION, pos=pull, rel=(0, 0),
+                               buttons=(1, 0, 0)),
+                pg.event.Event(MOUSEBUTTONUP, pos=pull, button=1)]
+    return []
+
+
+pg.event.get = get
+pg.event.wait = lambda timeout=0: pg.event.Event(NOEVENT)
+pg.time.Clock = Clock
+recorder = Recorder(sys.argv[1])
+try:
+    pfl.initialize(recorder=recorder, difficulty=sys.argv[2])
+except SystemExit:
+    pass
+print('scores', recorder.recording.scores)
+'''
+
+# Redraws random game frames twice, once from whatever is dirty and once
+# in full, and counts the frames where the two differ
+DIRTYRECTS = '''
+from random import Random
+
+import pygame as pg
+
+import bench
+import paper_football_league as pfl
+
+STATE, RECTDICT, IMGDICT, FONTDICT, SOUNDDICT = bench.boot()
+STATE.scene.menu = False
+match = STATE.match
+rng = Random(3)
+mismatched = 0
+for frame in range(300):
+    if frame % 50 == 0:
+        match.windSpeed = rng.uniform(0, 100)
+        match.windAngle = rng.uniform(0, 6.28)
+    match.player = frame >= 150
+    match.timer = 60 - frame * pfl.TIMERSTEP
+    if frame % 30 == 0:
+        match.scoreOne += 10
+    match.gameOver = frame >= 250
+    match.draggingArrow = 20 < frame < 90 or 170 < frame < 210
+    match.mousePos = (rng.randint(0, 1200), rng.randint(0, 660))
+    match.power = rng.uniform(10, 200)
+    match.launchAngle = rng.uniform(0, 6.28)
+    STATE.ball.rect.center = (rng.randint(60, 1140), rng.randint(-100, 600))
+    STATE.ball.rotation = rng.randint(0, 23)
+    pfl.redraw_window(STATE, RECTDICT, IMGDICT)
+    dirty = pg.image.tostring(pfl.DISPLAYSURF, 'RGB')
+    pfl.SCREENDICT['full'] = True
+    pfl.redraw_window(STATE, RECTDICT, IMGDICT)
+    if pg.image.tostring(pfl.DISPLAYSURF, 'RGB') != dirty:
+        mismatched += 1
+print('mismatched frames', mismatched)
+'''
+
+
+# The computer searches differently on each level, so a replay has to play
+# against the level that was recorded
+@pytest.mark.parametrize('difficulty', ['normal', 'hard'])
+def test_recorded_session_replays(tmp_path, difficulty):
+    path = str(tmp_path / 'session.pflr')
+    recorded = run_game('-c', SESSION, path, difficulty)
+    assert recorded.returncode == 0, recorded.stderr
+    assert 'scores [' in recorded.stdout
+
+    replayed = run_game('replay.py', path)
+    assert replayed.returncode == 0, replayed.stdout + replayed.stderr
+    assert replayed.stdout.rstrip().endswith('OK')
+
+
+def test_soak():
+    result = run_game('soak.py', '30', '10')
+    assert result.returncode == 0, result.stdout + result.stderr
+    assert result.stdout.rstrip().endswith('OK')
+
+
+def test_dirty_rects_match_full_redraw():
+    result = run_game('-c', DIRTYRECTS)
+    assert result.returncode == 0, result.stderr
+    assert 'mismatched frames 0' in result.stdout
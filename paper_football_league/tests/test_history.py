@@ -0,0 +1,87 @@
+import sqlite3
+
+import pytest
+
+from history import SCHEMAVERSION, HistoryStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = HistoryStore(str(tmp_path / 'history.db'))
+    yield store
+    store.close()
+
+
+def test_match_and_shots_are_saved(store):
+    store.record_match(60, [('Player One', True, 30),
+                            ('Computer (hard)', False, 50)],
+                       [('Player One', 120.0, 1.5, 40.0, 3.0, 10, 1, 6),
+                        ('Computer (hard)', 90.0, 2.0, 40.0, 3.0, 0, 0, 4)],
+                       played=1000.0)
+    store.flush()
+    assert store.saved == 1 and store.error is None
+    assert store.reader.execute(
+        'SELECT played, gameTime, players, scoreOne, scoreTwo FROM matches'
+    ).fetchall() == [(1000.0, 60, 1, 30, 50)]
+    assert store.shots(1) == [
+        ('Player One', 1, 120.0, 1.5, 40.0, 3.0, 10, 1, 6),
+        ('Computer (hard)', 2, 90.0, 2.0, 40.0, 3.0, 0, 0, 4)]
+
+
+# A player's best per time limit only ever goes up, and the high score only
+# counts people
+def test_bests_keep_the_highest_score(store):
+    for score in (40, 70, 20):
+        store.record_match(60, [('Player One', True, score),
+                                ('Computer (hard)', False, 200)])
+    store.record_match(180, [('Player One', True, 90)])
+    store.flush()
+    assert store.best('Player One', 60) == 70
+    assert store.best('Player One', 180) == 90
+    assert store.best('Player One') == 90
+    assert store.best('Player Two', 60) is None
+    assert store.high_score() == 90
+
+
+def test_high_score_starts_at_zero(store):
+    assert store.high_score() == 0
+
+
+def test_leaderboard_is_ordered_by_score(store):
+    for played, (one, two) in enumerate([(30, 10), (80, 50), (0, 60)]):
+        store.record_match(60, [('Player One', True, one),
+                                ('Player Two', True, two)], played=played)
+    store.record_match(300, [('Player One', True, 500)], played=9)
+    store.flush()
+    assert store.leaderboard(60, 3) == [('Player One', 80, 1.0),
+                                        ('Player Two', 60, 2.0),
+                                        ('Player Two', 50, 1.0)]
+    assert store.leaderboard(60, player='Player One') == [
+        ('Player One', 80, 1.0), ('Player One', 30, 0.0),
+        ('Player One', 0, 2.0)]
+    assert store.leaderboard(300) == [('Player One', 500, 9.0)]
+
+
+# Closing waits for the writer thread to save everything still queued
+def test_close_saves_queued_matches(tmp_path):
+    path = str(tmp_path / 'history.db')
+    store = HistoryStore(path)
+    for i in range(500):
+        store.record_match(60, [('Player One', True, i)], played=i)
+    store.close()
+    assert not store.thread.is_alive()
+
+    reopened = HistoryStore(path)
+    assert reopened.reader.execute(
+        'SELECT COUNT(*) FROM matches').fetchone()[0] == 500
+    assert reopened.best('Player One', 60) == 499
+    reopened.close()
+
+
+def test_newer_files_are_refused(tmp_path):
+    path = str(tmp_path / 'history.db')
+    connection = sqlite3.connect(path)
+    connection.execute('PRAGMA user_version = {0}'.format(SCHEMAVERSION + 1))
+    connection.close()
+    with pytest.raises(ValueError):
+        HistoryStore(path)
@@ -0,0 +1,31 @@
+import json
+
+import pytest
+
+import league
+
+
+@pytest.mark.parametrize('bot', ['foo', 'foo=', '=module:factory'])
+def test_bot_needs_name_and_factory(bot, capsys):
+    with pytest.raises(SystemExit) as exit:
+        league.main(['--bots', 'easy,random', '--bot', bot])
+    assert exit.value.code == 2
+    assert 'NAME=MODULE:FACTORY' in capsys.readouterr().err
+
+
+def test_unknown_bot_is_a_usage_error(capsys):
+    with pytest.raises(SystemExit) as exit:
+        league.main(['--bots', 'easy,nobody'])
+    assert exit.value.code == 2
+    assert "unknown bot 'nobody'" in capsys.readouterr().err
+
+
+def test_season_table_matches_results(tmp_path):
+    path = str(tmp_path / 'league.jsonl')
+    specs = {'easy': 'easy', 'random': 'random'}
+    table = league.run_season(specs, rounds=2, workers=2, path=path, seed=5)
+    with open(path) as file:
+        results = [json.loads(line) for line in file]
+    assert sorted(result['match'] for result in results) == list(range(4))
+    assert table == league.standings(results, specs)
+    assert all(row['played'] == 4 for row in table.values())
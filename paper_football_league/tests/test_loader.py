@@ -0,0 +1,37 @@
+import io
+
+import pytest
+
+from loader import AssetLoader
+
+
+def test_groups_load_in_order_and_report(capsys):
+    loader = AssetLoader(report=True)
+    loader.add('menu', 'title', str.upper, 'title')
+    loader.add('game', 'ball', len, 'ball')
+    loader.start()
+    assert loader.wait('menu') == {'title': 'TITLE'}
+    assert loader.wait('game') == {'ball': 4}
+    loader.thread.join()
+
+    # The worker leaves the report to the main thread
+    assert capsys.readouterr().out == ''
+    loader.mark('first menu frame')
+    out = io.StringIO()
+    loader.print_report(out)
+    lines = out.getvalue().splitlines()
+    assert lines[0] == 'Startup timing (ms since start)'
+    assert lines[1].endswith('menu assets loaded')
+    assert lines[-2].endswith('menu/title')
+    assert lines[-1].endswith('game/ball')
+
+
+def test_failed_load_is_raised_on_wait():
+    loader = AssetLoader()
+    loader.add('menu', 'missing', open, 'no/such/file.png')
+    loader.add('game', 'ball', len, 'ball')
+    loader.start()
+    with pytest.raises(OSError):
+        loader.wait('menu')
+    with pytest.raises(OSError):
+        loader.wait('game')
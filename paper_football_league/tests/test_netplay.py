@@ -0,0 +1,23 @@
+import socket
+
+import pytest
+
+import netplay
+from conftest import GAMEFOLDER, run_game
+
+
+# A host and a guest play a short match over localhost in their own
+# processes and have to see the very same shots and scores
+def test_selftest(monkeypatch, capsys):
+    try:
+        with socket.socket() as probe:
+            probe.bind(('127.0.0.1', 0))
+            probe.listen()
+    except OSError:
+        pytest.skip('no sockets to play over')
+    run_game('-c', 'import bench; bench.boot()') # Skips without the assets
+    monkeypatch.chdir(GAMEFOLDER)
+    result = netplay.selftest(2.0)
+    output = capsys.readouterr().out
+    assert result == 0, output
+    assert output.rstrip().endswith('OK')
@@ -0,0 +1,85 @@
+import random
+from math import pi
+
+from opponent import LEVELS, MAXPOWER, MINPOWER, Opponent
+from physics import make_geometry, simulate_shot
+
+
+# Mean points the shots a level picks score in random, unquantized wind
+def points_per_shot(name, winds, geometry):
+    opponent = Opponent(name, True, geometry, random.Random(4))
+    return sum(simulate_shot(*opponent.choose(*wind), *wind, True, geometry,
+                             record=False).points
+               for wind in winds) / len(winds)
+
+
+# Changing the physics can quietly make an easier level score more than a
+# harder one, so the levels are played against each other in random wind
+def test_levels_stay_in_order():
+    rng = random.Random(7)
+    winds = [(rng.uniform(0, 100), rng.uniform(0, 2 * pi))
+             for i in range(300)]
+    geometry = make_geometry()
+    easy, normal, hard = (points_per_shot(name, winds, geometry)
+                          for name in ('easy', 'normal', 'hard'))
+    assert easy + 1 < normal < hard - 1, (easy, normal, hard)
+
+
+def test_choices_are_remembered_per_wind_bin():
+    opponent = Opponent('hard', True, make_geometry())
+    first = opponent.choose(42.0, 1.0)
+    assert opponent.choose(42.5, 1.01) == first
+    assert opponent.searches == 1 and opponent.lookups == 2
+    assert MINPOWER <= first[0] <= MAXPOWER
+
+
+def test_easier_levels_fumble_within_their_noise():
+    for name, level in LEVELS.items():
+        opponent = Opponent(name, True, make_geometry(), random.Random(1))
+        power, angle, points = opponent.search(*opponent.wind_bin(30, 2)[1])
+        for i in range(20):
+            shotPower, shotAngle = opponent.choose(30, 2)
+            assert MINPOWER <= shotPower <= MAXPOWER
+            assert abs(shotPower - power) <= power * level.powerNoise + 1e-9
+            assert abs(shotAngle - angle) <= level.angleNoise + 1e-9
+
+
+# A new wind bin is searched over several ticks, never more than a tick's
+# budget of shots at a time, and ends on the same shot as one search
+def test_thinking_is_spread_over_ticks(monkeypatch):
+    import opponent
+    simulated = [0]
+
+    def counted(*args, **kwargs):
+        simulated[0] += 1
+        return simulate_shot(*args, **kwargs)
+    monkeypatch.setattr(opponent, 'simulate_shot', counted)
+
+    thinker = Opponent('hard', True, make_geometry())
+    ticks = 0
+    shot = None
+    while shot is None:
+        simulated[0] = 0
+        shot = thinker.think(42.0, 1.0)
+        assert simulated[0] <= opponent.TICKBUDGET
+        ticks += 1
+    assert ticks > 1
+    assert thinker.searches == 1
+
+    searcher = Opponent('hard', True, make_geometry())
+    assert shot == searcher.search(*searcher.wind_bin(42.0, 1.0)[1])[:2]
+
+    # Known bins answer at once
+    simulated[0] = 0
+    assert thinker.think(42.5, 1.01) == shot
+    assert simulated[0] == 0
+
+
+def test_thinking_follows_the_wind():
+    thinker = Opponent('normal', True, make_geometry())
+    assert thinker.think(42.0, 1.0, budget=10) is None
+    assert thinker.think(80.0, 4.0, budget=10) is None
+    assert thinker.thinking[0] == thinker.wind_bin(80.0, 4.0)[0]
+    while thinker.think(80.0, 4.0) is None:
+        pass
+    assert list(thinker.memo) == [thinker.wind_bin(80.0, 4.0)[0]]
@@ -0,0 +1,35 @@
+import io
+
+from profiler import Profiler
+
+
+# Profiler that has seen a few frames, without timing any real ones
+def profiled(frames):
+    profiler = Profiler(True)
+    for i in range(frames + 1):
+        profiler.end_frame()
+    return profiler
+
+
+def test_summary_prints_cache_counters():
+    out = io.StringIO()
+    profiled(3).print_summary(out, {'text': {'hits': 9, 'misses': 3,
+                                             'evictions': 1, 'size': 2,
+                                             'hitRate': .75}})
+    lines = out.getvalue().splitlines()
+    assert lines[0].startswith('Frame profile: 3 frames')
+    assert lines[-1] == ('  text cache: 9 hits, 3 misses, 75.0% hit rate, '
+                         '1 evicted, 2 held')
+
+
+# Long sessions keep only their latest frames for the summary
+def test_session_samples_are_bounded():
+    profiler = Profiler(True, session=50)
+    for i in range(201):
+        profiler.end_frame()
+    assert profiler.frames == 200
+    assert all(len(samples) == 50 for samples in profiler.session.values())
+    out = io.StringIO()
+    profiler.print_summary(out)
+    assert out.getvalue().startswith('Frame profile: 200 frames')
+    assert 'over the last 50' in out.getvalue().splitlines()[0]
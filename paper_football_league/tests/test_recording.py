@@ -0,0 +1,67 @@
+import pygame as pg
+import pytest
+from pygame.locals import *
+
+from recording import (EVENTTYPES, MAXFRAMEMS, Recorder, Recording,
+                       load_recording)
+
+
+def test_frames_and_events_round_trip(tmp_path):
+    path = str(tmp_path / 'session.pflr')
+    recorder = Recorder(path, seed=1234)
+    recorder.frame([pg.event.Event(MOUSEMOTION, pos=(10, 20), rel=(1, 1),
+                                   buttons=(0, 0, 0)),
+                    pg.event.Event(MOUSEBUTTONDOWN, pos=(10, 20), button=1)],
+                   33)
+    recorder.frame([], 1000)
+    recorder.frame([pg.event.Event(MOUSEBUTTONUP, pos=(30, 40), button=1)],
+                   34)
+    recorder.score(20, 10)
+    recorder.recording.difficulty = 'hard'
+    recorder.recording.shotTable = True
+    recorder.save()
+
+    recording = load_recording(path)
+    assert recording.seed == 1234
+    assert recording.difficulty == 'hard' and recording.shotTable
+    assert list(recording.frameTimes) == [33, MAXFRAMEMS, 34]
+    assert recording.frames() == [[(MOUSEMOTION, 10, 20, 0),
+                                   (MOUSEBUTTONDOWN, 10, 20, 1)],
+                                  [],
+                                  [(MOUSEBUTTONUP, 30, 40, 1)]]
+    assert recording.scores == [(20, 10)]
+
+
+# Closing the window sends a QUIT with no position, it has to be recorded
+# as the frame the player quit on rather than read as a mouse event
+def test_quit_is_recorded(tmp_path):
+    path = str(tmp_path / 'quit.pflr')
+    recorder = Recorder(path, seed=1)
+    recorder.frame([pg.event.Event(MOUSEMOTION, pos=(5, 5), rel=(0, 0),
+                                   buttons=(0, 0, 0))], 33)
+    recorder.frame([pg.event.Event(QUIT)], 33)
+    recorder.save()
+
+    frames = load_recording(path).frames()
+    assert frames[1] == [(QUIT, 0, 0, 0)]
+
+
+def test_escape_is_recorded_as_quit():
+    recorder = Recorder(seed=1)
+    recorder.frame([pg.event.Event(KEYUP, key=K_ESCAPE, mod=0),
+                    pg.event.Event(KEYUP, key=K_a, mod=0)], 33)
+    assert recorder.recording.events == [(0, EVENTTYPES.index(QUIT),
+                                          0, 0, 0)]
+
+
+def test_other_files_are_refused(tmp_path):
+    path = tmp_path / 'not.pflr'
+    path.write_bytes(b'nothing here')
+    with pytest.raises(ValueError):
+        load_recording(str(path))
+
+    damaged = tmp_path / 'damaged.pflr'
+    Recording(seed=5).save(str(damaged))
+    damaged.write_bytes(damaged.read_bytes()[:-3])
+    with pytest.raises(ValueError):
+        load_recording(str(damaged))
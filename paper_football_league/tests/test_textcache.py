@@ -0,0 +1,16 @@
+import pygame as pg
+
+from textcache import TextCache
+
+
+def test_counters_follow_hits_misses_and_evictions():
+    pg.font.init()
+    font = pg.font.Font(None, 20)
+    cache = TextCache(maxSize=2)
+    first = cache.render(font, '10', 1, (0, 0, 0))
+    assert cache.render(font, '10', 1, [0, 0, 0]) is first
+    cache.render(font, '20', 1, (0, 0, 0))
+    cache.render(font, '30', 1, (0, 0, 0))
+    cache.render(font, '10', 1, (0, 0, 0))
+    assert cache.stats() == {'hits': 1, 'misses': 4, 'evictions': 2,
+                             'size': 2, 'hitRate': .2}
@@ -0,0 +1,51 @@
+# Paper Football League
+# Text surface cache
+# By Josh Klipstein
+#
+# Keeps rendered text surfaces around so the HUD does not rasterize the same
+# score, time and wind readouts every frame.  The least recently used
+# surface is dropped once the cache is full.
+
+from collections import OrderedDict
+
+
+class TextCache:
+
+    def __init__(self, maxSize=128):
+        self.maxSize = maxSize
+        self.surfaces = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    # Same arguments as Font.render, plus the font itself
+    def render(self, font, text, antialias, color, background=None):
+        key = (font, text, antialias, tuple(color),
+               None if background is None else tuple(background))
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            self.surfaces.move_to_end(key)
+            self.hits += 1
+            return surface
+
+        self.misses += 1
+        if background is None:
+            surface = font.render(text, antialias, color)
+        else:
+            surface = font.render(text, antialias, color, background)
+        self.surfaces[key] = surface
+        if len(self.surfaces) > self.maxSize:
+            self.surfaces.popitem(last=False)
+            self.evictions += 1
+        return surface
+
+    def clear(self):
+        self.surfaces.clear()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'size': len(self.surfaces),
+                'hitRate': self.hits / lookups if lookups else 0.0}